@@ -1,10 +1,14 @@
 from django.views import View
+from django.http import HttpResponse
 
 # THIRD PARTY
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+
+# PROJECT UTILS
+from utils.metrics import collect
 
 
 class RootApiView(APIView):
@@ -46,4 +50,15 @@ class RootApiView(APIView):
                 'attachments': reverse('knowledgebases:knowledgebase:attachment-list', request=request,
                                        format=format, current_app='knowledgebase'),
             },
+            'search': reverse('searches:search:search-list', request=request,
+                              format=format, current_app='search'),
         })
+
+
+class MetricsApiView(APIView):
+    """Counters in Prometheus text format, staff only"""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, format=None):
+        return HttpResponse(
+            collect(), content_type='text/plain; version=0.0.4')
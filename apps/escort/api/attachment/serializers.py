@@ -11,6 +11,7 @@ from rest_framework.exceptions import (
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.images import get_image_url
 
 # LOCAL UTILS
 from ...utils.generals import object_from_uuid
@@ -25,6 +26,7 @@ Attachment = get_model('escort', 'Attachment')
 class AttachmentSerializer(serializers.ModelSerializer):
     """Serialize Attachment"""
     uploader = serializers.SerializerMethodField()
+    value_image = serializers.SerializerMethodField()
 
     class Meta:
         model = Attachment
@@ -36,6 +38,11 @@ class AttachmentSerializer(serializers.ModelSerializer):
             return uploader.uuid
         return None
 
+    def get_value_image(self, obj):
+        # Size from `?image_size=`
+        return get_image_url(self.context.get('request', None),
+                             obj.value_image.name)
+
 
 class CreateAttachmentSerializer(serializers.ModelSerializer):
     """Create Attachment"""
@@ -12,7 +12,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 
 # THIRD PARTY
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import (
     FormParser, FileUploadParser, MultiPartParser)
@@ -28,6 +28,7 @@ from ..permissions import IsUploaderOrReject
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.uploads import ResumableUploadMixin
 
 # LOCAL MODELS
 from ...models.models import __all__ as model_index
@@ -39,15 +40,21 @@ PAGINATOR = PageNumberPagination()
 
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
-class AttachmentApiView(viewsets.ViewSet):
+class AttachmentApiView(ResumableUploadMixin, viewsets.ViewSet):
     lookup_field = 'uuid'
     permission_classes = (AllowAny,)
     parser_class = (FormParser, FileUploadParser, MultiPartParser,)
     permission_action = {
         # Disable update if not owner
         'update': [IsUploaderOrReject],
-        'partial_update': [IsUploaderOrReject]
+        'partial_update': [IsUploaderOrReject],
+        # Chunked upload
+        'upload_init': [IsAuthenticated],
+        'upload_chunk': [IsAuthenticated],
+        'upload_finalize': [IsAuthenticated]
     }
+    upload_model = Attachment
+    upload_serializer_class = CreateAttachmentSerializer
 
     def get_permissions(self):
         """
@@ -16,6 +16,7 @@ from ....person.utils.auths import check_validation_passed
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.images import get_image_name
 
 
 # LOCAL UTILS
@@ -43,7 +44,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        exclude = ['id']
+        exclude = ['id', 'path']
 
     def get_reply_for_person_name(self, obj):
         reply_for_person = getattr(obj, 'reply_for_person', None)
@@ -57,11 +58,19 @@ class CommentSerializer(serializers.ModelSerializer):
         if hasattr(obj, 'avatar'):
             if obj.avatar:
                 return request \
-                    .build_absolute_uri(settings.MEDIA_URL + obj.avatar)
+                    .build_absolute_uri(settings.MEDIA_URL + get_image_name(request, obj.avatar))
             return None
         return None
 
 
+class ThreadCommentSerializer(CommentSerializer):
+    """Comment with its first replies, set by the view"""
+    replies = CommentSerializer(many=True, read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        pass
+
+
 class SingleCommentSerializer(serializers.ModelSerializer):
     commenter = serializers.CharField(source='commenter.user.username')
     commenter_uuid = serializers.CharField(source='commenter.uuid')
@@ -73,7 +82,7 @@ class SingleCommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        exclude = ['id']
+        exclude = ['id', 'path']
 
     def get_reply_for_person_name(self, obj):
         reply_for_person = getattr(obj, 'reply_for_person', None)
@@ -87,7 +96,7 @@ class SingleCommentSerializer(serializers.ModelSerializer):
         if hasattr(obj, 'avatar'):
             if obj.avatar:
                 return request \
-                    .build_absolute_uri(settings.MEDIA_URL + obj.avatar)
+                    .build_absolute_uri(settings.MEDIA_URL + get_image_name(request, obj.avatar))
             return None
         return None
 
@@ -2,8 +2,7 @@ from uuid import UUID
 from itertools import chain
 
 from django.db.models import (
-    F, Q, Case, Value, When, BooleanField,
-    OuterRef, Subquery)
+    F, Q, Case, Value, When, BooleanField)
 from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 from django.utils.decorators import method_decorator
@@ -21,7 +20,7 @@ from rest_framework.exceptions import NotFound
 # SERIALIZERS
 from .serializers import (
     CommentSerializer, CreateCommentSerializer,
-    SingleCommentSerializer)
+    SingleCommentSerializer, ThreadCommentSerializer)
 
 # MEDIA SERIALIZERS
 from ..protest.serializers import SingleProtestSerializer
@@ -31,15 +30,21 @@ from ..permissions import IsCommenterOrReject
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.identities import take_object
+from utils.paginations import KeysetPagination
 
 # LOCAL UTILS
 from ...utils.constant import STATUS_CHOICES, PUBLISHED, DRAFT
+from ...utils.trees import get_tree, get_first_replies
 
 Protest = get_model('escort', 'Protest')
 Comment = get_model('escort', 'Comment')
 
 # Define to avoid used ...().paginate__
 PAGINATOR = PageNumberPagination()
+MAX_INCLUDE_REPLIES = 10
+# Paginator made each request, it keep the page for its links
+CURSOR_ORDERING = ('-date_created', '-id')
 
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
@@ -72,6 +77,8 @@ class CommentApiView(viewsets.ViewSet):
         protest_uuid = kwargs.get('protest_uuid', None)
         parent_uuid = kwargs.get('parent_uuid', None)
         notified_uuid = kwargs.get('notified_uuid', None)
+        tree = kwargs.get('tree', False)
+        depth = kwargs.get('depth', None)
 
         # The person
         person = getattr(self.request.user, 'person', None)
@@ -84,6 +91,11 @@ class CommentApiView(viewsets.ViewSet):
                     except ValueError:
                         raise NotFound()
 
+                # Already loaded by permission
+                instance = take_object(self.request, Comment, uuid)
+                if instance is not None:
+                    return instance
+
                 # If not commenter can only view published object status
                 # If current person is commenter can see object (w/o status)
                 queryset = Comment.objects \
@@ -98,17 +110,9 @@ class CommentApiView(viewsets.ViewSet):
                         )
                     )
 
-                # Make sub-query for avatar only
-                person_avatar = queryset.filter(
-                    commenter__attribute_values__person=OuterRef('commenter'),
-                    commenter__attribute_values__attribute__identifier='avatar')
-
-                # Append avatar
+                # Append avatar, joined with commenter
                 queryset = queryset.annotate(
-                    avatar=Subquery(
-                        person_avatar
-                        .values('commenter__attribute_values__value_image')[:1])
-                )
+                    avatar=F('commenter__avatar_path'))
                 return queryset.get()
 
             # List objects
@@ -121,8 +125,23 @@ class CommentApiView(viewsets.ViewSet):
                     'reply_to_comment__parent', 'reply_for_person__user__person') \
                 .filter(protest__uuid=protest_uuid)
 
+            # Whole discussion or subtree of parent, ordered by path
+            if tree:
+                parent = None
+                if parent_uuid:
+                    if type(parent_uuid) is not UUID:
+                        try:
+                            parent_uuid = UUID(parent_uuid)
+                        except ValueError:
+                            raise NotFound()
+
+                    parent = Comment.objects \
+                        .only('protest_id', 'path', 'depth') \
+                        .get(uuid=parent_uuid)
+                queryset = get_tree(queryset, comment=parent, depth=depth)
+
             # Get objects with parent
-            if parent_uuid:
+            elif parent_uuid:
                 if type(parent_uuid) is not UUID:
                     try:
                         parent_uuid = UUID(parent_uuid)
@@ -137,21 +156,14 @@ class CommentApiView(viewsets.ViewSet):
                     Q(reply_to_comment__isnull=True),
                     Q(reply_for_person__isnull=True))
 
-            # Make sub-query for avatar only
-            person_avatar = queryset.filter(
-                commenter__attribute_values__person=OuterRef('commenter'),
-                commenter__attribute_values__attribute__identifier='avatar')
-
-            # Append avatar
+            # Append avatar, joined with commenter
             queryset = queryset.annotate(
                 ownership=Case(
                     When(commenter=person, then=Value(True)),
                     default=Value(False),
                     output_field=BooleanField()),
 
-                avatar=Subquery(
-                    person_avatar
-                    .values('commenter__attribute_values__value_image')[:1]))
+                avatar=F('commenter__avatar_path'))
 
             if limit:
                 queryset = queryset[:int(limit)]
@@ -179,15 +191,48 @@ class CommentApiView(viewsets.ViewSet):
         except ObjectDoesNotExist:
             raise NotFound(detail=_("Tidak ditemukan."))
 
+    def set_replies(self, comments, limit):
+        """First replies of every comment on the page, one query"""
+        person = getattr(self.request.user, 'person', None)
+        queryset = Comment.objects \
+            .select_related(
+                'commenter', 'commenter__user__person', 'protest',
+                'reply_to_comment__parent', 'reply_for_person__user__person')
+
+        queryset = queryset.annotate(
+            ownership=Case(
+                When(commenter=person, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()),
+
+            avatar=F('commenter__avatar_path'))
+
+        replies = dict()
+        for reply in get_first_replies(comments, limit, queryset=queryset):
+            replies.setdefault(reply.parent_id, list()).append(reply)
+
+        for comment in comments:
+            comment.replies = replies.get(comment.pk, list())
+        return comments
+
     # Return a response
     def get_response(self, serializer, serializer_parent=None, *args, **kwargs):
         """ Output to endpoint """
         response = dict()
-        response['count'] = PAGINATOR.page.paginator.count
-        response['navigate'] = {
-            'previous': PAGINATOR.get_previous_link(),
-            'next': PAGINATOR.get_next_link()
-        }
+        cursor = kwargs.get('cursor', False)
+
+        # Cursor mode skip the count
+        if cursor:
+            response['navigate'] = {
+                'previous': self.cursor_paginator.get_previous_link(),
+                'next': self.cursor_paginator.get_next_link()
+            }
+        else:
+            response['count'] = PAGINATOR.page.paginator.count
+            response['navigate'] = {
+                'previous': PAGINATOR.get_previous_link(),
+                'next': PAGINATOR.get_next_link()
+            }
 
         response['results'] = serializer.data
         return Response(response, status=response_status.HTTP_200_OK)
@@ -199,6 +244,9 @@ class CommentApiView(viewsets.ViewSet):
         parent_uuid = params.get('parent_uuid', None)
         notified_uuid = params.get('notified_uuid', None)
         limit = params.get('limit', None)
+        tree = params.get('tree', None) in ('1', 'true')
+        depth = params.get('depth', None)
+        include_replies = params.get('include_replies', None)
 
         if protest_uuid:
             try:
@@ -206,15 +254,50 @@ class CommentApiView(viewsets.ViewSet):
             except ValueError:
                 raise NotFound()
 
+        if depth:
+            try:
+                depth = int(depth)
+            except ValueError:
+                raise NotFound(detail=_("Kedalaman harus angka."))
+
+        if include_replies:
+            try:
+                include_replies = min(int(include_replies),
+                                      MAX_INCLUDE_REPLIES)
+            except ValueError:
+                raise NotFound(detail=_("Jumlah balasan harus angka."))
+
+        # Tree already in reading order
+        if tree:
+            notified_uuid = None
+
         # Get protest objects...
         queryset = self.get_object(
             protest_uuid=protest_uuid, limit=limit, parent_uuid=parent_uuid,
-            notified_uuid=notified_uuid)
-        queryset_paginator = PAGINATOR.paginate_queryset(
-            queryset, request)
-        serializer = CommentSerializer(
-            queryset_paginator, many=True, context=context)
-        return self.get_response(serializer)
+            notified_uuid=notified_uuid, tree=tree, depth=depth)
+
+        # Cursor can't continue from sliced, notified (sorted list)
+        # or tree (path ordered) result
+        self.cursor_paginator = KeysetPagination(ordering=CURSOR_ORDERING)
+        cursor = self.cursor_paginator.is_requested(request) and not limit \
+            and not notified_uuid and not tree
+        if cursor:
+            queryset_paginator = self.cursor_paginator.paginate_queryset(
+                queryset, request)
+        else:
+            queryset_paginator = PAGINATOR.paginate_queryset(
+                queryset, request)
+
+        # Tree already has the replies
+        if include_replies and include_replies > 0 and not tree:
+            queryset_paginator = self.set_replies(
+                list(queryset_paginator), include_replies)
+            serializer = ThreadCommentSerializer(
+                queryset_paginator, many=True, context=context)
+        else:
+            serializer = CommentSerializer(
+                queryset_paginator, many=True, context=context)
+        return self.get_response(serializer, cursor=cursor)
 
     # Single item
     def retrieve(self, request, uuid=None, format=None):
@@ -1,7 +1,8 @@
 import uuid
 
 from django.db import transaction
-from django.db.models import Q, F, Count, Avg, FloatField
+from django.db.models import Q, F
+from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 from django.utils.text import Truncator, slugify
 
@@ -17,18 +18,36 @@ from ....person.utils.auths import check_validation_passed
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.images import get_image_url
 
 
 # LOCAL UTILS
-from ...utils.constant import PENDING, SCORE_CHOICES
+from ...utils.constant import PENDING
 from ...utils.generals import object_from_uuid
-from ...utils.attributes import update_attribute_values
+from ...utils.attributes import (
+    update_attribute_values, load_attribute_values)
 from ...utils.auths import CurrentPersonDefault
 
 Media = get_model('escort', 'Media')
 AttributeValue = get_model('escort', 'AttributeValue')
 
 
+class AttributeValueListSerializer(serializers.ListSerializer):
+    """
+    Preload attribute values for all rows in one query
+    Then each row read their values from `child.attribute_values_map`
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, 'all') else data
+        iterable = list(iterable)
+        identifiers = getattr(self.child, 'attribute_identifiers', None)
+
+        self.child.attribute_values_map = load_attribute_values(
+            iterable, identifiers=identifiers)
+        return super().to_representation(iterable)
+
+
 class MediaSerializer(serializers.ModelSerializer):
     """Media model serializers"""
     url = serializers.HyperlinkedIdentityField(
@@ -37,24 +56,31 @@ class MediaSerializer(serializers.ModelSerializer):
     creator = serializers.CharField(source='creator.user.username')
     attribute_values = serializers.SerializerMethodField()
     rating_average = serializers.CharField()
+    attribute_identifiers = ['logo', 'description']
 
     class Meta:
         model = Media
         fields = ['uuid', 'url', 'creator', 'attribute_values', 'label',
                   'protest_count', 'comment_count', 'rating_count',
                   'status', 'status_label', 'rating_average']
+        list_serializer_class = AttributeValueListSerializer
 
     def get_attribute_values(self, obj):
         values_dict = dict()
         request = self.context['request']
-        identifiers = ['logo', 'description']
-
-        values = obj.attribute_values \
-            .prefetch_related('attribute', 'content_type') \
-            .select_related('attribute', 'content_type') \
-            .filter(attribute__identifier__in=identifiers)
-
-        if values.exists():
+        values_map = getattr(self, 'attribute_values_map', None)
+
+        # Used as list, values ready from one query
+        # Or fetch it self if used as single object
+        if values_map is not None:
+            entity_type = ContentType.objects.get_for_model(obj)
+            values = values_map.get((entity_type.pk, obj.pk), list())
+        else:
+            values = obj.attribute_values \
+                .select_related('attribute') \
+                .filter(attribute__identifier__in=self.attribute_identifiers)
+
+        if values:
             for value in values:
                 type = value.attribute.field_type
                 identifier = value.attribute.identifier
@@ -63,7 +89,10 @@ class MediaSerializer(serializers.ModelSerializer):
 
                 if content:
                     # Image and file has url
-                    if type == 'image' or type == 'file':
+                    if type == 'image':
+                        content = get_image_url(request, content.name)
+
+                    if type == 'file':
                         url = content.url
                         content = request.build_absolute_uri(url)
 
@@ -106,7 +135,10 @@ class SingleMediaSerializer(serializers.ModelSerializer):
                 # Has value
                 if content:
                     # Image and file has url
-                    if field_type == 'image' or field_type == 'file':
+                    if field_type == 'image':
+                        content = get_image_url(request, content.name)
+
+                    if field_type == 'file':
                         url = content.url
                         content = request.build_absolute_uri(url)
 
@@ -128,19 +160,10 @@ class SingleMediaSerializer(serializers.ModelSerializer):
         return None
 
     def get_ratings(self, obj):
-        scores = dict()
-        for sc in SCORE_CHOICES:
-            val = sc[0]
-            key = slugify(sc[1])
-            key = key.replace('-', '_')
-            key = '%s' % (val)
-            agrt = {key: Count('score', filter=Q(score__iexact=val))}
-            scores.update(agrt)
-
-        ratings = obj.rating_set \
-            .aggregate(
-                **scores,
-                score_avg=Avg(F('score'), output_field=FloatField()))
+        # Read from maintained counters, no aggregate query
+        ratings = {'%s' % score: count
+                   for score, count in obj.rating_histogram.items()}
+        ratings['score_avg'] = obj.rating_average
         return ratings
 
     def get_status_description(self, obj):
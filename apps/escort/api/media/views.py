@@ -4,8 +4,7 @@ from uuid import UUID
 from django.conf import settings
 from django.http import Http404
 from django.db.models import (
-    F, Q, Avg, Case, Value, When,
-    BooleanField, FloatField)
+    F, Q, Case, Value, When, BooleanField)
 from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 from django.utils.decorators import method_decorator
@@ -39,6 +38,10 @@ from ..permissions import IsOwnerOrReject, IsCreatorOrReject
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.identities import take_object
+from utils.caches import cache_anonymous_response
+from utils.counters import merge_pending
+from utils.paginations import KeysetPagination
 
 # LOCAL UTILS
 from ...utils.constant import STATUS_CHOICES, PUBLISHED
@@ -47,6 +50,8 @@ Media = get_model('escort', 'Media')
 
 # Define to avoid used ...().paginate__
 PAGINATOR = PageNumberPagination()
+# Paginator made each request, it keep the page for its links
+CURSOR_ORDERING = ('-date_created', '-id')
 
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
@@ -172,6 +177,11 @@ class MediaApiView(viewsets.ViewSet):
                 try:
                     uuid = UUID(uuid)
 
+                    # Already loaded by permission
+                    instance = take_object(self.request, Media, uuid)
+                    if instance is not None:
+                        return instance
+
                     # If not creator can only view published object status
                     # If current person is creator can see object (w/o status)
                     return Media.objects \
@@ -192,12 +202,9 @@ class MediaApiView(viewsets.ViewSet):
                 except ValueError:
                     raise Http404
             objs = Media.objects \
-                .prefetch_related('creator') \
-                .select_related('creator') \
-                .annotate(
-                    rating_average=Avg(
-                        F('rating__score'), output_field=FloatField())
-                ).filter(q, q_term)
+                .prefetch_related('creator', 'creator__user') \
+                .select_related('creator', 'creator__user') \
+                .filter(q, q_term)
 
             if limit:
                 objs = objs[:int(limit)]
@@ -211,6 +218,7 @@ class MediaApiView(viewsets.ViewSet):
         """ Output to endpoint """
         response = dict()
         limit = kwargs.get('limit', None)
+        cursor = kwargs.get('cursor', False)
 
         if serializer.data and limit:
             response['count'] = int(limit)
@@ -219,15 +227,23 @@ class MediaApiView(viewsets.ViewSet):
             if serializer_parent is not None:
                 response['media'] = serializer_parent.data
 
-            response['count'] = PAGINATOR.page.paginator.count
-            response['navigate'] = {
-                'previous': PAGINATOR.get_previous_link(),
-                'next': PAGINATOR.get_next_link()
-            }
+            # Cursor mode skip the count
+            if cursor:
+                response['navigate'] = {
+                    'previous': self.cursor_paginator.get_previous_link(),
+                    'next': self.cursor_paginator.get_next_link()
+                }
+            else:
+                response['count'] = PAGINATOR.page.paginator.count
+                response['navigate'] = {
+                    'previous': PAGINATOR.get_previous_link(),
+                    'next': PAGINATOR.get_next_link()
+                }
         response['results'] = serializer.data
         return Response(response, status=response_status.HTTP_200_OK)
 
     # All items
+    @cache_anonymous_response('media')
     def list(self, request, format=None):
         """ View as item list """
         context = {'request': self.request}
@@ -238,22 +254,32 @@ class MediaApiView(viewsets.ViewSet):
         term = params.get('term', None)
         match = params.get('match', None)
         limit = params.get('limit', None)
+        self.cursor_paginator = KeysetPagination(ordering=CURSOR_ORDERING)
+        cursor = self.cursor_paginator.is_requested(request)
 
         queryset = self.get_object(
             creator_uuid=creator_uuid, limit=limit,
             status=status, term=term, match=match)
 
         if not limit:
-            queryset = PAGINATOR.paginate_queryset(queryset, request)
+            if cursor:
+                queryset = self.cursor_paginator.paginate_queryset(
+                    queryset, request)
+            else:
+                queryset = PAGINATOR.paginate_queryset(queryset, request)
 
         serializer = MediaSerializer(queryset, many=True, context=context)
-        return self.get_response(serializer, limit=limit)
+        return self.get_response(serializer, limit=limit, cursor=cursor)
 
     # Single item
+    @cache_anonymous_response('media')
     def retrieve(self, request, uuid=None, format=None):
         """ View as single object """
         context = {'request': self.request}
         queryset = self.get_object(uuid)
+
+        # Counter delta of this process not flushed yet
+        merge_pending(queryset)
         serializer = SingleMediaSerializer(
             queryset, many=False, context=context)
         return Response(serializer.data, status=response_status.HTTP_200_OK)
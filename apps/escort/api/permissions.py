@@ -3,11 +3,15 @@ from uuid import UUID
 from rest_framework import permissions
 from rest_framework.response import Response
 
+from rest_framework.exceptions import NotFound
+
+from django.http import Http404
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 
 # LOCAL UTILS
 from ..utils.constant import PUBLISHED
 from utils.validators import get_model
+from utils.identities import keep_object
 
 # LOCAL MODELS
 from ..models.models import __all__ as model_index
@@ -40,16 +44,36 @@ class IsOwnerOrReject(permissions.BasePermission):
         return False
 
 
-class IsCreatorOrReject(permissions.BasePermission):
-    """Media Permission"""
+class IsObjectOwnerOrReject(permissions.BasePermission):
+    """
+    Object owner permission
+    ------------------------
+    Object fetched by the view get_object() when it return `model`,
+    else by uuid. Kept in request identity map, so the view not query
+    it again; annotated `ownership` used when exist.
+    """
+    model = None
+    owner_field = None
+
+    def get_instance(self, view, current_uuid):
+        try:
+            get_object = getattr(view, 'get_object', None)
+            if get_object:
+                instance = get_object(view.kwargs['uuid'])
+                if isinstance(instance, self.model):
+                    return instance
+            return self.model.objects.get(uuid=current_uuid)
+        except (ObjectDoesNotExist, NotFound, Http404):
+            return None
+
     def has_permission(self, request, view):
         # Staff can always access CRUD
         if request.user.is_staff:
             return True
 
         # Only as person allowed
-        if hasattr(request.user, 'person'):
-            person_uuid = request.user.person.uuid
+        person = getattr(request.user, 'person', None)
+        if person:
             current_uuid = view.kwargs['uuid']
 
             try:
@@ -57,155 +81,53 @@ class IsCreatorOrReject(permissions.BasePermission):
             except ValueError:
                 return False
 
-            # Get media
-            try:
-                media = Media.objects.get(
-                    uuid=current_uuid,
-                    creator__uuid=person_uuid)
-            except ObjectDoesNotExist:
+            instance = self.get_instance(view, current_uuid)
+            if instance is None:
                 return False
-            return True
+
+            keep_object(request, instance)
+            ownership = getattr(instance, 'ownership', None)
+            if ownership is None:
+                owner_id = getattr(instance, '%s_id' % self.owner_field)
+                ownership = owner_id == person.pk
+            return bool(ownership)
         return False
 
 
-class IsProtesterOrReject(permissions.BasePermission):
-    """Protest Permission"""
-    def has_permission(self, request, view):
-        # Staff can always access CRUD
-        if request.user.is_staff:
-            return True
-
-        # Only as person allowed
-        if hasattr(request.user, 'person'):
-            person_uuid = request.user.person.uuid
-            current_uuid = view.kwargs['uuid']
+class IsCreatorOrReject(IsObjectOwnerOrReject):
+    """Media Permission"""
+    model = Media
+    owner_field = 'creator'
 
-            try:
-                current_uuid = UUID(current_uuid)
-            except ValueError:
-                return False
 
-            # Get protest
-            try:
-                protest = Protest.objects.get(
-                    uuid=current_uuid,
-                    protester__uuid=person_uuid)
-            except ObjectDoesNotExist:
-                return False
-            return True
-        return False
+class IsProtesterOrReject(IsObjectOwnerOrReject):
+    """Protest Permission"""
+    model = Protest
+    owner_field = 'protester'
 
 
-class IsRaterOrReject(permissions.BasePermission):
+class IsRaterOrReject(IsObjectOwnerOrReject):
     """Rating Permission"""
-    def has_permission(self, request, view):
-        # Staff can always access CRUD
-        if request.user.is_staff:
-            return True
+    model = Rating
+    owner_field = 'rater'
 
-        # Only as person allowed
-        if hasattr(request.user, 'person'):
-            person_uuid = request.user.person.uuid
-            current_uuid = view.kwargs['uuid']
 
-            try:
-                current_uuid = UUID(current_uuid)
-            except ValueError:
-                return False
-
-            # Get rating
-            try:
-                rating = Rating.objects.get(
-                    uuid=current_uuid,
-                    rater__uuid=person_uuid)
-            except ObjectDoesNotExist:
-                return False
-            return True
-        return False
-
-
-class IsThumberOrReject(permissions.BasePermission):
+class IsThumberOrReject(IsObjectOwnerOrReject):
     """Thumbed Permission"""
-    def has_permission(self, request, view):
-        # Staff can always access CRUD
-        if request.user.is_staff:
-            return True
+    model = Thumbed
+    owner_field = 'thumber'
 
-        # Only as person allowed
-        if hasattr(request.user, 'person'):
-            person_uuid = request.user.person.uuid
-            current_uuid = view.kwargs['uuid']
-
-            try:
-                current_uuid = UUID(current_uuid)
-            except ValueError:
-                return False
-
-            # Get thumb
-            try:
-                thumb = Thumbed.objects.get(
-                    uuid=current_uuid,
-                    thumber__uuid=person_uuid)
-            except ObjectDoesNotExist:
-                return False
-            return True
-        return False
 
-
-class IsUploaderOrReject(permissions.BasePermission):
+class IsUploaderOrReject(IsObjectOwnerOrReject):
     """Attachment Permission"""
-    def has_permission(self, request, view):
-        # Staff can always access CRUD
-        if request.user.is_staff:
-            return True
-
-        # Only as person allowed
-        if hasattr(request.user, 'person'):
-            person_uuid = request.user.person.uuid
-            current_uuid = view.kwargs['uuid']
-
-            try:
-                current_uuid = UUID(current_uuid)
-            except ValueError:
-                return False
-
-            # Get attachment
-            try:
-                attachment = Attachment.objects.get(
-                    uuid=current_uuid,
-                    uploader__uuid=person_uuid)
-            except ObjectDoesNotExist:
-                return False
-            return True
-        return False
+    model = Attachment
+    owner_field = 'uploader'
 
 
-class IsCommenterOrReject(permissions.BasePermission):
+class IsCommenterOrReject(IsObjectOwnerOrReject):
     """Comment Permission"""
-    def has_permission(self, request, view):
-        # Staff can always access CRUD
-        if request.user.is_staff:
-            return True
-
-        # Only as person allowed
-        if hasattr(request.user, 'person'):
-            person_uuid = request.user.person.uuid
-            current_uuid = view.kwargs['uuid']
-
-            try:
-                current_uuid = UUID(current_uuid)
-            except ValueError:
-                return False
-
-            # Get comment
-            try:
-                comment = Comment.objects.get(
-                    uuid=current_uuid,
-                    commenter__uuid=person_uuid)
-            except ObjectDoesNotExist:
-                return False
-            return True
-        return False
+    model = Comment
+    owner_field = 'commenter'
 
 
 class IsEntityOwnerOrReject(permissions.BasePermission):
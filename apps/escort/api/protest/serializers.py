@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import transaction
+from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 
 # THIRD PARTY
@@ -16,12 +17,14 @@ from ....person.utils.auths import check_validation_passed
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.images import get_image_name, get_image_url
 
 
 # LOCAL UTILS
 from ...utils.constant import DRAFT, PENDING
 from ...utils.generals import object_from_uuid
 from ...utils.auths import CurrentPersonDefault
+from ...utils.attributes import load_attribute_values
 
 Media = get_model('escort', 'Media')
 Protest = get_model('escort', 'Protest')
@@ -46,7 +49,7 @@ class ProtestSerializer(serializers.ModelSerializer):
         if hasattr(obj, 'avatar'):
             if obj.avatar:
                 return request \
-                    .build_absolute_uri(settings.MEDIA_URL + obj.avatar)
+                    .build_absolute_uri(settings.MEDIA_URL + get_image_name(request, obj.avatar))
             return None
         return None
 
@@ -72,7 +75,7 @@ class SingleProtestSerializer(serializers.ModelSerializer):
         if hasattr(obj, 'avatar'):
             if obj.avatar:
                 return request \
-                    .build_absolute_uri(settings.MEDIA_URL + obj.avatar)
+                    .build_absolute_uri(settings.MEDIA_URL + get_image_name(request, obj.avatar))
             return None
         return None
 
@@ -82,12 +85,11 @@ class SingleProtestSerializer(serializers.ModelSerializer):
 
         # Has attribute
         if hasattr(obj, 'attribute_values'):
-            values = obj.attribute_values \
-                .prefetch_related('attribute') \
-                .select_related('attribute') \
-                .all()
+            entity_type = ContentType.objects.get_for_model(obj)
+            values = load_attribute_values([obj]) \
+                .get((entity_type.pk, obj.pk), list())
 
-            if values.exists():
+            if values:
                 for value in values:
                     type = value.attribute.field_type
                     identifier = value.attribute.identifier
@@ -97,7 +99,10 @@ class SingleProtestSerializer(serializers.ModelSerializer):
                     # Has value
                     if content:
                         # Image and file has url
-                        if type == 'image' or type == 'file':
+                        if type == 'image':
+                            content = get_image_url(request, content.name)
+
+                        if type == 'file':
                             url = content.url
                             content = request.build_absolute_uri(url)
 
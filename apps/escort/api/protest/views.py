@@ -31,6 +31,10 @@ from ..permissions import IsProtesterOrReject, IsThumberOrReject
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.identities import take_object
+from utils.caches import cache_anonymous_response
+from utils.counters import merge_pending
+from utils.paginations import KeysetPagination
 
 # LOCAL UTILS
 from ...utils.constant import STATUS_CHOICES, PUBLISHED, DRAFT
@@ -40,6 +44,8 @@ Media = get_model('escort', 'Media')
 
 # Define to avoid used ...().paginate__
 PAGINATOR = PageNumberPagination()
+# Paginator made each request, it keep the page for its links
+CURSOR_ORDERING = ('-date_updated', '-id')
 
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
@@ -177,6 +183,11 @@ class ProtestApiView(viewsets.ViewSet):
                     except ValueError:
                         raise NotFound()
 
+                # Already loaded by permission
+                instance = take_object(self.request, Protest, uuid)
+                if instance is not None:
+                    return instance
+
                 # If not protester can only view published object status
                 # If current person is protester can see object (w/o status)
                 queryset = Protest.objects \
@@ -194,21 +205,14 @@ class ProtestApiView(viewsets.ViewSet):
                         )
                     )
 
-                # Make sub-query for avatar only
-                person_avatar = queryset.filter(
-                    protester__attribute_values__person=OuterRef('protester'),
-                    protester__attribute_values__attribute__identifier='avatar')
-
                 person_thumbing = queryset.filter(
                     thumbs__thumber=person,
                     thumbs__thumbing__isnull=False,
                     thumbs__object_id=F('pk'))
 
-                # Append avatar
+                # Append avatar, joined with protester
                 queryset = queryset.annotate(
-                    avatar=Subquery(
-                        person_avatar
-                        .values('protester__attribute_values__value_image')[:1]),
+                    avatar=F('protester__avatar_path'),
 
                     thumbing=Subquery(
                         person_thumbing
@@ -225,16 +229,8 @@ class ProtestApiView(viewsets.ViewSet):
                 .select_related('protester', 'protester__user__person', 'media') \
                 .filter(q, q_term, q_media)
 
-            # Make sub-query for avatar only
-            person_avatar = queryset.filter(
-                protester__attribute_values__person=OuterRef('protester'),
-                protester__attribute_values__attribute__identifier='avatar')
-
-            # Append avatar
-            queryset = queryset.annotate(
-                avatar=Subquery(
-                    person_avatar
-                    .values('protester__attribute_values__value_image')[:1]))
+            # Append avatar, joined with protester
+            queryset = queryset.annotate(avatar=F('protester__avatar_path'))
 
             if limit:
                 queryset = queryset[:int(limit)]
@@ -247,15 +243,25 @@ class ProtestApiView(viewsets.ViewSet):
     def get_response(self, serializer, serializer_parent=None, *args, **kwargs):
         """ Output to endpoint """
         response = dict()
-        response['count'] = PAGINATOR.page.paginator.count
-        response['navigate'] = {
-            'previous': PAGINATOR.get_previous_link(),
-            'next': PAGINATOR.get_next_link()
-        }
+        cursor = kwargs.get('cursor', False)
+
+        # Cursor mode skip the count
+        if cursor:
+            response['navigate'] = {
+                'previous': self.cursor_paginator.get_previous_link(),
+                'next': self.cursor_paginator.get_next_link()
+            }
+        else:
+            response['count'] = PAGINATOR.page.paginator.count
+            response['navigate'] = {
+                'previous': PAGINATOR.get_previous_link(),
+                'next': PAGINATOR.get_next_link()
+            }
 
         response['results'] = serializer.data
         return Response(response, status=response_status.HTTP_200_OK)
 
+    @cache_anonymous_response('protest')
     def list(self, request, format=None):
         context = {'request': self.request}
         params = request.query_params
@@ -278,17 +284,29 @@ class ProtestApiView(viewsets.ViewSet):
             protester_uuid=protester_uuid, media_uuid=media_uuid,
             limit=limit, status=status, term=term, match=match)
 
-        queryset_paginator = PAGINATOR.paginate_queryset(
-            queryset, request)
+        # Cursor can't continue from sliced queryset
+        self.cursor_paginator = KeysetPagination(ordering=CURSOR_ORDERING)
+        cursor = self.cursor_paginator.is_requested(request) and not limit
+        if cursor:
+            queryset_paginator = self.cursor_paginator.paginate_queryset(
+                queryset, request)
+        else:
+            queryset_paginator = PAGINATOR.paginate_queryset(
+                queryset, request)
+
         serializer = ProtestSerializer(
             queryset_paginator, many=True, context=context)
-        return self.get_response(serializer)
+        return self.get_response(serializer, cursor=cursor)
 
     # Single item
+    @cache_anonymous_response('protest', related={'media': 'media'})
     def retrieve(self, request, uuid=None, format=None):
         """ View as single object """
         context = {'request': self.request}
         queryset = self.get_object(uuid)
+
+        # Counter delta of this process not flushed yet
+        merge_pending(queryset)
         serializer = SingleProtestSerializer(
             queryset, many=False, context=context)
         return Response(serializer.data, status=response_status.HTTP_200_OK)
@@ -16,6 +16,7 @@ from ....person.utils.auths import check_validation_passed
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.images import get_image_name
 
 # LOCAL UTILS
 from ...utils.constant import PENDING
@@ -41,7 +42,7 @@ class RatingSerializer(serializers.ModelSerializer):
         request = self.context['request']
         if hasattr(obj, 'avatar'):
             if obj.avatar:
-                return request.build_absolute_uri(settings.MEDIA_URL + obj.avatar)
+                return request.build_absolute_uri(settings.MEDIA_URL + get_image_name(request, obj.avatar))
             return None
         return None
 
@@ -103,3 +104,15 @@ class CreateRatingSerializer(serializers.ModelSerializer):
 
         # Create object, default status is PENDING
         return Rating.objects.create(**validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Rating can't move to other media
+        # Media counters updated by signal from old to new score
+        validated_data.pop('media', None)
+        validated_data.pop('rater', None)
+
+        for key, value in validated_data.items():
+            setattr(instance, key, value)
+        instance.save()
+        return instance
@@ -1,7 +1,7 @@
 from uuid import UUID
 
 from django.db.models import (
-    F, Q, Case, Value, BooleanField, OuterRef, Subquery)
+    F, Q, Case, Value, BooleanField)
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.core.exceptions import ObjectDoesNotExist
@@ -27,6 +27,7 @@ from ..permissions import IsRaterOrReject
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.identities import take_object
 
 Media = get_model('escort', 'Media')
 Rating = get_model('escort', 'Rating')
@@ -95,16 +96,8 @@ class RatingApiView(viewsets.ViewSet):
                 .select_related('media', 'rater', 'rater__user__person') \
                 .filter(media__uuid=media_uuid)
 
-            # Make sub-query for avatar only
-            person_avatar = queryset.filter(
-                rater__attribute_values__person=OuterRef('rater'),
-                rater__attribute_values__attribute__identifier='avatar')
-
-            # Append avatar
-            queryset = queryset.annotate(
-                avatar=Subquery(
-                    person_avatar
-                    .values('rater__attribute_values__value_image')))
+            # Append avatar, joined with rater
+            queryset = queryset.annotate(avatar=F('rater__avatar_path'))
 
             # Current user rating
             try:
@@ -164,12 +157,15 @@ class RatingApiView(viewsets.ViewSet):
         if hasattr(self.request.user, 'person'):
             person = self.request.user.person
 
-        try:
-            queryset = Rating.objects.get(
-                uuid=rating_uuid,
-                rater=person)
-        except ObjectDoesNotExist:
-            raise NotFound()
+        # Already loaded by permission
+        queryset = take_object(self.request, Rating, rating_uuid)
+        if queryset is None:
+            try:
+                queryset = Rating.objects.get(
+                    uuid=rating_uuid,
+                    rater=person)
+            except ObjectDoesNotExist:
+                raise NotFound()
 
         serializer = CreateRatingSerializer(
             instance=queryset,
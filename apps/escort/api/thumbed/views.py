@@ -25,6 +25,7 @@ from ..permissions import IsThumberOrReject
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.identities import take_object
 
 # LOCAL MODELS
 from ...models.models import __all__ as model_index
@@ -67,6 +68,11 @@ class ThumbedApiView(viewsets.ViewSet):
         else:
             raise NotFound()
 
+        # Already loaded by permission
+        instance = take_object(self.request, Thumbed, uuid)
+        if instance is not None:
+            return instance
+
         queryset = Thumbed.objects \
             .prefetch_related('thumber', 'content_type') \
             .select_related('thumber', 'content_type') \
@@ -1,5 +1,6 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save, post_delete, post_init
+from django.db.models.signals import (
+    pre_save, post_save, post_delete, post_init, m2m_changed)
 
 
 class EscortConfig(AppConfig):
@@ -8,17 +9,25 @@ class EscortConfig(AppConfig):
     def ready(self):
         from apps.escort.signals import (
             media_handler,
+            rating_init_handler,
             rating_handler,
             rating_delete_handler,
             protest_init_handler,
             protest_handler,
             protest_delete_handler,
             attribute_handler,
+            attribute_schema_handler,
+            thumbed_init_handler,
             thumbed_handler,
             thumbed_delete_handler,
+            comment_init_handler,
             comment_handler,
             comment_delete_handler)
         from utils.validators import get_model
+        from utils.images import image_init_handler, image_handler
+        from utils.blobs import (
+            blob_handler, blob_init_handler, blob_reference_handler,
+            blob_delete_handler)
 
         # Create media signal
         try:
@@ -37,6 +46,9 @@ class EscortConfig(AppConfig):
             Rating = None
 
         if Rating:
+            post_init.connect(
+                rating_init_handler, sender=Rating, dispatch_uid='rating_init_signal')
+
             post_save.connect(
                 rating_handler, sender=Rating, dispatch_uid='rating_signal')
 
@@ -72,6 +84,26 @@ class EscortConfig(AppConfig):
                 attribute_handler, sender=Attribute,
                 dispatch_uid='attribute_signal')
 
+            m2m_changed.connect(
+                attribute_schema_handler, sender=Attribute.content_type.through,
+                dispatch_uid='attribute_content_type_schema_signal')
+
+        # Reload attribute registry
+        for model_name in ('Attribute', 'AttributeOptionGroup',
+                           'AttributeOption'):
+            try:
+                model = get_model('escort', model_name)
+            except LookupError:
+                continue
+
+            post_save.connect(
+                attribute_schema_handler, sender=model,
+                dispatch_uid='%s_schema_signal' % model_name.lower())
+
+            post_delete.connect(
+                attribute_schema_handler, sender=model,
+                dispatch_uid='%s_schema_delete_signal' % model_name.lower())
+
         # Create Thumbed signal
         try:
             Thumbed = get_model('escort', 'Thumbed')
@@ -79,6 +111,10 @@ class EscortConfig(AppConfig):
             Thumbed = None
 
         if Thumbed:
+            post_init.connect(
+                thumbed_init_handler, sender=Thumbed,
+                dispatch_uid='thumbed_init_signal')
+
             post_save.connect(
                 thumbed_handler, sender=Thumbed, dispatch_uid='thumbed_signal')
 
@@ -93,9 +129,51 @@ class EscortConfig(AppConfig):
             Comment = None
 
         if Comment:
+            post_init.connect(
+                comment_init_handler, sender=Comment,
+                dispatch_uid='comment_init_signal')
+
             post_save.connect(
                 comment_handler, sender=Comment, dispatch_uid='comment_signal')
 
             post_delete.connect(
                 comment_delete_handler, sender=Comment,
                 dispatch_uid='comment_delete_signal')
+
+        # Image derivatives, see utils/images.py
+        for model_name in ('AttributeValue', 'Attachment'):
+            try:
+                model = get_model('escort', model_name)
+            except LookupError:
+                continue
+
+            post_init.connect(
+                image_init_handler, sender=model,
+                dispatch_uid='escort_%s_image_init_signal' % model_name.lower())
+
+            post_save.connect(
+                image_handler, sender=model,
+                dispatch_uid='escort_%s_image_signal' % model_name.lower())
+
+        # Content addressed file, see utils/blobs.py
+        for model_name in ('AttributeValue', 'Attachment'):
+            try:
+                model = get_model('escort', model_name)
+            except LookupError:
+                continue
+
+            pre_save.connect(
+                blob_handler, sender=model,
+                dispatch_uid='escort_%s_blob_signal' % model_name.lower())
+
+            post_init.connect(
+                blob_init_handler, sender=model,
+                dispatch_uid='escort_%s_blob_init_signal' % model_name.lower())
+
+            post_save.connect(
+                blob_reference_handler, sender=model,
+                dispatch_uid='escort_%s_blob_reference_signal' % model_name.lower())
+
+            post_delete.connect(
+                blob_delete_handler, sender=model,
+                dispatch_uid='escort_%s_blob_delete_signal' % model_name.lower())
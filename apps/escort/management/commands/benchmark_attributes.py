@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.attributes import update_attribute_values
+
+Person = get_model('person', 'Person')
+Media = get_model('escort', 'Media')
+Attribute = get_model('escort', 'Attribute')
+AttributeOption = get_model('escort', 'AttributeOption')
+AttributeOptionGroup = get_model('escort', 'AttributeOptionGroup')
+UserModel = get_user_model()
+
+BENCHMARK_PREFIX = 'benchmark'
+
+# Field type and edited value, like a media edit form
+BENCHMARK_FIELDS = [
+    ('text', 'Lorem ipsum'), ('text', 'Dolor sit'), ('text', 'Amet'),
+    ('text', 'Consectetur'), ('text', 'Adipiscing'),
+    ('email', 'redaksi@kawalmedia.com'), ('url', 'https://kawalmedia.com'),
+    ('richtext', '<p>Lorem ipsum</p>'), ('richtext', '<p>Dolor sit</p>'),
+    ('integer', 2019), ('integer', 7), ('boolean', True),
+    ('option', 0), ('multi_option', [0, 1]), ('multi_option', [1, 2]),
+]
+
+
+class Command(BaseCommand):
+    help = 'Count queries of update_attribute_values for a media edit form'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds', type=int, default=3,
+            help='Edits measured per scenario')
+
+    def measure(self, func):
+        queries = list()
+
+        def counter(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        # Run in transaction like partial_update
+        with connection.execute_wrapper(counter), transaction.atomic():
+            func()
+        return len(queries)
+
+    def create_schema(self):
+        media_type = ContentType.objects.get_for_model(Media)
+        group = AttributeOptionGroup.objects.create(
+            label='Benchmark', identifier='%s_group' % BENCHMARK_PREFIX)
+        options = [
+            AttributeOption.objects.create(group=group, option='Option %s' % i)
+            for i in range(4)]
+
+        attributes = list()
+        for index, (field_type, value) in enumerate(BENCHMARK_FIELDS):
+            identifier = '%s_%s_%s' % (BENCHMARK_PREFIX, field_type, index)
+            attribute = Attribute.objects.create(
+                label=identifier, identifier=identifier, field_type=field_type,
+                option_group=group if 'option' in field_type else None)
+            attribute.content_type.add(media_type)
+            attributes.append(attribute)
+        return group, options, attributes
+
+    def get_values(self, attributes, options, round_index):
+        values = dict()
+        for attribute, (field_type, value) in zip(attributes,
+                                                   BENCHMARK_FIELDS):
+            if field_type == 'option':
+                value = options[(value + round_index) % len(options)].pk
+            elif field_type == 'multi_option':
+                value = [options[(index + round_index) % len(options)].pk
+                         for index in value]
+            elif field_type == 'text':
+                value = '%s %s' % (value, round_index)
+            values[attribute.identifier] = value
+        return values
+
+    def handle(self, *args, **options):
+        user = UserModel.objects.create_user(
+            '%s_attributes' % BENCHMARK_PREFIX,
+            '%s@kawalmedia.com' % BENCHMARK_PREFIX)
+        person = Person.objects.create(user=user)
+        group, attribute_options, attributes = self.create_schema()
+
+        try:
+            media = Media.objects.create(
+                label='Benchmark', publication=1, creator=person)
+
+            self.stdout.write('%-12s %8s %8s' % ('scenario', 'fields',
+                                                 'queries'))
+            for round_index in range(options['rounds']):
+                values = self.get_values(
+                    attributes, attribute_options, round_index)
+
+                # First edit after values removed, then normal edit
+                if round_index == 0:
+                    media.attribute_values.all().delete()
+                    scenario = 'missing'
+                else:
+                    scenario = 'edit %s' % round_index
+
+                queries = self.measure(lambda: update_attribute_values(
+                    media, identifiers=list(values), values=values))
+                self.stdout.write('%-12s %8s %8s' % (
+                    scenario, len(values), queries))
+        finally:
+            Media.objects.filter(creator=person).delete()
+            for attribute in attributes:
+                attribute.delete()
+            group.delete()
+            user.delete()
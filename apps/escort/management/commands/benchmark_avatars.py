@@ -0,0 +1,116 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, OuterRef, Subquery
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.constant import PUBLISHED
+
+Person = get_model('person', 'Person')
+PersonAttribute = get_model('person', 'Attribute')
+PersonAttributeValue = get_model('person', 'AttributeValue')
+Media = get_model('escort', 'Media')
+Protest = get_model('escort', 'Protest')
+Comment = get_model('escort', 'Comment')
+UserModel = get_user_model()
+
+BENCHMARK_PREFIX = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Comment list with avatar subquery against joined avatar_path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', type=int, default=1000,
+            help='Comments on the protest')
+        parser.add_argument(
+            '--commenters', type=int, default=50,
+            help='Persons with avatar writing the comments')
+        parser.add_argument(
+            '--rounds', type=int, default=5,
+            help='List read measured per scenario')
+
+    def get_queryset(self, protest):
+        return Comment.objects \
+            .select_related('commenter', 'commenter__user', 'protest') \
+            .filter(protest=protest)
+
+    def get_subquery(self, protest):
+        """Annotation before avatar_path"""
+        queryset = self.get_queryset(protest)
+        person_avatar = queryset.filter(
+            commenter__attribute_values__person=OuterRef('commenter'),
+            commenter__attribute_values__attribute__identifier='avatar')
+        return queryset.annotate(avatar=Subquery(
+            person_avatar
+            .values('commenter__attribute_values__value_image')[:1]))
+
+    def get_joined(self, protest):
+        return self.get_queryset(protest) \
+            .annotate(avatar=F('commenter__avatar_path'))
+
+    def measure(self, queryset, rounds):
+        timings = list()
+        for index in range(rounds):
+            start = time.perf_counter()
+            avatars = [comment.avatar for comment in queryset.all()]
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000, len(avatars)
+
+    def create_commenters(self, total, attribute):
+        person_type = ContentType.objects.get_for_model(Person)
+        persons = list()
+        for index in range(total):
+            user = UserModel.objects.create_user(
+                '%s_avatar_%s' % (BENCHMARK_PREFIX, index),
+                '%s_avatar_%s@kawalmedia.com' % (BENCHMARK_PREFIX, index))
+            path = 'images/person_%s/avatar.jpg' % index
+            person = Person.objects.create(user=user, avatar_path=path)
+            PersonAttributeValue.objects.create(
+                attribute=attribute, content_type=person_type,
+                object_id=person.pk, value_image=path)
+            persons.append(person)
+        return persons
+
+    def handle(self, *args, **options):
+        attribute, created = PersonAttribute.objects.get_or_create(
+            identifier='avatar',
+            defaults={'label': 'Avatar', 'field_type': 'image'})
+        persons = self.create_commenters(options['commenters'], attribute)
+        person = persons[0]
+
+        try:
+            media = Media.objects.create(
+                label='Benchmark', publication=1, status=PUBLISHED,
+                creator=person)
+            protest = Protest.objects.create(
+                label='Benchmark', description='Lorem', media=media,
+                protester=person, status=PUBLISHED)
+            Comment.objects.bulk_create([
+                Comment(protest=protest,
+                        commenter=persons[index % len(persons)],
+                        description='Lorem %s' % index)
+                for index in range(options['comments'])])
+
+            self.stdout.write('%-10s %8s %10s' % ('scenario', 'rows', 'ms'))
+            for scenario, queryset in [
+                    ('subquery', self.get_subquery(protest)),
+                    ('joined', self.get_joined(protest))]:
+                milliseconds, rows = self.measure(queryset, options['rounds'])
+                self.stdout.write('%-10s %8s %10.1f' % (
+                    scenario, rows, milliseconds))
+        finally:
+            Media.objects.filter(creator__in=persons).delete()
+            PersonAttributeValue.objects.filter(
+                attribute=attribute, object_id__in=[p.pk for p in persons]) \
+                .delete()
+            UserModel.objects.filter(
+                pk__in=[p.user_id for p in persons]).delete()
+            if created:
+                attribute.delete()
@@ -0,0 +1,105 @@
+import time
+import random
+import threading
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+# PROJECT UTILS
+from utils.backends import TwoTierCache
+
+BENCHMARK_TABLE = 'temporary_cache'
+
+
+class Command(BaseCommand):
+    help = 'Compare DatabaseCache with TwoTierCache get/set throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--operations', type=int, default=2000,
+            help='Operations per workload')
+        parser.add_argument(
+            '--keys', type=int, default=100,
+            help='Distinct hot keys read')
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Concurrent callers in stampede workload')
+
+    def get_backends(self):
+        database = DatabaseCache(BENCHMARK_TABLE, {'TIMEOUT': 300})
+        stand_in = LocMemCache('benchmark', {'TIMEOUT': 300})
+        return [
+            ('database', database),
+            ('twotier+database', TwoTierCache(None, {
+                'TIMEOUT': 300, 'OPTIONS': {'SHARED': database}})),
+            ('twotier+locmem', TwoTierCache(None, {
+                'TIMEOUT': 300, 'OPTIONS': {'SHARED': stand_in}})),
+        ]
+
+    def measure(self, func, operations):
+        queries = list()
+
+        def counter(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        return operations / elapsed, len(queries)
+
+    def stampede(self, cache, threads):
+        """All thread ask same missing key, count how many computed"""
+        computed = list()
+
+        def compute():
+            computed.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        def worker():
+            cache.get_or_set('benchmark:stampede', compute, 60)
+
+        workers = [threading.Thread(target=worker) for i in range(threads)]
+        for worker_thread in workers:
+            worker_thread.start()
+        for worker_thread in workers:
+            worker_thread.join()
+
+        cache.delete('benchmark:stampede')
+        return len(computed)
+
+    def handle(self, *args, **options):
+        operations = options['operations']
+        keys = ['benchmark:%s' % index for index in range(options['keys'])]
+        value = {'results': [{'label': 'Lorem ipsum', 'count': index}
+                             for index in range(20)]}
+
+        # Make sure database cache table ready
+        call_command('createcachetable', BENCHMARK_TABLE, verbosity=0)
+
+        self.stdout.write('%-20s %12s %8s %12s %8s %10s' % (
+            'backend', 'set op/s', 'queries', 'get op/s', 'queries',
+            'computed'))
+
+        for name, cache in self.get_backends():
+            def run_set():
+                for index in range(operations):
+                    cache.set(keys[index % len(keys)], value)
+
+            def run_get():
+                for index in range(operations):
+                    cache.get(random.choice(keys))
+
+            set_rate, set_queries = self.measure(run_set, operations)
+            get_rate, get_queries = self.measure(run_get, operations)
+            computed = self.stampede(cache, options['threads'])
+            cache.delete_many(keys)
+
+            self.stdout.write('%-20s %12.0f %8s %12.0f %8s %10s' % (
+                name, set_rate, set_queries, get_rate, get_queries,
+                computed))
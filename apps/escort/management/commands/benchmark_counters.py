@@ -0,0 +1,106 @@
+import time
+import threading
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.counters import flush_counters
+
+# LOCAL UTILS
+from ...utils.constant import PUBLISHED
+
+Person = get_model('person', 'Person')
+Media = get_model('escort', 'Media')
+Protest = get_model('escort', 'Protest')
+Comment = get_model('escort', 'Comment')
+UserModel = get_user_model()
+
+BENCHMARK_PREFIX = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Comment create throughput and row lock wait on one hot protest'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', type=int, default=200,
+            help='Comments created per thread')
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Concurrent commenters, use 1 for sqlite')
+
+    def get_lock_status(self):
+        """InnoDB row lock counters, None for other database"""
+        if connection.vendor != 'mysql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SHOW GLOBAL STATUS WHERE Variable_name IN "
+                "('Innodb_row_lock_waits', 'Innodb_row_lock_time')")
+            return {name: int(value) for name, value in cursor.fetchall()}
+
+    def handle(self, *args, **options):
+        total = options['comments']
+        user = UserModel.objects.create_user(
+            '%s_counters' % BENCHMARK_PREFIX,
+            '%s_counters@kawalmedia.com' % BENCHMARK_PREFIX)
+        person = Person.objects.create(user=user)
+        media = Media.objects.create(
+            label='Benchmark', publication=1, status=PUBLISHED,
+            creator=person)
+        protest = Protest.objects.create(
+            label='Benchmark', description='Lorem', media=media,
+            protester=person, status=PUBLISHED)
+        errors = list()
+
+        def worker():
+            try:
+                for index in range(total):
+                    # Each comment own transaction, like a request
+                    with transaction.atomic():
+                        Comment.objects.create(
+                            protest=protest, commenter=person,
+                            description='Lorem %s' % index)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        try:
+            flush_counters()
+            lock_before = self.get_lock_status()
+            workers = [threading.Thread(target=worker)
+                       for index in range(options['threads'])]
+
+            start = time.perf_counter()
+            for worker_thread in workers:
+                worker_thread.start()
+            for worker_thread in workers:
+                worker_thread.join()
+            elapsed = time.perf_counter() - start
+
+            flush_counters()
+            lock_after = self.get_lock_status()
+            created = Comment.objects.filter(protest=protest).count()
+            protest.refresh_from_db()
+
+            self.stdout.write('comments       %s' % created)
+            self.stdout.write('comments/s     %.0f' % (created / elapsed))
+            self.stdout.write('comment_count  %s' % protest.comment_count)
+            self.stdout.write('errors         %s' % len(errors))
+
+            if lock_before is not None:
+                for name in sorted(lock_after):
+                    self.stdout.write('%-14s %s' % (
+                        name.replace('Innodb_', ''),
+                        lock_after[name] - lock_before[name]))
+            else:
+                self.stdout.write('row lock       n/a on %s'
+                                  % connection.vendor)
+        finally:
+            Media.objects.filter(pk=media.pk).delete()
+            user.delete()
@@ -0,0 +1,62 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# PROJECT UTILS
+from utils.images import (
+    get_derivatives, get_derivative_name, make_derivatives,
+    delete_derivatives)
+
+BENCHMARK_PREFIX = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Image bytes of a comment list page, original against derivatives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--width', type=int, default=3000,
+            help='Original photo width, height is 3/4 of it')
+        parser.add_argument(
+            '--page-size', type=int, default=20,
+            help='Avatars drawn by one comment list page')
+
+    def create_photo(self, width):
+        """Noisy gradient, compress like a phone photo"""
+        from PIL import Image
+
+        height = width * 3 // 4
+        image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+        noise = Image.effect_noise((width, height), 64).convert('RGB')
+        image = Image.blend(image, noise, 0.5)
+
+        output = BytesIO()
+        image.save(output, 'JPEG', quality=90)
+        return output.getvalue()
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        name = default_storage.save(
+            '%s/images/photo.jpg' % BENCHMARK_PREFIX,
+            ContentFile(self.create_photo(options['width'])))
+
+        try:
+            start = time.perf_counter()
+            make_derivatives(name, force=True)
+            milliseconds = (time.perf_counter() - start) * 1000
+
+            self.stdout.write('%-10s %12s %14s' % (
+                'size', 'image bytes', 'page bytes'))
+            for size in ['original'] + list(get_derivatives()):
+                path = name if size == 'original' \
+                    else get_derivative_name(name, size)
+                image_bytes = default_storage.size(path)
+                self.stdout.write('%-10s %12s %14s' % (
+                    size, image_bytes, image_bytes * page_size))
+            self.stdout.write('derivatives made in %.1f ms' % milliseconds)
+        finally:
+            delete_derivatives(name)
+            default_storage.delete(name)
@@ -0,0 +1,65 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.images import make_derivatives
+
+logger = logging.getLogger(__name__)
+
+# Every model with `value_image`
+IMAGE_MODELS = [
+    ('escort', 'AttributeValue'), ('escort', 'Attachment'),
+    ('person', 'AttributeValue'), ('knowledgebase', 'Attachment')]
+
+
+class Command(BaseCommand):
+    help = 'Make resized image derivatives of existing uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Rows read per query')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Make again derivatives already exist')
+
+    def build(self, model, chunk_size, force):
+        made, failed, last = 0, 0, 0
+        queryset = model.objects \
+            .exclude(value_image__isnull=True) \
+            .exclude(value_image='') \
+            .order_by('pk')
+
+        while True:
+            rows = list(queryset.filter(pk__gt=last)
+                        .values_list('pk', 'value_image')[:chunk_size])
+            if not rows:
+                break
+
+            for pk, name in rows:
+                try:
+                    made += len(make_derivatives(name, force=force))
+                except Exception:
+                    failed += 1
+                    logger.exception('Image derivative of %s failed', name)
+            last = rows[-1][0]
+        return made, failed
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        for app_label, model_name in IMAGE_MODELS:
+            try:
+                model = get_model(app_label, model_name)
+            except LookupError:
+                continue
+
+            made, failed = self.build(model, chunk_size, options['force'])
+            self.stdout.write('%-28s made %6s failed %4s' % (
+                model._meta.label, made, failed))
+
+        self.stdout.write(self.style.SUCCESS('Image derivatives built.'))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT UTILS
+from utils.blobs import collect_blobs
+
+
+class Command(BaseCommand):
+    help = 'Remove content addressed file no longer referenced'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Blobs removed per transaction')
+        parser.add_argument(
+            '--grace', type=int,
+            default=getattr(settings, 'BLOB_GRACE', 60 * 60 * 24),
+            help='Seconds a blob stay without reference before removed')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        if options['grace'] < 0:
+            raise CommandError('--grace must not be negative.')
+
+        total = collect_blobs(chunk_size, options['grace'])
+        self.stdout.write(self.style.SUCCESS('%s blob removed.' % total))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT UTILS
+from utils.uploads import purge_uploads
+
+
+class Command(BaseCommand):
+    help = 'Remove chunked upload spool not finished in time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int,
+            default=getattr(settings, 'UPLOAD_EXPIRE', 60 * 60 * 24),
+            help='Seconds since the last chunk')
+
+    def handle(self, *args, **options):
+        max_age = options['max_age']
+        if max_age < 0:
+            raise CommandError('--max-age must not be negative.')
+
+        total = purge_uploads(max_age)
+        self.stdout.write(self.style.SUCCESS(
+            '%s upload spool removed.' % total))
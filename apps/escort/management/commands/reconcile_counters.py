@@ -0,0 +1,87 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Min, Max
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.counters import flush_counters
+
+# LOCAL UTILS
+from ...utils.reconciles import get_counters, reconcile_chunk
+
+
+class Command(BaseCommand):
+    help = 'Recompute media, protest and comment counters from source rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', dest='models', action='append',
+            choices=list(get_counters()),
+            help='Only reconcile this model, can repeated')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Primary key range per chunk')
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Chunks run in parallel by this many process')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report drift, nothing written')
+
+    def get_chunks(self, model_name, chunk_size):
+        Model = get_model('escort', model_name)
+        bounds = Model.objects.aggregate(start=Min('pk'), end=Max('pk'))
+        if bounds['start'] is None:
+            return list()
+
+        return [(model_name, start, start + chunk_size)
+                for start in range(bounds['start'], bounds['end'] + 1,
+                                   chunk_size)]
+
+    def handle(self, *args, **options):
+        models = options['models'] or list(get_counters())
+        chunk_size = options['chunk_size']
+        processes = options['processes']
+        dry_run = options['dry_run']
+
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+        if processes < 1:
+            raise CommandError('--processes must be positive.')
+
+        # Delta waiting in this process written first
+        flush_counters()
+
+        for model_name in models:
+            chunks = self.get_chunks(model_name, chunk_size)
+            stats = dict()
+
+            if processes > 1 and len(chunks) > 1:
+                # Child process must open its own connection
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=processes) as pool:
+                    results = list(pool.map(
+                        reconcile_chunk, *zip(*chunks),
+                        [dry_run] * len(chunks)))
+            else:
+                results = [reconcile_chunk(*chunk, dry_run=dry_run)
+                           for chunk in chunks]
+
+            for result in results:
+                for field, (rows, drift, max_drift) in result.items():
+                    total = stats.setdefault(field, [0, 0, 0])
+                    total[0] += rows
+                    total[1] += drift
+                    total[2] = max(total[2], max_drift)
+
+            self.stdout.write('%s: %s chunks' % (model_name, len(chunks)))
+            for field in sorted(stats):
+                rows, drift, max_drift = stats[field]
+                self.stdout.write('  %-20s %8s rows %10s drift %8s max' % (
+                    field, rows, drift, max_drift))
+
+        message = 'Dry run, nothing written.' if dry_run \
+            else 'Counters reconciled.'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.attributes import set_attributes_many
+
+Media = get_model('escort', 'Media')
+
+
+class Command(BaseCommand):
+    help = 'Create missing and delete removed attribute values of all media'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Media processed per batch')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        queryset = Media.objects.only('pk').order_by('pk')
+        total, created = 0, 0
+
+        chunk = list()
+        for media in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(media)
+            if len(chunk) >= chunk_size:
+                created += len(set_attributes_many(chunk) or [])
+                total += len(chunk)
+                chunk = list()
+
+        if chunk:
+            created += len(set_attributes_many(chunk) or [])
+            total += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Checked %s media, created %s attribute values.'
+            % (total, created)))
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:17
+
+from django.db import migrations, models
+from django.db.models import Q, Count, Sum
+
+SCORE_COUNT_FIELDS = {
+    1: 'rating_one_count',
+    2: 'rating_two_count',
+    3: 'rating_three_count',
+    4: 'rating_four_count',
+    5: 'rating_five_count',
+}
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Fill aggregate columns from existing ratings"""
+    Media = apps.get_model('escort', 'Media')
+    Rating = apps.get_model('escort', 'Rating')
+
+    counts = {field: Count('id', filter=Q(score=score))
+              for score, field in SCORE_COUNT_FIELDS.items()}
+
+    aggregates = Rating.objects \
+        .values('media') \
+        .annotate(rating_count=Count('id'), rating_sum=Sum('score'), **counts)
+
+    for item in aggregates.iterator():
+        media_id = item.pop('media')
+        Media.objects.filter(pk=media_id).update(**item)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escort', '0023_auto_20191106_0844'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='rating_five_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_four_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_one_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_three_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='rating_two_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.6 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from treebeard.numconv import NumConv
+
+STEPLEN = 6
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+MAX_DEPTH = 255 // STEPLEN
+
+
+def backfill_comment_paths(apps, schema_editor):
+    """Path from parent chain, parent always created first"""
+    Comment = apps.get_model('escort', 'Comment')
+    converter = NumConv(len(ALPHABET), ALPHABET)
+    paths = dict()
+
+    comments = Comment.objects.order_by('pk').values_list('pk', 'parent_id')
+    for pk, parent_id in comments.iterator():
+        parent_path = paths.get(parent_id, '')
+        if len(parent_path) // STEPLEN >= MAX_DEPTH:
+            parent_path = parent_path[:(MAX_DEPTH - 1) * STEPLEN]
+
+        path = parent_path + converter.int2str(pk).rjust(STEPLEN, ALPHABET[0])
+        paths[pk] = path
+        Comment.objects.filter(pk=pk) \
+            .update(path=path, depth=len(path) // STEPLEN)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escort', '0024_media_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AlterIndexTogether(
+            name='comment',
+            index_together={('protest', 'path')},
+        ),
+        migrations.RunPython(
+            backfill_comment_paths, migrations.RunPython.noop),
+    ]
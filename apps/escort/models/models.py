@@ -122,3 +122,12 @@ if not is_model_registered('escort', 'Thumbed'):
             db_table = 'escort_thumbed'
 
     __all__.append('Thumbed')
+
+
+# 13
+if not is_model_registered('escort', 'Blob'):
+    class Blob(AbstractBlob):
+        class Meta(AbstractBlob.Meta):
+            db_table = 'escort_blob'
+
+    __all__.append('Blob')
@@ -19,7 +19,7 @@ from ..utils.generals import (
 
 from ..utils.constant import (
     STATUS_CHOICES, SCORE_CHOICES, PURPOSE_CHOICES,
-    CLASSIFICATION_CHOICES, PUBLICATION_CHOICES)
+    CLASSIFICATION_CHOICES, PUBLICATION_CHOICES, SCORE_COUNT_FIELDS)
 
 
 def directory_image_path(instance, filename):
@@ -80,6 +80,15 @@ class AbstractMedia(models.Model):
     comment_count = models.PositiveIntegerField(editable=False, default=0)
     rating_count = models.PositiveIntegerField(editable=False, default=0)
 
+    # Rating aggregates, maintained by rating signals
+    rating_sum = models.PositiveIntegerField(editable=False, default=0)
+    rating_one_count = models.PositiveIntegerField(editable=False, default=0)
+    rating_two_count = models.PositiveIntegerField(editable=False, default=0)
+    rating_three_count = models.PositiveIntegerField(
+        editable=False, default=0)
+    rating_four_count = models.PositiveIntegerField(editable=False, default=0)
+    rating_five_count = models.PositiveIntegerField(editable=False, default=0)
+
     class Meta:
         abstract = True
         app_label = 'escort'
@@ -91,6 +100,18 @@ class AbstractMedia(models.Model):
     def __str__(self):
         return self.label
 
+    @property
+    def rating_average(self):
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
+        return None
+
+    @property
+    def rating_histogram(self):
+        """Count of each score, ex: {1: 0, 2: 4, ...}"""
+        return {score: getattr(self, field)
+                for score, field in SCORE_COUNT_FIELDS.items()}
+
     def save(self, *args, **kwargs):
         # Auto fill classification by select publication
         publication = self.publication
@@ -367,6 +388,11 @@ class AbstractComment(models.Model):
     description = models.TextField()
     reply_count = models.PositiveIntegerField(
         editable=False, default=0)
+
+    # Materialized path of `parent` chain, see utils.trees
+    path = models.CharField(
+        max_length=255, blank=True, editable=False, db_index=True)
+    depth = models.PositiveIntegerField(editable=False, default=1)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
@@ -382,6 +408,7 @@ class AbstractComment(models.Model):
         abstract = True
         app_label = 'escort'
         ordering = ('-date_created',)
+        index_together = [('protest', 'path')]
         verbose_name = _('Comment')
         verbose_name_plural = _('Comments')
 
@@ -417,3 +444,23 @@ class AbstractThumbed(models.Model):
 
     def __str__(self):
         return self.thumber.user.username
+
+
+class AbstractBlob(models.Model):
+    """File content stored once, shared by every file with its digest"""
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    references = models.PositiveIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'escort'
+        index_together = [('references', 'date_updated')]
+        verbose_name = _('Blob')
+        verbose_name_plural = _('Blobs')
+
+    def __str__(self):
+        return self.name
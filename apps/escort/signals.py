@@ -1,26 +1,27 @@
-import asyncio
-
 from django.dispatch import receiver
-from django.db.models import F
 from django.contrib.contenttypes.models import ContentType
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.caches import bump_generation
+from utils.counters import add_counter
 
 # NOTIFICATION UTILS
-from ..notice.utils.asyncreate import create_notification
+from ..notice.utils.outbox import enqueue_notification
+from ..notice.utils.snapshots import refresh_excerpt
+from ..notice.utils.unreads import delete_notifications
 
 # LOCAL UTILS
-from .utils.constant import PUBLISHED
+from .utils.constant import PUBLISHED, SCORE_COUNT_FIELDS
 from .utils.attributes import (
+    registry,
     set_attributes,
     update_attribute_values)
+from .utils.trees import set_path
 
 EntityLog = get_model('escort', 'EntityLog')
 Notification = get_model('notice', 'Notification')
 
-loop = asyncio.get_event_loop()
-
 
 # Create signals
 def media_handler(sender, instance, created, **kwargs):
@@ -49,25 +50,45 @@ def media_handler(sender, instance, created, **kwargs):
             update_attribute_values(
                 instance, identifiers=keys, values=values)
 
+    bump_generation('media:%s' % instance.uuid, 'media')
+
+
+def rating_init_handler(sender, instance, **kwargs):
+    instance.__old_score = instance.score
+
 
 def rating_handler(sender, instance, created, **kwargs):
     """Signals for Rating action"""
     media = instance.media
+    score = instance.score
+    old_score = getattr(instance, '__old_score', None)
+    scope = 'media:%s' % media.uuid
 
     # Only new rating created
     if created:
-        media.rating_count = F('rating_count') + 1
-        media.save()
+        add_counter(media, 'rating_count', 1, scope=scope)
+        add_counter(media, 'rating_sum', score, scope=scope)
+        add_counter(media, SCORE_COUNT_FIELDS[score], 1, scope=scope)
+
+    # Score edited, move it to new score
+    if not created and old_score and old_score != score:
+        add_counter(media, 'rating_sum', score - old_score, scope=scope)
+        add_counter(media, SCORE_COUNT_FIELDS[old_score], -1, scope=scope)
+        add_counter(media, SCORE_COUNT_FIELDS[score], 1, scope=scope)
+
+    instance.__old_score = score
 
 
 def rating_delete_handler(sender, instance, **kwargs):
     """Signals for Rating Delete action"""
     media = instance.media
+    score = instance.score
+    scope = 'media:%s' % media.uuid
 
-    # Re-sum rating count
-    if media.rating_count:
-        media.rating_count = F('rating_count') - 1
-        media.save()
+    # Re-sum rating count, flush never go below zero
+    add_counter(media, 'rating_count', -1, scope=scope)
+    add_counter(media, 'rating_sum', -score, scope=scope)
+    add_counter(media, SCORE_COUNT_FIELDS[score], -1, scope=scope)
 
 
 def protest_init_handler(sender, instance, **kwargs):
@@ -78,21 +99,19 @@ def protest_handler(sender, instance, created, **kwargs):
     """Signals for Protest action"""
     media = instance.media
     status = instance.status
-    old_status = instance.__old_status
+    old_status = None if created else instance.__old_status
+    scope = 'media:%s' % media.uuid
 
-    # Make sure this not from commented action
     # If status change to PUBLISHED, +1 count but old status is not PUBLISHED
     # If status change from PUBLISHED, -1 count but new status is not PUBLISHED
-    if not hasattr(instance, 'comment_handler') and old_status != status:
+    if old_status != status:
         if status is PUBLISHED:
-            media.protest_count = F('protest_count') + 1
-            media.save()
+            add_counter(media, 'protest_count', 1, scope=scope)
         elif old_status is PUBLISHED:
-            # But if not publish
-            # Reduce protest count, but make sure count is ready
-            if not created and media.protest_count:
-                media.protest_count = F('protest_count') - 1
-                media.save()
+            add_counter(media, 'protest_count', -1, scope=scope)
+
+    instance.__old_status = status
+    bump_generation('protest:%s' % instance.uuid, 'protest')
 
     # Execute only has request
     if hasattr(instance, 'request'):
@@ -110,9 +129,11 @@ def protest_delete_handler(sender, instance, **kwargs):
     media = instance.media
 
     # Re-sum protest count
-    if media.protest_count:
-        media.protest_count = F('protest_count') - 1
-        media.save()
+    if instance.status is PUBLISHED:
+        add_counter(media, 'protest_count', -1,
+                    scope='media:%s' % media.uuid)
+
+    bump_generation('protest:%s' % instance.uuid, 'protest')
 
 
 def attribute_handler(sender, instance, created, **kwargs):
@@ -122,36 +143,51 @@ def attribute_handler(sender, instance, created, **kwargs):
         pass
 
 
+def attribute_schema_handler(sender, **kwargs):
+    """Attribute or option changed, reload registry"""
+    registry.invalidate()
+
+
+def get_thumbed_scope(entity_object):
+    # Only protest cached, comment not
+    if entity_object._meta.model_name == 'protest':
+        return 'protest:%s' % entity_object.uuid
+    return None
+
+
+def thumbed_init_handler(sender, instance, **kwargs):
+    instance.__old_thumbing = instance.thumbing
+
+
 def thumbed_handler(sender, instance, created, **kwargs):
     """Signals for Thumbs action"""
     entity_object = getattr(instance, 'content_object', None)
     thumbing = instance.thumbing
+    old_thumbing = None if created \
+        else getattr(instance, '__old_thumbing', None)
 
     if (entity_object and hasattr(entity_object, 'thumbsup_count')
-            and hasattr(entity_object, 'thumbsdown_count')):
-        # Only new thumb created
-        if created:
-            if thumbing is True:
-                entity_object.thumbsup_count = F('thumbsup_count') + 1
+            and hasattr(entity_object, 'thumbsdown_count')
+            and thumbing is not old_thumbing):
+        scope = get_thumbed_scope(entity_object)
 
-            if thumbing is False:
-                entity_object.thumbsdown_count = F('thumbsdown_count') + 1
+        """
+        Remove old thumb then add the new one
+        If thumb is null, only remove
+        """
+        if old_thumbing is True:
+            add_counter(entity_object, 'thumbsup_count', -1, scope=scope)
 
-        if not created:
-            """
-            If thumb is UP reduce thumb DOWN and add thumb UP
-            If thumb is DOWN reduce thumb UP and add thumb DOWN
-            If thumb is null, no action
-            """
-            if thumbing is True and entity_object.thumbsdown_count:
-                entity_object.thumbsdown_count = F('thumbsdown_count') - 1
-                entity_object.thumbsup_count = F('thumbsup_count') + 1
+        if old_thumbing is False:
+            add_counter(entity_object, 'thumbsdown_count', -1, scope=scope)
 
-            if thumbing is False and entity_object.thumbsup_count:
-                entity_object.thumbsup_count = F('thumbsup_count') - 1
-                entity_object.thumbsdown_count = F('thumbsdown_count') + 1
+        if thumbing is True:
+            add_counter(entity_object, 'thumbsup_count', 1, scope=scope)
 
-        entity_object.save()
+        if thumbing is False:
+            add_counter(entity_object, 'thumbsdown_count', 1, scope=scope)
+
+    instance.__old_thumbing = thumbing
 
 
 def thumbed_delete_handler(sender, instance, **kwargs):
@@ -161,16 +197,19 @@ def thumbed_delete_handler(sender, instance, **kwargs):
 
     if (entity_object and hasattr(entity_object, 'thumbsup_count')
             and hasattr(entity_object, 'thumbsdown_count')):
-        # Re-sum count
+        scope = get_thumbed_scope(entity_object)
+
+        # Re-sum count, flush never go below zero
         if thumbing is True:
-            if entity_object.thumbsup_count:
-                entity_object.thumbsup_count = F('thumbsup_count') - 1
+            add_counter(entity_object, 'thumbsup_count', -1, scope=scope)
 
         if thumbing is False:
-            if entity_object.thumbsdown_count:
-                entity_object.thumbsdown_count = F('thumbsdown_count') - 1
+            add_counter(entity_object, 'thumbsdown_count', -1, scope=scope)
+
 
-        entity_object.save()
+def comment_init_handler(sender, instance, **kwargs):
+    # Deferred field not loaded here
+    instance.__old_description = instance.__dict__.get('description', None)
 
 
 def comment_handler(sender, instance, created, **kwargs):
@@ -181,22 +220,26 @@ def comment_handler(sender, instance, created, **kwargs):
 
     # Only new protest created
     if created:
-        # This indicate action from comment action
-        setattr(protest, 'comment_handler', True)
-
-        protest.comment_count = F('comment_count') + 1
-        protest.save()
+        set_path(instance)
+        add_counter(protest, 'comment_count', 1,
+                    scope='protest:%s' % protest.uuid)
 
         if media:
-            media.comment_count = F('comment_count') + 1
-            media.save()
+            add_counter(media, 'comment_count', 1,
+                        scope='media:%s' % media.uuid)
 
         if parent:
-            parent.reply_count = F('reply_count') + 1
-            parent.save()
+            add_counter(parent, 'reply_count', 1)
+
+        # Notification created by worker, outbox row in same transaction
+        request = getattr(instance, 'request', None)
+        actor = getattr(getattr(request, 'user', None), 'person', None)
+        enqueue_notification(instance, actor=actor or instance.commenter)
 
-        # Create notification
-        loop.run_in_executor(None, create_notification, instance)
+    # Edited, notification excerpt follow
+    elif instance.__old_description != instance.description:
+        refresh_excerpt(instance)
+        instance.__old_description = instance.description
 
 
 def comment_delete_handler(sender, instance, **kwargs):
@@ -206,22 +249,22 @@ def comment_delete_handler(sender, instance, **kwargs):
     parent = getattr(instance, 'parent', None)
 
     content_type = ContentType.objects.get_for_model(instance)
+    # Group show other comment too, kept with its excerpt
     notification = Notification.objects.filter(
         content_type=content_type.pk,
-        content_id=instance.pk)
+        content_id=instance.pk,
+        actor_count__lte=1)
 
     if notification.exists():
-        notification.delete()
+        delete_notifications(notification)
 
-    # Re-sum comment count
-    if protest.comment_count:
-        protest.comment_count = F('comment_count') - 1
-        protest.save()
+    # Re-sum comment count, flush never go below zero
+    add_counter(protest, 'comment_count', -1,
+                scope='protest:%s' % protest.uuid)
 
-        if media and media.comment_count:
-            media.comment_count = F('comment_count') - 1
-            media.save()
+    if media:
+        add_counter(media, 'comment_count', -1,
+                    scope='media:%s' % media.uuid)
 
-    if parent and parent.reply_count:
-        parent.reply_count = F('reply_count') - 1
-        parent.save()
+    if parent:
+        add_counter(parent, 'reply_count', -1)
@@ -1,3 +1,1130 @@
-from django.test import TestCase
+import os
+import time
+import base64
+import shutil
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError, connection, transaction
+from django.db.models import QuerySet
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.contenttypes.models import ContentType
+
+# THIRD PARTY
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.backends import LocalLRU, TwoTierCache, wrap
+from utils.metrics import get_metric_key, increment, flush_metrics, collect
+from utils.executors import BackgroundExecutor, executor
+from utils.images import (
+    get_image_name, get_derivative_name, make_derivatives)
+from utils.blobs import save_file, delete_file
+from utils.counters import buffer, merge_pending, flush_counters
+from utils import uploads
+
+# LOCAL UTILS
+from .utils.testcases import FixtureMixin
+from .utils.trees import STEPLEN, get_segment
+from .utils.attributes import (
+    registry, set_attributes, set_attributes_many, update_attribute_values)
+
+Person = get_model('person', 'Person')
+Media = get_model('escort', 'Media')
+Protest = get_model('escort', 'Protest')
+Comment = get_model('escort', 'Comment')
+Rating = get_model('escort', 'Rating')
+Thumbed = get_model('escort', 'Thumbed')
+Attachment = get_model('escort', 'Attachment')
+Attribute = get_model('escort', 'Attribute')
+Blob = get_model('escort', 'Blob')
+AttributeOption = get_model('escort', 'AttributeOption')
+AttributeOptionGroup = get_model('escort', 'AttributeOptionGroup')
+AttributeValue = get_model('escort', 'AttributeValue')
+
+# Also run by DatabaseCache, not a view query
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT',
+                          'ROLLBACK')
+
+
+def get_app_queries(context):
+    """Captured queries without the ones of a DatabaseCache tier"""
+    tables = {getattr(caches[alias], '_table', None)
+              for alias in settings.CACHES} - {None}
+    return [query for query in context.captured_queries
+            if not query['sql'].startswith(TRANSACTION_STATEMENTS)
+            and not any(table in query['sql'] for table in tables)]
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class ListQueryCountTest(FixtureMixin, APITestCase):
+    """List endpoints must run constant queries whatever the page size"""
+
+    def setUp(self):
+        self.person = self.create_person('commenter')
+
+        media_type = ContentType.objects.get_for_model(Media)
+        for identifier, field_type in [('logo', 'image'),
+                                       ('description', 'richtext')]:
+            attribute = Attribute.objects.create(
+                label=identifier, identifier=identifier,
+                field_type=field_type)
+            attribute.content_type.add(media_type)
+
+        # Comments on the page all go to this protest
+        self.protest = self.create_page_protest('Base')
+
+    def create_page_protest(self, label):
+        media = self.create_media(self.person, 'Media %s' % label)
+        AttributeValue.objects \
+            .filter(media=media, attribute__identifier='description') \
+            .update(value_richtext='Lorem ipsum dolor sit amet')
+
+        return self.create_protest(
+            media, self.person, 'Protest %s' % label)
+
+    def create_objects(self, start, total):
+        for index in range(start, start + total):
+            self.create_page_protest(index)
+            Comment.objects.create(
+                protest=self.protest, commenter=self.person,
+                description='Lorem')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response.json()
+
+    def assertConstantQueries(self, url):
+        # Warm up ContentType cache first
+        self.client.get(url)
+
+        self.create_objects(0, 2)
+        small_queries, small = self.count_queries(url)
+
+        self.create_objects(2, 8)
+        large_queries, large = self.count_queries(url)
+
+        self.assertGreater(len(large['results']), len(small['results']))
+        self.assertEqual(small_queries, large_queries)
+        return large
+
+    def test_media_list(self):
+        response = self.assertConstantQueries('/api/escort/medias/')
+        values = response['results'][0]['attribute_values']
+        self.assertEqual(values['description'], 'Lorem ipsum dolor sit amet')
+
+    def test_protest_list(self):
+        self.assertConstantQueries('/api/escort/protests/')
+
+    def test_comment_list(self):
+        url = '/api/escort/comments/?protest_uuid=%s' % self.protest.uuid
+        self.assertConstantQueries(url)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CursorPaginationTest(FixtureMixin, APITestCase):
+    """Keyset pages follow their links both ways, ties broken by id"""
+
+    def setUp(self):
+        self.person = self.create_person('cursor')
+        for index in range(5):
+            self.create_media(self.person, 'Media %s' % index)
+
+        # Three rows on the same time, only id order them
+        same = Media.objects.order_by('pk')[1].date_created
+        Media.objects.filter(pk__in=Media.objects.order_by('pk')
+                             .values_list('pk', flat=True)[2:4]) \
+            .update(date_created=same)
+        self.expected = [str(uuid) for uuid in Media.objects
+                         .order_by('-date_created', '-id')
+                         .values_list('uuid', flat=True)]
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [item['uuid'] for item in data['results']], data['navigate']
+
+    def test_forward_backward(self):
+        pages, url = list(), '/api/escort/medias/?cursor=&page_size=2'
+        while url:
+            page, navigate = self.get_page(url)
+            pages.append(page)
+            url = navigate['next']
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # Back from the last page
+        previous = navigate['previous']
+        for page in reversed(pages[:-1]):
+            self.assertEqual(self.get_page(previous)[0], page)
+            previous = self.get_page(previous)[1]['previous']
+        self.assertIsNone(previous)
+
+    def test_bad_cursor(self):
+        for tokens in ('p=bukan-tanggal&i=1', 'p=2019-11-06&i=satu', 'i=1'):
+            cursor = base64.urlsafe_b64encode(tokens.encode('ascii'))
+            response = self.client.get(
+                '/api/escort/medias/?cursor=%s' % cursor.decode('ascii'))
+            self.assertEqual(response.status_code, 404)
+
+        response = self.client.get('/api/escort/medias/?cursor=%%%%')
+        self.assertEqual(response.status_code, 404)
+
+
+class IdentityMapTest(FixtureMixin, APITestCase):
+    """Update and delete reuse the object loaded by permission"""
+
+    def setUp(self):
+        self.create_fixture('identity')
+        self.comment = Comment.objects.create(
+            protest=self.protest, commenter=self.person, description='Lorem')
+        self.url = '/api/escort/comments/%s/' % self.comment.uuid
+
+    def count_selects(self, method, **kwargs):
+        lookup = '"escort_comment"."uuid" ='
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(self.url, **kwargs)
+        return response, len([query for query in context.captured_queries
+                              if query['sql'].startswith('SELECT')
+                              and lookup in query['sql']])
+
+    def test_owner(self):
+        self.client.force_authenticate(self.person.user)
+
+        # Permission load, response read after save
+        response, selects = self.count_selects(
+            'patch', data={'description': 'Ipsum',
+                           'protest_uuid': str(self.protest.uuid)},
+            format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['description'], 'Ipsum')
+        self.assertEqual(selects, 2)
+
+        response, selects = self.count_selects('delete')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(selects, 1)
+        self.assertFalse(Comment.objects.filter(pk=self.comment.pk).exists())
+
+    def test_other(self):
+        other = self.create_person('other')
+        self.client.force_authenticate(other.user)
+
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Comment.objects.filter(pk=self.comment.pk).exists())
+
+        response = self.client.delete(
+            '/api/escort/comments/%s/' % Media.objects.get().uuid)
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CommentTreeTest(FixtureMixin, APITestCase):
+    """Discussion or subtree loaded in path order"""
+
+    def setUp(self):
+        self.create_fixture('tree')
+
+        # first > (reply > deep), second > other
+        self.first = self.create('first')
+        self.second = self.create('second')
+        self.reply = self.create('reply', parent=self.first)
+        self.other = self.create('other', parent=self.second)
+        self.deep = self.create('deep', parent=self.reply)
+
+    def create(self, description, parent=None):
+        return Comment.objects.create(
+            protest=self.protest, commenter=self.person,
+            description=description, parent=parent)
+
+    def get_tree(self, **params):
+        params.update(protest_uuid=self.protest.uuid, tree=1)
+        response = self.client.get('/api/escort/comments/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(item['description'], item['depth'])
+                for item in response.json()['results']]
+
+    def test_paths(self):
+        self.deep.refresh_from_db()
+        self.assertEqual(self.deep.depth, 3)
+        self.assertEqual(
+            self.deep.path, self.reply.path + get_segment(self.deep.pk))
+        self.assertEqual(self.reply.path[:STEPLEN], self.first.path)
+
+    def test_tree(self):
+        self.assertEqual(self.get_tree(), [
+            ('first', 1), ('reply', 2), ('deep', 3),
+            ('second', 1), ('other', 2)])
+        self.assertEqual(self.get_tree(depth=1), [
+            ('first', 1), ('second', 1)])
+        self.assertEqual(self.get_tree(parent_uuid=self.first.uuid), [
+            ('first', 1), ('reply', 2), ('deep', 3)])
+        self.assertEqual(
+            self.get_tree(parent_uuid=self.first.uuid, depth=2),
+            [('first', 1), ('reply', 2)])
+
+    def test_one_query(self):
+        url = '/api/escort/comments/?protest_uuid=%s&tree=1' % \
+            self.protest.uuid
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        comments = [query for query in context.captured_queries
+                    if 'FROM "escort_comment"' in query['sql']
+                    and 'COUNT' not in query['sql']]
+        self.assertEqual(len(comments), 1)
+
+    def test_avatar(self):
+        Person.objects.filter(pk=self.person.pk) \
+            .update(avatar_path='images/person/me.jpg')
+        response = self.client.get(
+            '/api/escort/comments/?protest_uuid=%s' % self.protest.uuid)
+        for item in response.json()['results']:
+            self.assertTrue(item['avatar'].endswith('/images/person/me.jpg'))
+
+    def test_include_replies(self):
+        self.create('reply 2', parent=self.first)
+        self.create('reply 3', parent=self.first)
+        url = '/api/escort/comments/?protest_uuid=%s' % self.protest.uuid
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as plain:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url + '&include_replies=2')
+
+        # One query for replies of the whole page
+        self.assertEqual(len(context), len(plain) + 1)
+        replies = {item['description']: [reply['description']
+                                         for reply in item['replies']]
+                   for item in response.json()['results']}
+        self.assertEqual(replies, {'first': ['reply', 'reply 2'],
+                                   'second': ['other']})
+
+        # MySQL 5.7, no window function
+        with mock.patch('apps.escort.utils.trees.supports_window',
+                        return_value=False):
+            response = self.client.get(url + '&include_replies=2')
+        self.assertEqual({item['description']: [
+            reply['description'] for reply in item['replies']]
+            for item in response.json()['results']}, replies)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class RatingAggregateTest(FixtureMixin, APITransactionTestCase):
+    """Media rating columns follow rating create, edit and delete"""
+
+    def setUp(self):
+        self.create_fixture('rater', persons=2, protest=False)
+
+    def test_aggregates(self):
+        first = Rating.objects.create(
+            media=self.media, rater=self.persons[0], score=5)
+        second = Rating.objects.create(
+            media=self.media, rater=self.persons[1], score=3)
+
+        # Edit score
+        second = Rating.objects.get(pk=second.pk)
+        second.score = 1
+        second.save()
+
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.rating_count, 2)
+        self.assertEqual(self.media.rating_average, 3)
+        self.assertEqual(self.media.rating_histogram,
+                         {1: 1, 2: 0, 3: 0, 4: 0, 5: 1})
+
+        first.delete()
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.rating_count, 1)
+        self.assertEqual(self.media.rating_sum, 1)
+        self.assertEqual(self.media.rating_five_count, 0)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class ResponseCacheTest(FixtureMixin, APITransactionTestCase):
+    """Anonymous read cached until signal bump the generation"""
+
+    def setUp(self):
+        # Increment of earlier tests not counted here
+        flush_metrics()
+        cache.clear()
+        self.person = self.create_person('viewer')
+        self.medias = [self.create_media(self.person, 'Media %s' % index)
+                       for index in range(2)]
+        self.protest = self.create_protest(self.medias[0], self.person)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        # Cache hit on database shared tier still query its table
+        return len(get_app_queries(context)), response.json()
+
+    def test_hit_and_invalidate(self):
+        url = '/api/escort/medias/'
+        detail = '/api/escort/medias/%s/' % self.medias[1].uuid
+
+        self.get('%s?page=1&term=' % url)
+        self.get(detail)
+        queries, response = self.get('%s?page=1' % url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(response['results'][0]['comment_count'], 0)
+
+        # Comment on first media, list contain it must refresh
+        Comment.objects.create(
+            protest=self.protest, commenter=self.person,
+            description='Lorem')
+        queries, response = self.get(url)
+        self.assertGreater(queries, 0)
+
+        counts = {item['uuid']: item['comment_count']
+                  for item in response['results']}
+        self.assertEqual(counts[str(self.medias[0].uuid)], 1)
+
+        # Other media detail not affected
+        queries, response = self.get(detail)
+        self.assertEqual(queries, 0)
+
+        flush_metrics()
+        self.assertEqual(cache.get(get_metric_key(
+            'response_cache_hits_total', {'resource': 'media'})), 2)
+
+    @override_settings(METRICS_FLUSH_INTERVAL=60)
+    def test_buffered_metrics(self):
+        url = '/api/escort/medias/'
+        self.get(url)
+
+        # Hit counted in process, cache written by flush
+        self.get(url)
+        self.get(url)
+        key = get_metric_key('response_cache_hits_total', {'resource': 'media'})
+        self.assertIsNone(cache.get(key))
+        flush_metrics()
+        self.assertEqual(cache.get(key), 2)
+
+        # Series created at once by many threads all listed
+        threads = [threading.Thread(
+            target=increment, args=('metrics_test_total',),
+            kwargs={'index': index}) for index in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        flush_metrics()
+        self.assertEqual(collect().count('metrics_test_total{'), 10)
+
+
+class TwoTierCacheTest(APITestCase):
+    """Local tier limited and invalidated, loader run once"""
+
+    def setUp(self):
+        self.shared = LocMemCache('twotier', {})
+        self.shared.clear()
+
+    def get_cache(self, **options):
+        options = dict({'SHARED': self.shared, 'NAMESPACE_INTERVAL': 0,
+                        'SHARED_ONLY_PREFIXES': ['metrics:']}, **options)
+        return TwoTierCache('', {'OPTIONS': options})
+
+    def test_lru(self):
+        local = LocalLRU(max_entries=2, max_bytes=10)
+        local.set('a', b'1', 60)
+        local.set('b', b'2', 60)
+        local.get('a')
+        local.set('c', b'3', 60)
+        self.assertEqual([local.get(key) for key in 'abc'],
+                         [b'1', None, b'3'])
+
+        # Over bytes, oldest dropped first
+        local.set('d', b'0123456789', 60)
+        self.assertEqual([local.get(key) for key in 'acd'],
+                         [None, None, b'0123456789'])
+        self.assertEqual(local.size, 10)
+
+    def test_ttl(self):
+        local = LocalLRU()
+        local.set('a', b'1', 0.05)
+        self.assertEqual(local.get('a'), b'1')
+        time.sleep(0.1)
+        self.assertIsNone(local.get('a'))
+        self.assertEqual(local.size, 0)
+
+    def test_namespace(self):
+        one, other = self.get_cache(), self.get_cache()
+        one.set('key', 'lama')
+        self.assertEqual(other.get('key'), 'lama')
+
+        # Other process see it only after local expired
+        one.set('key', 'baru')
+        self.assertEqual(other.get('key'), 'lama')
+
+        # Clear change the token, all local entries dropped
+        one.clear()
+        self.assertIsNone(other.get('key'))
+
+    def test_shared_only(self):
+        one, other = self.get_cache(), self.get_cache()
+        one.set('metrics:key', 'lama')
+        self.assertEqual(other.get('metrics:key'), 'lama')
+
+        one.set('metrics:key', 'baru')
+        self.assertEqual(other.get('metrics:key'), 'baru')
+        one.delete('metrics:key')
+        self.assertIsNone(other.get('metrics:key'))
+
+    def test_single_flight(self):
+        twotier, calls, results = self.get_cache(), list(), list()
+
+        def load():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'nilai'
+
+        threads = [threading.Thread(
+            target=lambda: results.append(twotier.get_or_set('key', load, 60)))
+            for index in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['nilai'] * 5)
+
+    def test_early_refresh(self):
+        twotier = self.get_cache()
+        twotier.set_stored('slow', twotier.make_key('slow'),
+                         wrap('lama', 10, delta=100), 10)
+        twotier.set_stored('fast', twotier.make_key('fast'),
+                         wrap('lama', 10, delta=0), 10)
+
+        # Long compute time near expiry, refreshed before it
+        with mock.patch('utils.backends.random.random', return_value=0.5):
+            self.assertEqual(twotier.get_or_set('slow', 'baru', 10), 'baru')
+            self.assertEqual(twotier.get_or_set('fast', 'baru', 10), 'lama')
+
+
+class AttributeRegistryTest(FixtureMixin, APITransactionTestCase):
+    """Attribute definitions read from process memory"""
+
+    def setUp(self):
+        cache.clear()
+        self.person = self.create_person('registry')
+        self.media_type = ContentType.objects.get_for_model(Media)
+
+        self.group = AttributeOptionGroup.objects.create(
+            label='Scope', identifier='scope')
+        self.option = AttributeOption.objects.create(
+            group=self.group, option='National')
+
+        self.attribute = Attribute.objects.create(
+            label='Scope', identifier='scope', field_type='option',
+            option_group=self.group)
+        self.attribute.content_type.add(self.media_type)
+
+    def test_schema(self):
+        attributes = registry.get_attributes(self.media_type.pk)
+        self.assertEqual([attr.identifier for attr in attributes], ['scope'])
+        self.assertEqual(
+            registry.get_option(self.group.pk, str(self.option.pk)).option,
+            'National')
+        self.assertIsNone(registry.get_option(self.group.pk + 1, self.option.pk))
+
+        # Definitions not queried when entity saved
+        with CaptureQueriesContext(connection) as context:
+            media = self.create_media(self.person)
+        self.assertFalse(any('FROM "escort_attribute" ' in query['sql']
+                             for query in context.captured_queries))
+        self.assertEqual(media.attribute_values.count(), 1)
+
+        # Changes reach the registry
+        self.attribute.content_type.remove(self.media_type)
+        self.assertEqual(registry.get_attributes(self.media_type.pk), ())
+
+        AttributeOption.objects.filter(pk=self.option.pk).delete()
+        self.assertIsNone(registry.get_option(self.group.pk, self.option.pk))
+
+    def test_pending_other_thread(self):
+        registry.get_attributes(self.media_type.pk)
+
+        def read():
+            try:
+                with transaction.atomic():
+                    for index in range(3):
+                        registry.get_attributes(self.media_type.pk)
+            finally:
+                connection.close()
+
+        # Uncommitted change here, other thread load once not each read
+        with mock.patch.object(registry, 'load', wraps=registry.load) as load:
+            with transaction.atomic():
+                registry.invalidate()
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join()
+        self.assertEqual(load.call_count, 1)
+
+
+class SetAttributesTest(FixtureMixin, APITransactionTestCase):
+    """Default attribute values created by diff, not per attribute"""
+
+    def setUp(self):
+        cache.clear()
+        self.person = self.create_person('attributes')
+
+        media_type = ContentType.objects.get_for_model(Media)
+        for identifier in ('logo', 'description', 'website'):
+            attribute = Attribute.objects.create(
+                label=identifier, identifier=identifier, field_type='text')
+            attribute.content_type.add(media_type)
+
+        self.medias = [self.create_media(self.person, 'Media %s' % index)
+                       for index in range(3)]
+
+    def test_complete_entity(self):
+        media = self.medias[0]
+        self.assertEqual(media.attribute_values.count(), 3)
+
+        # Only the diff query
+        with self.assertNumQueries(1):
+            self.assertIsNone(set_attributes(media))
+
+    def test_batch(self):
+        AttributeValue.objects \
+            .filter(media__in=self.medias[1:]) \
+            .exclude(attribute__identifier='logo') \
+            .delete()
+        Attribute.objects.get(identifier='website').content_type.clear()
+
+        registry.get_attributes(self.medias[0].pk)
+        with CaptureQueriesContext(connection) as context:
+            created = set_attributes_many(self.medias)
+
+        # One diff select for all media, removed attribute deleted
+        # and one insert for all missing
+        queries = [query['sql'].split(' ')[0]
+                   for query in context.captured_queries
+                   if 'FROM "escort_attribute_value" ' in query['sql']
+                   or 'INTO "escort_attribute_value" ' in query['sql']]
+        self.assertEqual(queries, ['SELECT', 'SELECT', 'DELETE', 'INSERT'])
+        self.assertEqual(len(created), 2)
+
+        for media in self.medias:
+            self.assertEqual(
+                sorted(media.attribute_values.values_list(
+                    'attribute__identifier', flat=True)),
+                ['description', 'logo'])
+
+        call_command('sync_attributes', stdout=StringIO())
+        self.assertEqual(AttributeValue.objects.count(), 6)
+
+    def test_empty_registry(self):
+        # Registry failed to load, stored values kept
+        with mock.patch.object(registry, 'get_attributes', return_value=[]):
+            self.assertIsNone(set_attributes_many(self.medias))
+        self.assertEqual(AttributeValue.objects.count(), 9)
+
+    def test_update_values(self):
+        media = self.medias[0]
+        media_type = ContentType.objects.get_for_model(Media)
+        group = AttributeOptionGroup.objects.create(
+            label='Scope', identifier='scope')
+        options = [AttributeOption.objects.create(group=group, option=label)
+                   for label in ('Local', 'National', 'Global')]
+
+        for identifier, field_type in [('scope', 'option'),
+                                       ('regions', 'multi_option')]:
+            attribute = Attribute.objects.create(
+                label=identifier, identifier=identifier,
+                field_type=field_type, option_group=group)
+            attribute.content_type.add(media_type)
+
+        def update(values):
+            registry.get_attributes(media_type.pk)
+            with CaptureQueriesContext(connection) as context:
+                update_attribute_values(
+                    media, identifiers=list(values), values=values)
+            return len([query for query in context.captured_queries
+                        if query['sql'] != 'BEGIN'])
+
+        # Select, create missing, select again, multi option,
+        # update and add multi option
+        self.assertEqual(update({
+            'logo': 'logo.png', 'description': 'Lorem',
+            'scope': options[0].pk, 'regions': [options[0].pk, options[1].pk],
+            'label': 'Not attribute'}), 6)
+
+        # Select, multi option, update and remove multi option
+        # Unknown option ignored
+        self.assertEqual(update({
+            'logo': 'logo.png', 'description': 'Ipsum',
+            'scope': options[2].pk, 'regions': [options[1].pk, 0]}), 4)
+
+        values = {value.attribute.identifier: value
+                  for value in media.attribute_values.all()}
+        self.assertEqual(values['logo'].value_text, 'logo.png')
+        self.assertEqual(values['description'].value_text, 'Ipsum')
+        self.assertEqual(values['scope'].value_option, options[2])
+        self.assertEqual(
+            list(values['regions'].value_multi_option.all()), [options[1]])
+
+        # Nothing changed, nothing written
+        self.assertEqual(update({
+            'logo': 'logo.png', 'regions': [options[1].pk]}), 2)
+
+
+class BackgroundExecutorTest(APITransactionTestCase):
+    """Bounded pool, full queue run in caller thread"""
+
+    def setUp(self):
+        # Increment of earlier tests not counted here
+        flush_metrics()
+        cache.clear()
+        self.executor = BackgroundExecutor(max_workers=1, max_queue=1)
+
+    def tearDown(self):
+        self.executor.shutdown(drain=5)
+
+    def get_count(self, name, **labels):
+        flush_metrics()
+        return cache.get(get_metric_key(name, labels), 0)
+
+    def test_bounded_queue(self):
+        release, done = threading.Event(), list()
+
+        def blocking():
+            release.wait(5)
+            done.append(threading.current_thread().name)
+
+        def failing():
+            raise ValueError()
+
+        future = self.executor.submit(blocking)
+        self.assertIsNotNone(future)
+
+        # Queue full, run here
+        self.executor.submit(done.append, 'inline')
+        self.assertEqual(done, ['inline'])
+
+        release.set()
+        future.result(5)
+        self.executor.submit(failing).result(5)
+        self.assertTrue(done[1].startswith('background'))
+
+        self.assertEqual(self.get_count(
+            'background_tasks_inline_total', task='append'), 1)
+        self.assertEqual(self.get_count(
+            'background_tasks_finished_total',
+            task='blocking', status='done'), 1)
+        self.assertEqual(self.get_count(
+            'background_tasks_finished_total',
+            task='failing', status='failed'), 1)
+
+    def test_on_commit(self):
+        done = list()
+        with transaction.atomic():
+            self.executor.submit(done.append, 'task', on_commit=True)
+            self.assertEqual(self.executor.pending, 0)
+
+        self.executor.shutdown(drain=5)
+        self.assertEqual(done, ['task'])
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=60)
+class CounterBufferTest(FixtureMixin, APITransactionTestCase):
+    """Counter delta coalesced and written by flush"""
+
+    def setUp(self):
+        cache.clear()
+        flush_counters()
+        self.create_fixture('counter')
+        flush_counters()
+
+    def test_coalesce(self):
+        date_updated = Protest.objects.get(pk=self.protest.pk).date_updated
+        parent = Comment.objects.create(
+            protest=self.protest, commenter=self.person, description='Lorem')
+        for index in range(3):
+            Comment.objects.create(
+                protest=self.protest, commenter=self.person,
+                description='Lorem', parent=parent)
+
+        # Not written yet, but visible from this process
+        protest = Protest.objects.get(pk=self.protest.pk)
+        self.assertEqual(protest.comment_count, 0)
+        self.assertEqual(merge_pending(protest).comment_count, 4)
+
+        # Detail read merge it too
+        response = self.client.get(
+            '/api/escort/protests/%s/' % self.protest.uuid)
+        self.assertEqual(response.json()['comment_count'], 4)
+
+        # One update each row: protest, media and parent
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(flush_counters(), 3)
+        self.assertEqual(len([query for query in get_app_queries(context)
+                              if query['sql'].startswith('UPDATE')]), 3)
+
+        protest = Protest.objects.get(pk=self.protest.pk)
+        self.assertEqual(protest.comment_count, 4)
+        self.assertEqual(protest.date_updated, date_updated)
+        self.assertEqual(Media.objects.get(pk=self.media.pk).comment_count, 4)
+        self.assertEqual(Media.objects.get(pk=self.media.pk).protest_count, 1)
+        self.assertEqual(Comment.objects.get(pk=parent.pk).reply_count, 3)
+
+    def test_thumbs(self):
+        thumb = Thumbed.objects.create(
+            content_object=self.protest, thumber=self.person, thumbing=True)
+        thumb = Thumbed.objects.get(pk=thumb.pk)
+        thumb.thumbing = False
+        thumb.save()
+
+        # Same thumb again not counted
+        thumb.save()
+        flush_counters()
+
+        protest = Protest.objects.get(pk=self.protest.pk)
+        self.assertEqual(
+            (protest.thumbsup_count, protest.thumbsdown_count), (0, 1))
+
+        # Never below zero
+        thumb.delete()
+        Thumbed.objects.create(
+            content_object=self.protest, thumber=self.person, thumbing=None)
+        Comment.objects.create(
+            protest=self.protest, commenter=self.person,
+            description='Lorem').delete()
+        Comment.objects.filter(protest=self.protest).delete()
+        flush_counters()
+
+        protest = Protest.objects.get(pk=self.protest.pk)
+        self.assertEqual(
+            (protest.thumbsup_count, protest.thumbsdown_count), (0, 0))
+        self.assertEqual(protest.comment_count, 0)
+
+    def test_failed_flush(self):
+        buffer.add(Protest, self.protest.pk, 'comment_count', 2)
+        buffer.add(Protest, self.protest.pk, 'thumbsup_count', -1)
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError):
+            self.assertEqual(flush_counters(), 0)
+
+        # Kept for the next flush
+        self.assertEqual(buffer.get_pending(Protest, self.protest.pk),
+                         {'comment_count': 2, 'thumbsup_count': -1})
+        self.assertEqual(flush_counters(), 1)
+
+        protest = Protest.objects.get(pk=self.protest.pk)
+        self.assertEqual(
+            (protest.comment_count, protest.thumbsup_count), (2, 0))
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class ReconcileCountersTest(FixtureMixin, APITransactionTestCase):
+    """Drifted counters recomputed from source rows"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture('reconcile')
+        parent = Comment.objects.create(
+            protest=self.protest, commenter=self.person, description='Lorem')
+        Comment.objects.create(
+            protest=self.protest, commenter=self.person,
+            description='Lorem', parent=parent)
+        Rating.objects.create(media=self.media, rater=self.person, score=4)
+        Thumbed.objects.create(
+            content_object=self.protest, thumber=self.person, thumbing=True)
+
+    def get_counts(self):
+        media = Media.objects.get(pk=self.media.pk)
+        protest = Protest.objects.get(pk=self.protest.pk)
+        return (media.protest_count, media.comment_count,
+                media.rating_sum, media.rating_four_count,
+                protest.comment_count, protest.thumbsup_count)
+
+    def test_reconcile(self):
+        expected = (1, 2, 4, 1, 2, 1)
+        self.assertEqual(self.get_counts(), expected)
+
+        # Bypass the signals
+        Media.objects.update(
+            protest_count=5, comment_count=0, rating_sum=0,
+            rating_four_count=3)
+        Protest.objects.update(comment_count=9, thumbsup_count=0)
+
+        output = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=output)
+        self.assertNotEqual(self.get_counts(), expected)
+        self.assertIn('protest_count', output.getvalue())
+
+        call_command('reconcile_counters', '--chunk-size=1',
+                     stdout=StringIO())
+        self.assertEqual(self.get_counts(), expected)
+        self.assertEqual(Comment.objects.filter(
+            parent__isnull=True).get().reply_count, 1)
+
+
+@override_settings(IMAGE_MAX_WORKERS=0, BLOB_STORAGE=False)
+class ImageDerivativeTest(FixtureMixin, APITransactionTestCase):
+    """Resized image made after commit, asked by image_size"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.create_fixture('image', protest=False)
+
+    def get_upload(self):
+        from PIL import Image
+
+        output = BytesIO()
+        Image.new('RGBA', (1200, 800), (200, 10, 10, 128)) \
+            .save(output, 'PNG')
+        return SimpleUploadedFile('photo.png', output.getvalue())
+
+    def test_derivatives(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            attachment = Attachment.objects.create(
+                uploader=self.person, value_image=self.get_upload(),
+                content_type=ContentType.objects.get_for_model(Media),
+                object_id=self.media.pk)
+            executor.shutdown(drain=5)
+
+            name = attachment.value_image.name
+            thumb = get_derivative_name(name, 'thumb')
+            self.assertTrue(thumb.endswith('photo_thumb.jpg'))
+            self.assertTrue(default_storage.exists(thumb))
+            self.assertTrue(default_storage.exists(
+                get_derivative_name(name, 'medium')))
+
+            from PIL import Image
+            with default_storage.open(thumb) as image:
+                self.assertEqual(Image.open(image).size, (96, 64))
+
+            # Removed image, derivatives follow
+            attachment.value_image.delete()
+            executor.shutdown(drain=5)
+            self.assertFalse(default_storage.exists(thumb))
+
+    def test_image_name(self):
+        request = SimpleNamespace(query_params={'image_size': 'small'})
+        with override_settings(MEDIA_ROOT=self.media_root):
+            # Not made yet, the original served
+            self.assertEqual(get_image_name(request, 'images/a/b.png'),
+                             'images/a/b.png')
+
+            # Missing one cached, storage not asked again
+            with mock.patch.object(default_storage, 'exists') as exists:
+                self.assertEqual(
+                    get_image_name(request, 'images/a/b.png'),
+                    'images/a/b.png')
+            self.assertFalse(exists.called)
+
+            default_storage.save('images/a/b.png', ContentFile(
+                self.get_upload().read()))
+            make_derivatives('images/a/b.png')
+            self.assertEqual(get_image_name(request, 'images/a/b.png'),
+                             'images/a/b_small.jpg')
+
+            request.query_params['image_size'] = 'huge'
+            self.assertEqual(get_image_name(request, 'images/a/b.png'),
+                             'images/a/b.png')
+
+
+@override_settings(UPLOAD_MAX_CHUNK=4)
+class ResumableUploadTest(FixtureMixin, APITransactionTestCase):
+    """Chunks appended at their offset, stored after finalize"""
+
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool, True)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.create_fixture('upload', protest=False)
+        self.client.force_authenticate(self.person.user)
+
+    def put_chunk(self, url, offset, content):
+        return self.client.put(
+            url, data=content, content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_upload(self):
+        content = b'0123456789'
+        with override_settings(UPLOAD_SPOOL_DIR=self.spool,
+                               MEDIA_ROOT=self.media_root):
+            response = self.client.post('/api/escort/attachments/uploads/', {
+                'filename': 'report.pdf', 'size': len(content),
+                'entity_uuid': str(self.media.uuid), 'entity_index': 0,
+                'caption': 'Laporan'}, format='json')
+            self.assertEqual(response.status_code, 201)
+            url = '/api/escort/attachments/uploads/%s/' % \
+                response.data['upload_id']
+
+            self.assertEqual(self.put_chunk(url, 0, content[:4])
+                             .data['offset'], 4)
+
+            # Lost response, client retry sent chunk
+            response = self.put_chunk(url, 0, content[:4])
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.data['offset'], 4)
+
+            # Not complete yet
+            response = self.client.post(url + 'finalize/')
+            self.assertEqual(response.status_code, 409)
+
+            self.put_chunk(url, 4, content[4:8])
+            self.assertEqual(self.client.get(url).data['offset'], 8)
+            self.put_chunk(url, 8, content[8:])
+
+            response = self.client.post(url + 'finalize/')
+            self.assertEqual(response.status_code, 202)
+            executor.shutdown(drain=5)
+
+            attachment = Attachment.objects.get(uploader=self.person)
+            self.assertEqual(attachment.caption, 'Laporan')
+            self.assertEqual(attachment.object_id, self.media.pk)
+            with attachment.value_file.open('rb') as stored:
+                self.assertEqual(stored.read(), content)
+            self.assertEqual(os.listdir(self.spool), [])
+
+            # Spool gone, no second attachment
+            response = self.client.post(url + 'finalize/')
+            self.assertEqual(response.status_code, 404)
+
+    def test_other_person(self):
+        with override_settings(UPLOAD_SPOOL_DIR=self.spool):
+            response = self.client.post('/api/escort/attachments/uploads/', {
+                'filename': 'report.pdf', 'size': 4,
+                'entity_uuid': str(self.media.uuid), 'entity_index': 0},
+                format='json')
+            url = '/api/escort/attachments/uploads/%s/' % \
+                response.data['upload_id']
+
+            other = self.create_person('other')
+            self.client.force_authenticate(other.user)
+            self.assertEqual(self.put_chunk(url, 0, b'0123').status_code, 404)
+
+            call_command('purge_uploads', max_age=0, stdout=StringIO())
+            self.assertEqual(os.listdir(self.spool), [])
+
+    def start_upload(self, content):
+        response = self.client.post('/api/escort/attachments/uploads/', {
+            'filename': 'report.pdf', 'size': len(content),
+            'entity_uuid': str(self.media.uuid), 'entity_index': 0},
+            format='json')
+        url = '/api/escort/attachments/uploads/%s/' % \
+            response.data['upload_id']
+        self.put_chunk(url, 0, content)
+        return url, response.data['upload_id']
+
+    def test_store_failed(self):
+        with override_settings(UPLOAD_SPOOL_DIR=self.spool,
+                               UPLOAD_STORE_RETRY_DELAY=0):
+            url, upload_id = self.start_upload(b'0123')
+            with mock.patch('utils.uploads.save_file',
+                            side_effect=IOError) as save:
+                response = self.client.post(url + 'finalize/')
+                self.assertEqual(response.status_code, 202)
+                executor.shutdown(drain=5)
+
+            # Retried, then no attachment left without file
+            self.assertEqual(save.call_count, 3)
+            self.assertFalse(Attachment.objects.exists())
+            self.assertEqual(os.listdir(self.spool), [])
+
+    def test_concurrent_finalize(self):
+        with override_settings(UPLOAD_SPOOL_DIR=self.spool,
+                               MEDIA_ROOT=self.media_root):
+            url, upload_id = self.start_upload(b'0123')
+            responses = list()
+
+            def finalize():
+                responses.append(self.client.post(url + 'finalize/'))
+
+            # Second finalize wait for the first one to commit
+            with uploads.lock_upload(upload_id):
+                thread = threading.Thread(target=finalize)
+                thread.start()
+                thread.join(0.2)
+                self.assertTrue(thread.is_alive())
+                uploads.finish_upload(upload_id)
+            thread.join(5)
+            self.assertEqual(responses[0].status_code, 404)
+
+
+@override_settings(BLOB_STORAGE=True)
+class BlobStorageTest(FixtureMixin, APITransactionTestCase):
+    """Same content stored once, counted and collected"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.create_fixture('blob', protest=False)
+
+    def create_attachment(self, filename, content):
+        return Attachment.objects.create(
+            uploader=self.person,
+            value_file=SimpleUploadedFile(filename, content),
+            content_type=ContentType.objects.get_for_model(Media),
+            object_id=self.media.pk)
+
+    def test_deduplicate(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            first = self.create_attachment('screenshot.pdf', b'same')
+            second = self.create_attachment('other.PDF', b'same')
+
+            name = first.value_file.name
+            self.assertTrue(name.startswith('blobs/'))
+            self.assertTrue(name.endswith('.pdf'))
+            self.assertEqual(second.value_file.name, name)
+            self.assertEqual(Blob.objects.get().references, 2)
+
+            directory = os.path.join(self.media_root, os.path.dirname(name))
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            # Replaced and deleted, blob kept until collected
+            save_file(second.value_file, 'new.pdf', BytesIO(b'new'))
+            self.assertEqual(Blob.objects.get(name=name).references, 1)
+            first.delete()
+            self.assertEqual(Blob.objects.get(name=name).references, 0)
+            self.assertTrue(default_storage.exists(name))
+
+            out = StringIO()
+            call_command('collect_blobs', grace=0, stdout=out)
+            self.assertIn('1 blob removed.', out.getvalue())
+            self.assertFalse(default_storage.exists(name))
+            self.assertTrue(default_storage.exists(second.value_file.name))
+            self.assertEqual(Blob.objects.get().references, 1)
+
+    def test_delete_file(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            attachment = self.create_attachment('report.pdf', b'report')
+            name = attachment.value_file.name
+
+            delete_file(attachment.value_file)
+            self.assertFalse(Attachment.objects.get().value_file)
+            self.assertTrue(default_storage.exists(name))
+
+            # Collected in grace time only when asked
+            call_command('collect_blobs', stdout=StringIO())
+            self.assertEqual(Blob.objects.get().references, 0)
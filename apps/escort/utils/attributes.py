@@ -1,14 +1,16 @@
-import asyncio
 import uuid
 
 from django.conf import settings
+from django.utils import timezone
 from django.db import IntegrityError
 from django.db.models import Q
-from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.storage import default_storage
 
 from utils.validators import get_model
+from utils.registries import AttributeRegistry
+from utils.blobs import save_file, delete_file
+from utils.executors import run_in_background
 
 try:
     Attribute = get_model('escort', 'Attribute')
@@ -20,8 +22,8 @@ try:
 except LookupError:
     AttributeValue = None
 
-
-loop = asyncio.get_event_loop()
+# Attribute definitions, read this instead of database
+registry = AttributeRegistry('escort')
 
 
 def upload_image(args):
@@ -34,10 +36,10 @@ def upload_image(args):
         file = value[0]
         filename = file.name
         value = file
-        instance.value_image.save(filename, value, save=True)
+        save_file(instance.value_image, filename, value)
 
     if value is None:
-        instance.value_image.delete()
+        delete_file(instance.value_image)
 
 
 def upload_file(args):
@@ -50,113 +52,151 @@ def upload_file(args):
         file = value[0]
         filename = file.name
         value = file
-        instance.value_file.save(filename, value, save=True)
+        save_file(instance.value_file, filename, value)
 
     if value is None:
-        instance.value_image.delete()
+        delete_file(instance.value_image)
 
 
-def set_attributes(entity, *agrs, **kwargs):
+def load_attribute_values(entities, *agrs, **kwargs):
     """
-    Create default attributes value
-    Currated by entity
+    Fetch attribute values for many entities in one query
+    Grouped by content_type and object_id
+    ------------------------
+    Return {
+        (content_type_id, object_id): [AttributeValue, ...],
+        ...
+    }
     """
-    # Check database model Attribute
-    if Attribute and AttributeValue and entity:
-        attributes = None
+    identifiers = kwargs.get('identifiers', None)
+    values_map = dict()
 
-        # Extract entity
+    if not AttributeValue or not entities:
+        return values_map
+
+    # Collect object ids by entity type, entity may mixed
+    q_entity = Q()
+    entity_ids = dict()
+    for entity in entities:
         entity_type = ContentType.objects.get_for_model(entity)
+        entity_ids.setdefault(entity_type.pk, set()).add(entity.pk)
+
+    for content_type_id, object_ids in entity_ids.items():
+        q_entity |= Q(content_type_id=content_type_id,
+                      object_id__in=object_ids)
 
-        # Grab all attribute not for this entity
-        attributes = Attribute.objects \
-            .filter(content_type=entity_type) \
-            .distinct()
-
-        # If entity attribute ready, create the default values
-        if attributes.exists():
-            # After attribute delete, the attribute values still in entity
-            # So delete it
-            entity_attribute_value = entity.attribute_values \
-                .filter(~Q(attribute__in=attributes))
-
-            # Run delete if exists
-            if entity_attribute_value:
-                entity_attribute_value.delete()
-
-            values_list = list()
-            for attr in attributes:
-                # Make sure not append if value is ready
-                try:
-                    # Make sure set attribute based on target object
-                    value_obj = entity.attribute_values.get(
-                        attribute__field_type=attr.field_type,
-                        attribute__identifier=attr.identifier)
-                except ObjectDoesNotExist:
-                    value_obj = None
-
-                # If value not ready, append it
-                if not value_obj:
-                    model_field = 'value_%s' % attr.field_type
-                    attr_obj = AttributeValue(
-                        attribute=attr,
-                        content_object=entity)
-
-                    # Value for option and multi must set from their ForeignKey
-                    if attr.field_type == 'option':
-                        pass
-                    elif attr.field_type == 'multi_option':
-                        pass
-                    else:
-                        setattr(attr_obj, model_field, None)
-                    values_list.append(attr_obj)
-
-            # Create default attribute for models
-            if values_list:
-                try:
-                    return AttributeValue.objects \
-                        .bulk_create(values_list)
-                except IntegrityError:
-                    pass
-            return None
+    values = AttributeValue.objects \
+        .select_related('attribute') \
+        .filter(q_entity)
+
+    if identifiers:
+        values = values.filter(attribute__identifier__in=identifiers)
+
+    for value in values:
+        key = (value.content_type_id, value.object_id)
+        values_map.setdefault(key, list()).append(value)
+    return values_map
+
+
+def set_attributes_many(entities, *agrs, **kwargs):
+    """
+    Create default attributes value for many entities
+    ------------------------
+    Existing values read in one query, missing created in one
+    bulk_create and values of removed attribute deleted. Nothing
+    written if all entity already complete.
+    """
+    batch_size = kwargs.get('batch_size', 500)
+    entities = [entity for entity in entities if entity and entity.pk]
+
+    if not (Attribute and AttributeValue and entities):
         return None
+
+    # Group by entity type (ex: Media, Person, ect...)
+    entity_groups = dict()
+    for entity in entities:
+        entity_type = ContentType.objects.get_for_model(entity)
+        entity_groups.setdefault(entity_type.pk, dict())[entity.pk] = entity
+
+    values_list = list()
+    for entity_type_id, group in entity_groups.items():
+        required = {attr.id: attr
+                    for attr in registry.get_attributes(entity_type_id)}
+
+        existing = dict()
+        for object_id, attribute_id in AttributeValue.objects \
+                .filter(content_type_id=entity_type_id,
+                        object_id__in=group.keys()) \
+                .values_list('object_id', 'attribute_id'):
+            existing.setdefault(object_id, set()).add(attribute_id)
+
+        # After attribute delete, the attribute values still in entity
+        # So delete it. No attribute at all (registry empty or failed
+        # to load) never mean every value stale
+        stale = [object_id for object_id in existing
+                 if existing[object_id].difference(required)]
+        if stale and required:
+            AttributeValue.objects \
+                .filter(content_type_id=entity_type_id,
+                        object_id__in=stale) \
+                .exclude(attribute_id__in=required.keys()) \
+                .delete()
+
+        # Value for option and multi must set from their ForeignKey
+        # Others default to None
+        for object_id in group:
+            missing = set(required).difference(existing.get(object_id, ()))
+            for attribute_id in sorted(missing):
+                values_list.append(AttributeValue(
+                    attribute_id=attribute_id,
+                    content_type_id=entity_type_id,
+                    object_id=object_id))
+
+    # Create default attribute for models
+    if values_list:
+        try:
+            return AttributeValue.objects \
+                .bulk_create(values_list, batch_size=batch_size)
+        except IntegrityError:
+            pass
     return None
 
 
-def assign_attributes(entity, *agrs, **kwargs):
-    attribute_objects = kwargs.get('attribute_objects', None)
-    attribute_keys = kwargs.get('attribute_keys', None)
-    attribute_keys_define = kwargs.get('attribute_keys_define', None)
-    attribute_values_list = list()
-
-    if attribute_objects and attribute_keys and attribute_keys_define:
-        for attr in attribute_objects:
-            model_field = 'value_%s' % attr.field_type
-            attr_value_obj = AttributeValue(
-                attribute=attr,
-                content_object=entity)
-
-            # Value for option and multi must set from their ForeignKey
-            if attr.field_type == 'option':
-                pass
-            elif attr.field_type == 'multi_option':
-                pass
-            else:
-                setattr(attr_value_obj, model_field, None)
-            attribute_values_list.append(attr_value_obj)
-
-        # Create default attribute for entity
-        if attribute_values_list:
-            try:
-                # Create attribute value
-                AttributeValue.objects.bulk_create(attribute_values_list)
-
-                # After created, get attributes value from entity
-                return entity.attribute_values \
-                    .filter(attribute__identifier__in=attribute_keys_define)
-            except IntegrityError:
-                return None
-    return None
+def set_attributes(entity, *agrs, **kwargs):
+    """
+    Create default attributes value
+    Currated by entity
+    """
+    return set_attributes_many([entity], *agrs, **kwargs)
+
+
+def load_entity_values(entity, entity_type, attribute_ids):
+    """
+    Attribute values of entity as {attribute_id: AttributeValue}
+    Missing value created first, so all attribute has it
+    """
+    queryset = AttributeValue.objects.filter(
+        content_type_id=entity_type.pk, object_id=entity.pk,
+        attribute_id__in=attribute_ids)
+    value_objs = {obj.attribute_id: obj for obj in queryset}
+
+    # Value for option and multi must set from their ForeignKey
+    # Others default to None
+    missing = [AttributeValue(attribute_id=attribute_id,
+                              content_type_id=entity_type.pk,
+                              object_id=entity.pk)
+               for attribute_id in attribute_ids
+               if attribute_id not in value_objs]
+
+    if missing:
+        try:
+            AttributeValue.objects.bulk_create(missing)
+        except IntegrityError:
+            pass
+
+        # Not all database return the id, read again
+        value_objs = {obj.attribute_id: obj for obj in queryset.all()}
+    return value_objs
 
 
 def update_attribute_values(entity, *agrs, **kwargs):
@@ -168,121 +208,117 @@ def update_attribute_values(entity, *agrs, **kwargs):
         'identifier': 'value',
         ...
     }
+
+    Values read in one query (two if some missing), changed scalar
+    and option saved by one bulk_update, multi option by one diff
     """
     identifiers = kwargs.get('identifiers', None)
     values = kwargs.get('values', None)
 
     # Check database model Attribute
-    if Attribute and AttributeValue and values:
-        attr_values_obj, attr_values_type, attribute_keys = list(), list(), list()
+    if not (Attribute and AttributeValue and values):
+        return None
 
-        try:
-            values = dict(values.lists())
-        except AttributeError:
-            values = values
-
-        if values and type(values) is dict:
-            for value in values:
-                attribute_keys.append(value)
-        else:
-            return None
-
-        # Update single attribute by identifiers
-        if identifiers:
-            attribute_keys = identifiers
-
-        # Get original identifiers
-        attribute_keys_define = attribute_keys
-
-        # All attributes
-        attribute_values = entity.attribute_values \
-            .filter(attribute__identifier__in=attribute_keys)
-
-        # Hapus attibute_keys jika sudah ada dalam attribute_values
-        if attribute_values.exists():
-            for value in attribute_values:
-                attribute = value.attribute
-                identifier = getattr(attribute, 'identifier', None)
-                if identifier:
-                    attribute_keys.remove(identifier)
-
-        # ContentType berdasarkan entity (model)
-        entity_type = ContentType.objects.get_for_model(entity)
+    try:
+        values = dict(values.lists())
+    except AttributeError:
+        values = values
 
-        # Extrak attribute yang belum ter-assign
-        attribute_unassign = Attribute.objects \
-            .filter(
-                content_type=entity_type,
-                identifier__in=attribute_keys) \
-            .distinct()
-
-        # Assign-kan attribute ini
-        # Kemudian replace attribute_values dengan yang baru
-        if attribute_unassign.exists():
-            attribute_values = assign_attributes(
-                entity,
-                attribute_keys=attribute_keys,
-                attribute_keys_define=attribute_keys_define,
-                attribute_objects=attribute_unassign)
-
-        # Escort has attributes
-        if attribute_values and attribute_values.exists():
-            for attr in attribute_values:
-                attr_type = attr.attribute.field_type
-                model_field = 'value_%s' % attr_type
-                identifier = attr.attribute.identifier
-                attr_obj = attribute_values.get(
-                    attribute__identifier=identifier)
-
-                # Grab value
-                try:
-                    value = values[identifier]
-                except KeyError:
-                    value = None
-
-                # Set arguments
-                if attr_type == 'file' or attr_type == 'image':
-                    arguments = {'instance': attr_obj, 'value': value}
-                    storage_name = default_storage.__class__.__name__
-
-                # Value for option and multi must set from their ForeignKey
-                if attr_type == 'option':
-                    # Get options object
-                    try:
-                        value = attr_obj.attribute \
-                            .option_group.options.get(id=value)
-                    except ObjectDoesNotExist:
-                        value = None
-
-                    setattr(attr_obj, model_field, value)
-                    attr_obj.save()
-                elif attr_type == 'multi_option':
-                    # Multi option
-                    getattr(attr_obj, model_field).set(filter(None, value))
-                elif attr_type == 'file':
-                    # Upload file
-                    if storage_name == 'GoogleCloudStorage':
-                        upload_file(arguments)
-                    else:
-                        loop.run_in_executor(None, upload_file, arguments)
-                elif attr_type == 'image':
-                    # Upload image
-                    if storage_name == 'GoogleCloudStorage':
-                        upload_image(arguments)
-                    else:
-                        loop.run_in_executor(None, upload_image, arguments)
-                else:
-                    # Set the value
-                    setattr(attr_obj, model_field, value)
-
-                    # Append all value types
-                    attr_values_type.append(model_field)
-                attr_values_obj.append(attr_obj)
-
-            # Bulk update attributes value
-            if attr_values_obj and attr_values_type:
-                return AttributeValue.objects.bulk_update(
-                    attr_values_obj, attr_values_type)
-            return None
+    if not values or type(values) is not dict:
         return None
+
+    # Update single attribute by identifiers
+    attribute_keys = list(identifiers or values)
+
+    # ContentType berdasarkan entity (model)
+    entity_type = ContentType.objects.get_for_model(entity)
+    attributes = {attr.id: attr for attr in registry.get_attributes(
+        entity_type.pk, identifiers=attribute_keys)}
+    if not attributes:
+        return None
+
+    value_objs = load_entity_values(entity, entity_type, list(attributes))
+
+    # Current multi option
+    multi_field = AttributeValue._meta.get_field('value_multi_option')
+    through = multi_field.remote_field.through
+    value_column = '%s_id' % multi_field.m2m_field_name()
+    option_column = '%s_id' % multi_field.m2m_reverse_field_name()
+
+    multi_ids = [obj.pk for attribute_id, obj in value_objs.items()
+                 if attributes[attribute_id].field_type == 'multi_option']
+    multi_current = dict()
+    if multi_ids:
+        for value_id, option_id in through.objects \
+                .filter(**{'%s__in' % value_column: multi_ids}) \
+                .values_list(value_column, option_column):
+            multi_current.setdefault(value_id, set()).add(option_id)
+
+    changed_objs, changed_fields = list(), set()
+    multi_add, multi_remove = list(), Q()
+    storage_name = default_storage.__class__.__name__
+
+    for attribute_id, attr_obj in value_objs.items():
+        attr = attributes[attribute_id]
+        attr_type = attr.field_type
+        model_field = 'value_%s' % attr_type
+
+        # Grab value
+        value = values.get(attr.identifier, None)
+
+        # Value for option and multi must set from their ForeignKey
+        if attr_type == 'option':
+            option = registry.get_option(attr.option_group_id, value)
+            option_id = option.id if option else None
+
+            if attr_obj.value_option_id != option_id:
+                attr_obj.value_option_id = option_id
+                changed_fields.add(model_field)
+                changed_objs.append(attr_obj)
+        elif attr_type == 'multi_option':
+            if not isinstance(value, (list, tuple)):
+                value = [value]
+
+            options = [registry.get_option(attr.option_group_id, item)
+                       for item in filter(None, value)]
+            option_ids = {option.id for option in options if option}
+            current = multi_current.get(attr_obj.pk, set())
+
+            if current.difference(option_ids):
+                multi_remove |= Q(**{
+                    value_column: attr_obj.pk,
+                    '%s__in' % option_column: current.difference(option_ids)})
+
+            for option_id in option_ids.difference(current):
+                multi_add.append(through(**{
+                    value_column: attr_obj.pk, option_column: option_id}))
+        elif attr_type == 'file' or attr_type == 'image':
+            arguments = {'instance': attr_obj, 'value': value}
+            upload = upload_file if attr_type == 'file' else upload_image
+
+            # Upload file or image
+            if storage_name == 'GoogleCloudStorage':
+                upload(arguments)
+            else:
+                run_in_background(upload, arguments, on_commit=True)
+        elif getattr(attr_obj, model_field) != value:
+            # Set the value
+            setattr(attr_obj, model_field, value)
+            changed_fields.add(model_field)
+            changed_objs.append(attr_obj)
+
+    # Bulk update attributes value
+    if changed_objs:
+        now = timezone.now()
+        for attr_obj in changed_objs:
+            attr_obj.date_updated = now
+
+        AttributeValue.objects.bulk_update(
+            changed_objs, list(changed_fields) + ['date_updated'])
+
+    if multi_remove:
+        through.objects.filter(multi_remove).delete()
+
+    if multi_add:
+        through.objects.bulk_create(multi_add)
     return None
@@ -30,6 +30,15 @@ SCORE_CHOICES = (
     (FIVE_STAR, _("Sangat Baik")),
 )
 
+# Media column store count of each score
+SCORE_COUNT_FIELDS = {
+    ONE_STAR: 'rating_one_count',
+    TWO_STAR: 'rating_two_count',
+    THREE_STAR: 'rating_three_count',
+    FOUR_STAR: 'rating_four_count',
+    FIVE_STAR: 'rating_five_count',
+}
+
 # PURPOSES
 NOT_TRUE = 1
 CRITICISM = 2
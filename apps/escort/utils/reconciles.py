@@ -0,0 +1,107 @@
+"""
+Recompute denormalized counters
+------------------------
+Each counter defined as aggregate of a source model grouped by the
+foreign key to the counted row. Rows processed by primary key range,
+so every query only touch one chunk and use the foreign key index.
+
+    reconcile_chunk('media', 1, 1001)
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, Count, Sum
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from .constant import PUBLISHED, SCORE_COUNT_FIELDS
+
+
+def get_counters():
+    """
+    {model_name: [(field, source, group_by, filters, aggregate), ...]}
+    """
+    Protest = get_model('escort', 'Protest')
+    Comment = get_model('escort', 'Comment')
+    Rating = get_model('escort', 'Rating')
+    Thumbed = get_model('escort', 'Thumbed')
+    protest_type = ContentType.objects.get_for_model(Protest)
+
+    media = [
+        ('protest_count', Protest, 'media_id',
+         {'status': PUBLISHED}, Count('pk')),
+        ('comment_count', Comment, 'protest__media_id', {}, Count('pk')),
+        ('rating_count', Rating, 'media_id', {}, Count('pk')),
+        ('rating_sum', Rating, 'media_id', {}, Sum('score')),
+    ]
+    for score, field in SCORE_COUNT_FIELDS.items():
+        media.append((field, Rating, 'media_id', {'score': score},
+                      Count('pk')))
+
+    return {
+        'media': media,
+        'protest': [
+            ('comment_count', Comment, 'protest_id', {}, Count('pk')),
+            ('thumbsup_count', Thumbed, 'object_id',
+             {'content_type': protest_type, 'thumbing': True}, Count('pk')),
+            ('thumbsdown_count', Thumbed, 'object_id',
+             {'content_type': protest_type, 'thumbing': False}, Count('pk')),
+        ],
+        'comment': [
+            ('reply_count', Comment, 'parent_id', {}, Count('pk')),
+        ],
+    }
+
+
+def reconcile_chunk(model_name, start, end, dry_run=False):
+    """
+    Recompute counters of rows start <= pk < end
+    ------------------------
+    Return {field: [rows drifted, total drift, max drift]}
+    """
+    Model = get_model('escort', model_name)
+    counters = get_counters()[model_name]
+    fields = [counter[0] for counter in counters]
+
+    current = {
+        values[0]: dict(zip(fields, values[1:]))
+        for values in Model.objects
+        .filter(pk__gte=start, pk__lt=end)
+        .values_list('pk', *fields)}
+    if not current:
+        return dict()
+
+    # Expected value each field, missing group mean zero
+    expected = {pk: dict.fromkeys(fields, 0) for pk in current}
+    for field, source, group_by, filters, aggregate in counters:
+        rows = source.objects \
+            .filter(**{'%s__gte' % group_by: start,
+                       '%s__lt' % group_by: end}) \
+            .filter(**filters) \
+            .order_by() \
+            .values(group_by) \
+            .annotate(value=aggregate) \
+            .values_list(group_by, 'value')
+
+        for pk, value in rows:
+            if pk in expected:
+                expected[pk][field] = value or 0
+
+    stats = {field: [0, 0, 0] for field in fields}
+    for pk, values in current.items():
+        delta = {field: expected[pk][field] - values[field]
+                 for field in fields
+                 if expected[pk][field] != values[field]}
+        if not delta:
+            continue
+
+        for field in delta:
+            stats[field][0] += 1
+            stats[field][1] += abs(delta[field])
+            stats[field][2] = max(stats[field][2], abs(delta[field]))
+
+        # Relative, so concurrent counter flush not lost
+        if not dry_run:
+            Model.objects.filter(pk=pk).update(**{
+                field: F(field) + delta[field] for field in delta})
+    return stats
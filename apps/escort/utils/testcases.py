@@ -0,0 +1,75 @@
+"""
+Test fixture
+------------------------
+Person, media and protest most test start from, published;
+
+    class CommentTest(FixtureMixin, APITransactionTestCase):
+        def setUp(self):
+            self.create_fixture('comment', persons=2)
+
+    self.persons, self.person (first one), self.media, self.protest
+
+Background task (search index, derivatives, upload) run in the
+caller after commit (BACKGROUND_MAX_QUEUE 0); SQLite test database
+lock the table written by two connections at once, and no task left
+running while the database flushed for the next test.
+"""
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.executors import executor
+
+# LOCAL UTILS
+from .constant import PUBLISHED
+
+Person = get_model('person', 'Person')
+Media = get_model('escort', 'Media')
+Protest = get_model('escort', 'Protest')
+UserModel = get_user_model()
+
+
+class FixtureMixin:
+    @classmethod
+    def setUpClass(cls):
+        cls._inline_background = override_settings(BACKGROUND_MAX_QUEUE=0)
+        cls._inline_background.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._inline_background.disable()
+
+    def tearDown(self):
+        # Task submitted before the class started
+        executor.shutdown(drain=5)
+        super().tearDown()
+
+    def create_person(self, username):
+        user = UserModel.objects.create_user(
+            username, '%s@kawalmedia.com' % username)
+        return Person.objects.create(user=user)
+
+    def create_media(self, creator, label='Media', **fields):
+        fields = dict({'publication': 1, 'status': PUBLISHED}, **fields)
+        return Media.objects.create(label=label, creator=creator, **fields)
+
+    def create_protest(self, media, protester, label='Protest', **fields):
+        fields = dict({'description': 'Lorem', 'status': PUBLISHED}, **fields)
+        return Protest.objects.create(
+            label=label, media=media, protester=protester, **fields)
+
+    def create_fixture(self, username, persons=1, protest=True):
+        """Persons named username0, username1... if more than one"""
+        if persons == 1:
+            self.persons = [self.create_person(username)]
+        else:
+            self.persons = [self.create_person('%s%s' % (username, index))
+                            for index in range(persons)]
+        self.person = self.persons[0]
+
+        self.media = self.create_media(self.person)
+        if protest:
+            self.protest = self.create_protest(self.media, self.person)
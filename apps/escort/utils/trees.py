@@ -0,0 +1,152 @@
+"""
+Comment tree
+------------------------
+Each comment keep materialized path of its `parent` chain, one
+STEPLEN segment per level from the primary key (same encoding as
+django-treebeard MP_Node). Sorted by path a discussion come out
+depth first, replies right after their parent, from one query;
+
+    get_tree(protest=protest, depth=2)
+    get_tree(comment=comment)
+
+get_first_replies() give first replies of many comments at once,
+ranked by ROW_NUMBER() each parent, or sliced each parent on backend
+without window function (MySQL before 8.0).
+
+New comment cost one UPDATE whatever the tree size, path of other
+rows never change. Replies of deleted parent (SET_NULL) keep their
+path, so they still sorted at the old place.
+"""
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import Subquery, Window
+from django.db.models.functions import RowNumber
+from treebeard.numconv import NumConv
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+STEPLEN = 6
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+MAX_DEPTH = 255 // STEPLEN
+
+CONVERTER = NumConv(len(ALPHABET), ALPHABET)
+
+
+def get_segment(pk):
+    return CONVERTER.int2str(pk).rjust(STEPLEN, ALPHABET[0])
+
+
+def get_path(pk, parent_path=''):
+    """(path, depth) of a comment under parent_path"""
+    # Too deep, kept as sibling of the parent
+    if len(parent_path) // STEPLEN >= MAX_DEPTH:
+        parent_path = parent_path[:(MAX_DEPTH - 1) * STEPLEN]
+    path = parent_path + get_segment(pk)
+    return path, len(path) // STEPLEN
+
+
+def set_path(comment):
+    """Path of new comment from its parent, one UPDATE"""
+    Comment = get_model('escort', 'Comment')
+    parent_path = ''
+    if comment.parent_id:
+        parent_path = comment.parent.path
+
+    comment.path, comment.depth = get_path(comment.pk, parent_path)
+    Comment.objects.filter(pk=comment.pk) \
+        .update(path=comment.path, depth=comment.depth)
+    return comment
+
+
+def get_tree(queryset=None, protest=None, comment=None, depth=None):
+    """
+    Discussion of protest or subtree of comment, ordered by path
+    ------------------------
+    depth count from the top; 1 only top level (or comment itself)
+    """
+    if queryset is None:
+        queryset = get_model('escort', 'Comment').objects.all()
+
+    top = 0
+    if comment is not None:
+        queryset = queryset.filter(
+            protest_id=comment.protest_id, path__startswith=comment.path)
+        top = comment.depth - 1
+    elif protest is not None:
+        queryset = queryset.filter(protest=protest)
+
+    if depth:
+        queryset = queryset.filter(depth__lte=top + depth)
+    return queryset.order_by('path')
+
+
+class RankedSubquery(Subquery):
+    """Id of ranked rows within rank `limit`, window can't be filtered"""
+    template = 'SELECT ranked.id FROM (%(subquery)s) ranked ' \
+        'WHERE ranked.reply_rank <= %%s'
+
+    def __init__(self, queryset, limit, **extra):
+        self.limit = limit
+        super().__init__(queryset, **extra)
+
+    def as_sql(self, compiler, connection, template=None, **extra_context):
+        sql, params = super().as_sql(
+            compiler, connection, template=template, **extra_context)
+        return sql, tuple(params) + (self.limit,)
+
+
+def supports_window():
+    if connection.vendor == 'sqlite':
+        # Not flagged by Django 2.2, SQLite has it since 3.25
+        return connection.Database.sqlite_version_info >= (3, 25, 0)
+    return connection.features.supports_over_clause
+
+
+def get_first_reply_ids(parents, limit):
+    """
+    Without window function (MySQL 5.7), sliced replies each parent
+    ------------------------
+    One UNION ALL query, a query each parent if the backend can't
+    slice compound parts (old SQLite)
+    """
+    Comment = get_model('escort', 'Comment')
+    sliced = [Comment.objects.filter(parent=parent)
+              .order_by('date_created', 'id')
+              .values_list('id', flat=True)[:limit]
+              for parent in parents]
+    if not sliced:
+        return list()
+
+    if connection.features.supports_slicing_ordering_in_compound:
+        return list(sliced[0].union(*sliced[1:], all=True))
+    return [pk for replies in sliced for pk in replies]
+
+
+def get_first_replies(parents, limit, queryset=None):
+    """
+    First `limit` replies (by `parent`) of each parent
+    ------------------------
+    Ranked by ROW_NUMBER() in one query where supported (MySQL 8,
+    MariaDB 10.2, SQLite 3.25), else get_first_reply_ids()
+    """
+    Comment = get_model('escort', 'Comment')
+    if queryset is None:
+        queryset = Comment.objects.all()
+
+    if supports_window():
+        ranked = Comment.objects \
+            .filter(parent__in=parents) \
+            .order_by() \
+            .annotate(reply_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('parent_id')],
+                order_by=[F('date_created').asc(), F('id').asc()])) \
+            .values('id', 'reply_rank')
+        first = RankedSubquery(ranked, limit)
+    else:
+        first = get_first_reply_ids(parents, limit)
+
+    return queryset \
+        .filter(pk__in=first) \
+        .order_by('parent_id', 'date_created', 'id')
@@ -24,6 +24,7 @@ from .serializers import (
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.caches import cache_anonymous_response
 
 # LOCAL UTILS
 from ...utils.constant import PUBLISHED
@@ -89,6 +90,7 @@ class ArticleApiView(viewsets.ViewSet):
         response['results'] = serializer.data
         return Response(response, status=response_status.HTTP_200_OK)
 
+    @cache_anonymous_response('article')
     def list(self, request, format=None):
         context = {'request': self.request}
         params = request.query_params
@@ -104,6 +106,7 @@ class ArticleApiView(viewsets.ViewSet):
         return self.get_response(serializer)
 
     # Single item
+    @cache_anonymous_response('article')
     def retrieve(self, request, uuid=None, format=None):
         """ View as single object """
         context = {'request': self.request}
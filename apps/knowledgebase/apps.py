@@ -1,5 +1,64 @@
 from django.apps import AppConfig
+from django.db.models.signals import (
+    pre_save, post_save, post_delete, post_init)
 
 
 class KnowledgeBaseConfig(AppConfig):
     name = 'apps.knowledgebase'
+
+    def ready(self):
+        from apps.knowledgebase.signals import (
+            article_handler,
+            article_delete_handler)
+        from utils.validators import get_model
+        from utils.images import image_init_handler, image_handler
+        from utils.blobs import (
+            blob_handler, blob_init_handler, blob_reference_handler,
+            blob_delete_handler)
+
+        # Create article signal
+        try:
+            Article = get_model('knowledgebase', 'Article')
+        except LookupError:
+            Article = None
+
+        if Article:
+            post_save.connect(
+                article_handler, sender=Article, dispatch_uid='article_signal')
+
+            post_delete.connect(
+                article_delete_handler, sender=Article,
+                dispatch_uid='article_delete_signal')
+
+        # Image derivatives, see utils/images.py
+        try:
+            Attachment = get_model('knowledgebase', 'Attachment')
+        except LookupError:
+            Attachment = None
+
+        if Attachment:
+            post_init.connect(
+                image_init_handler, sender=Attachment,
+                dispatch_uid='knowledgebase_attachment_image_init_signal')
+
+            post_save.connect(
+                image_handler, sender=Attachment,
+                dispatch_uid='knowledgebase_attachment_image_signal')
+
+        # Content addressed file, see utils/blobs.py
+        if Attachment:
+            pre_save.connect(
+                blob_handler, sender=Attachment,
+                dispatch_uid='knowledgebase_attachment_blob_signal')
+
+            post_init.connect(
+                blob_init_handler, sender=Attachment,
+                dispatch_uid='knowledgebase_attachment_blob_init_signal')
+
+            post_save.connect(
+                blob_reference_handler, sender=Attachment,
+                dispatch_uid='knowledgebase_attachment_blob_reference_signal')
+
+            post_delete.connect(
+                blob_delete_handler, sender=Attachment,
+                dispatch_uid='knowledgebase_attachment_blob_delete_signal')
@@ -0,0 +1,12 @@
+# PROJECT UTILS
+from utils.caches import bump_generation
+
+
+def article_handler(sender, instance, created, **kwargs):
+    """Signals for Article action"""
+    bump_generation('article:%s' % instance.uuid, 'article')
+
+
+def article_delete_handler(sender, instance, **kwargs):
+    """Signals for Article Delete action"""
+    bump_generation('article:%s' % instance.uuid, 'article')
@@ -17,6 +17,7 @@ class NotificationAdmin(admin.ModelAdmin):
     """Extend NotificationAdmin"""
     model = Notification
     list_display = ('get_actor', 'verb', 'get_recipient', 'get_content',)
+    raw_id_fields = ('recipient',)
 
     def get_queryset(self, request):
         comment = Comment.objects.filter(pk=OuterRef('content_id'))
@@ -29,7 +30,7 @@ class NotificationAdmin(admin.ModelAdmin):
                             'content_parent_type', 'content_source_type') \
             .annotate(
                 actor=F('notify_actor_object__actor__user__username'),
-                recipient=F('notify_recipient_object__recipient__user__username'),
+                recipient_username=F('notify_recipient_object__recipient__user__username'),
                 content=Case(
                     When(
                         Q(content_type__model='comment'),
@@ -48,7 +49,7 @@ class NotificationAdmin(admin.ModelAdmin):
         return obj.actor
 
     def get_recipient(self, obj):
-        return obj.recipient
+        return obj.recipient_username
 
     def get_content(self, obj):
         return obj.content
@@ -77,7 +78,7 @@ class NotificationActorAdmin(admin.ModelAdmin):
                 .select_related('content_type') \
                 .annotate(
                     actor=F('notify_actor_object__actor__user__username'),
-                    recipient=F('notify_recipient_object__recipient__user__username'),
+                    recipient_username=F('notify_recipient_object__recipient__user__username'),
                     content=Case(
                         When(
                             Q(content_type__model='comment'),
@@ -145,7 +146,7 @@ class NotificationRecipientAdmin(admin.ModelAdmin):
                 .select_related('content_type') \
                 .annotate(
                     actor=F('notify_actor_object__actor__user__username'),
-                    recipient=F('notify_recipient_object__recipient__user__username'),
+                    recipient_username=F('notify_recipient_object__recipient__user__username'),
                     content=Case(
                         When(
                             Q(content_type__model='comment'),
@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import transaction
+from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 
 # THIRD PARTY
@@ -26,27 +27,31 @@ class NotificationSerializer(serializers.ModelSerializer):
     content_source_uuid = serializers.UUIDField(format='hex_verbose')
     content_parent_uuid = serializers.UUIDField(format='hex_verbose')
     content_source_type = serializers.SerializerMethodField()
-    actor = serializers.CharField()
+    actor = serializers.CharField(source='actor_username')
     verb_label = serializers.CharField(source='get_verb_display')
 
     class Meta:
         model = Notification
         exclude = ['id', 'content_notified_type', 'content_type',
-                   'content_notified_id', 'content_id', 'content_source_id']
+                   'content_notified_id', 'content_id', 'content_source_id',
+                   'recipient', 'actor_username', 'content_excerpt',
+                   'content_notified_excerpt', 'group_key']
 
     def get_content(self, obj):
-        if obj.content:
-            return obj.content[:50] + '...'
+        if obj.content_excerpt:
+            return obj.content_excerpt[:50] + '...'
         return None
 
     def get_content_notified(self, obj):
-        if obj.content_notified:
-            return obj.content_notified[:50] + '...'
+        if obj.content_notified_excerpt:
+            return obj.content_notified_excerpt[:50] + '...'
         return None
 
     def get_content_source_type(self, obj):
-        if obj.content_source_type:
-            return obj.content_source_type.model
+        # Cached by ContentType manager, no query
+        if obj.content_source_type_id:
+            return ContentType.objects \
+                .get_for_id(obj.content_source_type_id).model
         return None
 
 
@@ -62,8 +67,6 @@ class CreateNotificationSerializer(serializers.ModelSerializer):
         except KeyError:
             raise NotAcceptable()
 
-        # Updata object
-        instance.unread = False
-
-        instance.save()
+        # Updata object, counter follow
+        instance.mark_as_read()
         return instance
@@ -1,21 +1,21 @@
 from uuid import UUID
 
-from django.db.models import (
-    Q, F, OuterRef, Subquery, Case, When, CharField, UUIDField)
 from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 from django.utils.decorators import method_decorator
 from django.core.exceptions import ObjectDoesNotExist
 from django.views.decorators.csrf import csrf_protect, ensure_csrf_cookie
 from django.views.decorators.cache import never_cache
+from django.http import StreamingHttpResponse
 
 # THIRD PARTY
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status as response_status, viewsets
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 
 # SERIALIZERS
 from .serializers import NotificationSerializer, CreateNotificationSerializer
@@ -26,15 +26,26 @@ from utils.validators import get_model
 # LOCAL PERMISSIONS
 from ..permissions import IsRecipientOrReject
 
+# LOCAL UTILS
+from ...utils.unreads import (
+    get_unread_count, mark_read, delete_notifications)
+from ...utils.streams import stream_events, wait_notifications
+
 Notification = get_model('notice', 'Notification')
-Comment = get_model('escort', 'Comment')
-Protest = get_model('escort', 'Protest')
-Media = get_model('escort', 'Media')
 
 # Define to avoid used ...().paginate__
 PAGINATOR = PageNumberPagination()
 
 
+class EventStreamRenderer(BaseRenderer):
+    """Accept text/event-stream, body streamed by the view"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class NotificationApiView(viewsets.ViewSet):
     """Listen all items action here..."""
@@ -97,94 +108,14 @@ class NotificationApiView(viewsets.ViewSet):
         # The person
         person = getattr(self.request.user, 'person', None)
 
-        comment = Comment.objects.filter(pk=OuterRef('content_id'))
-        protest = Protest.objects.filter(pk=OuterRef('content_id'))
-
-        comment_notified = Comment.objects.filter(pk=OuterRef('content_notified_id'))
-        protest_notified = Protest.objects.filter(pk=OuterRef('content_notified_id'))
-
-        media_source = Media.objects.filter(pk=OuterRef('content_source_id'))
-
-        media_parent = Media.objects.filter(pk=OuterRef('content_parent_id'))
-        protest_parent = Protest.objects.filter(pk=OuterRef('content_parent_id'))
-
-        # Get protest objects...
+        # Snapshot saved in notification, index (recipient, date_created)
         queryset = Notification.objects \
-            .prefetch_related('content_type', 'content_notified_type', 'content_source_type') \
-            .select_related('content_type', 'content_notified_type', 'content_source_type') \
-            .annotate(
-                actor=F('notify_actor_object__actor__user__username'),
-                recipient=F('notify_recipient_object__recipient__user__username'),
-                content=Case(
-                    When(
-                        Q(content_type__model='comment'),
-                        then=Subquery(comment.values('description')[:1])
-                    ),
-                    When(
-                        Q(content_type__model='protest'),
-                        then=Subquery(protest.values('label')[:1])
-                    ),
-                    default=None,
-                    output_field=CharField()
-                ),
-                content_uuid=Case(
-                    When(
-                        Q(content_type__model='comment'),
-                        then=Subquery(comment.values('uuid')[:1])
-                    ),
-                    When(
-                        Q(content_type__model='protest'),
-                        then=Subquery(protest.values('uuid')[:1])
-                    ),
-                    default=None,
-                    output_field=UUIDField()
-                ),
-                content_notified=Case(
-                    When(
-                        Q(content_notified_type__model='comment'),
-                        then=Subquery(comment_notified.values('description')[:1])
-                    ),
-                    When(
-                        Q(content_notified_type__model='protest'),
-                        then=Subquery(protest_notified.values('label')[:1])
-                    ),
-                    default=None,
-                    output_field=CharField()
-                ),
-                content_notified_uuid=Case(
-                    When(
-                        Q(content_notified_type__model='comment'),
-                        then=Subquery(comment_notified.values('uuid')[:1])
-                    ),
-                    When(
-                        Q(content_notified_type__model='protest'),
-                        then=Subquery(protest_notified.values('uuid')[:1])
-                    ),
-                    default=None,
-                    output_field=UUIDField()
-                ),
-                content_source_uuid=Case(
-                    When(
-                        Q(content_source_type__model='media'),
-                        then=Subquery(media_source.values('uuid')[:1])
-                    ),
-                    default=None,
-                    output_field=UUIDField()
-                ),
-                content_parent_uuid=Case(
-                    When(
-                        Q(content_parent_type__model='media'),
-                        then=Subquery(media_parent.values('uuid')[:1])
-                    ),
-                    When(
-                        Q(content_parent_type__model='protest'),
-                        then=Subquery(protest_parent.values('uuid')[:1])
-                    ),
-                    default=None,
-                    output_field=UUIDField()
-                ),
-            ) \
-            .filter(notify_recipient_object__recipient=person)
+            .filter(recipient=person) \
+            .order_by('-date_created')
+
+        # Recipient null is orphan notification, not for this user
+        if not person:
+            queryset = queryset.none()
 
         queryset_paginator = PAGINATOR.paginate_queryset(
             queryset, request)
@@ -216,7 +147,7 @@ class NotificationApiView(viewsets.ViewSet):
     @transaction.atomic
     def destroy(self, request, uuid=None):
         queryset = self.get_object(uuid)
-        queryset.delete()
+        delete_notifications(Notification.objects.filter(pk=queryset.pk))
         return Response(
             {'detail': _("Berhasil dihapus.")},
             status=response_status.HTTP_204_NO_CONTENT)
@@ -227,19 +158,25 @@ class NotificationApiView(viewsets.ViewSet):
     @action(methods=['post'], detail=False, permission_classes=[IsAuthenticated],
             url_path='mark-reads', url_name='mark_reads')
     def mark_reads(self, request):
+        """Mark all as read, or only `uuids` in body"""
         # The person
         person = getattr(self.request.user, 'person', None)
+        uuids = request.data.get('uuids', None)
 
-        try:
-            queryset = Notification.objects \
-                .filter(
-                    notify_recipient_object__recipient=person,
-                    unread=True)
-        except ObjectDoesNotExist:
+        if not person:
             raise NotFound()
 
-        queryset.update(unread=False)
-        return Response(status=response_status.HTTP_200_OK)
+        if uuids is not None:
+            try:
+                uuids = [UUID(str(item)) for item in uuids]
+            except (TypeError, ValueError):
+                raise ValidationError({'uuids': _("UUID tidak valid.")})
+
+        count = mark_read(person, uuids=uuids)
+        return Response(
+            {'count': count,
+             'unread': get_unread_count(person, cached=False)},
+            status=response_status.HTTP_200_OK)
 
     @method_decorator(csrf_protect)
     @method_decorator(never_cache)
@@ -250,31 +187,59 @@ class NotificationApiView(viewsets.ViewSet):
         # The person
         person = getattr(self.request.user, 'person', None)
 
-        try:
-            queryset = Notification.objects \
-                .filter(notify_recipient_object__recipient=person)
-        except ObjectDoesNotExist:
+        if not person:
             raise NotFound()
 
-        queryset.delete()
+        delete_notifications(Notification.objects
+                             .filter(notify_recipient_object__recipient=person))
         return Response(status=response_status.HTTP_200_OK)
 
-    @method_decorator(csrf_protect)
     @method_decorator(never_cache)
-    @transaction.atomic
     @action(methods=['get'], detail=False, permission_classes=[IsAuthenticated],
             url_path='get-count', url_name='get_count')
     def get_count(self, request):
+        return self.unread_count(request)
+
+    @method_decorator(never_cache)
+    @action(methods=['get'], detail=False, permission_classes=[IsAuthenticated],
+            url_path='unread-count', url_name='unread_count')
+    def unread_count(self, request):
+        """Maintained counter, no notification query"""
         # The person
         person = getattr(self.request.user, 'person', None)
 
-        try:
-            queryset = Notification.objects \
-                .filter(
-                    notify_recipient_object__recipient=person,
-                    unread=True)
-        except ObjectDoesNotExist:
+        count = get_unread_count(person)
+        return Response({'count': int(count)}, status=response_status.HTTP_200_OK)
+
+    @method_decorator(never_cache)
+    @action(methods=['get'], detail=False, permission_classes=[IsAuthenticated],
+            renderer_classes=[JSONRenderer, EventStreamRenderer],
+            url_path='stream', url_name='stream')
+    def stream(self, request):
+        """
+        Accept text/event-stream get server-sent events, others
+        long poll return when new notification or timeout
+        """
+        # The person
+        person = getattr(self.request.user, 'person', None)
+        since = request.META.get('HTTP_LAST_EVENT_ID', None) \
+            or request.query_params.get('since', None)
+
+        if not person:
             raise NotFound()
 
-        count = queryset.count()
-        return Response({'count': int(count)}, status=response_status.HTTP_200_OK)
+        try:
+            since = UUID(since) if since else None
+        except ValueError:
+            raise ValidationError({'since': _("UUID tidak valid.")})
+
+        if request.accepted_renderer.media_type == 'text/event-stream':
+            response = StreamingHttpResponse(
+                stream_events(person, since=since),
+                content_type='text/event-stream')
+            # Nginx not buffer the stream
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        results = wait_notifications(person, since=since)
+        return Response({'results': results}, status=response_status.HTTP_200_OK)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Min, Max
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.snapshots import backfill_chunk
+
+Notification = get_model('notice', 'Notification')
+
+
+class Command(BaseCommand):
+    help = 'Fill notification snapshot (actor, excerpt, uuid) of existing rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Primary key range per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        bounds = Notification.objects.aggregate(start=Min('pk'), end=Max('pk'))
+        total = 0
+
+        if bounds['start'] is not None:
+            for start in range(bounds['start'], bounds['end'] + 1, chunk_size):
+                with transaction.atomic():
+                    total += backfill_chunk(start, start + chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            '%s notifications backfilled.' % total))
@@ -0,0 +1,59 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# LOCAL UTILS
+from ...utils.groups import merge_groups, delete_read
+
+
+class Command(BaseCommand):
+    help = 'Merge old notification group and delete old read notification'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--merge-days', type=int, default=7,
+            help='Unread group older than this merged, 0 skip')
+        parser.add_argument(
+            '--read-days', type=int, default=30,
+            help='Read notification older than this deleted, 0 skip')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows deleted per transaction')
+        parser.add_argument(
+            '--max-batches', type=int, default=100,
+            help='Stop after this many batches each step, next run continue')
+
+    def run_batches(self, func, before, batch_size, max_batches):
+        total = 0
+        for index in range(max_batches):
+            count = func(before, batch_size=batch_size)
+            total += count
+            if not count:
+                break
+        return total
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_batches = options['max_batches']
+        now = timezone.now()
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        if max_batches < 1:
+            raise CommandError('--max-batches must be positive.')
+
+        if options['merge_days']:
+            before = now - datetime.timedelta(days=options['merge_days'])
+            # Group hold several rows, fewer group each batch
+            merged = self.run_batches(
+                merge_groups, before, max(batch_size // 10, 1), max_batches)
+            self.stdout.write('merged   %s' % merged)
+
+        if options['read_days']:
+            before = now - datetime.timedelta(days=options['read_days'])
+            deleted = self.run_batches(
+                delete_read, before, batch_size, max_batches)
+            self.stdout.write('deleted  %s' % deleted)
+
+        self.stdout.write(self.style.SUCCESS('Notifications compacted.'))
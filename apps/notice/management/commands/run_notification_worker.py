@@ -0,0 +1,71 @@
+import time
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# LOCAL UTILS
+from ...utils import outbox
+
+
+class Command(BaseCommand):
+    help = 'Turn pending notification outbox into notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Outbox rows processed per transaction')
+        parser.add_argument(
+            '--sleep', type=float, default=1,
+            help='Seconds waiting when outbox empty')
+        parser.add_argument(
+            '--max-attempts', type=int, default=outbox.MAX_ATTEMPTS,
+            help='Row marked failed after this many error')
+        parser.add_argument(
+            '--purge-days', type=int, default=7,
+            help='Processed rows older than this deleted when idle, 0 keep')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process until outbox empty then exit')
+
+    def stop(self, *args):
+        self.running = False
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        purge_days = options['purge_days']
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        if options['max_attempts'] < 1:
+            raise CommandError('--max-attempts must be positive.')
+
+        self.running = True
+        processed = 0
+
+        # Finish current batch before exit
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while self.running:
+            count = outbox.process_outbox(
+                batch_size=batch_size, max_attempts=options['max_attempts'])
+            processed += count
+
+            # Every batch, lag matter most while backlog draining
+            outbox.record_lag()
+            if count:
+                continue
+
+            if purge_days:
+                outbox.purge_outbox(days=purge_days)
+
+            if options['once']:
+                break
+
+            # Not hold idle connection while sleeping
+            connections.close_all()
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            'Notification worker stopped, %s rows processed.' % processed))
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('person', '0013_auto_20191106_0844'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notice', '0009_auto_20191030_1551'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='uuid',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False),
+        ),
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('status', models.PositiveIntegerField(choices=[(1, 'Menunggu'), (2, 'Selesai'), (3, 'Gagal')], default=1)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_processed', models.DateTimeField(blank=True, null=True)),
+                ('content_id', models.PositiveIntegerField()),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notify_outbox', to='person.Person')),
+                ('content_type', models.ForeignKey(limit_choices_to=models.Q(app_label__in=['escort', 'person']), on_delete=django.db.models.deletion.CASCADE, related_name='notice_entity_outbox', to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name': 'Notification Outbox',
+                'verbose_name_plural': 'Notification Outbox',
+                'db_table': 'notice_notification_outbox',
+                'ordering': ['pk'],
+                'abstract': False,
+                'index_together': {('status', 'available_at')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('person', '0013_auto_20191106_0844'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notice', '0010_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_username',
+            field=models.CharField(blank=True, max_length=150, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='content_excerpt',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='content_notified_excerpt',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='content_notified_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='content_parent_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='content_source_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='content_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recipient',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notify_snapshot', to='person.Person'),
+        ),
+        migrations.AlterIndexTogether(
+            name='notification',
+            index_together={('content_id', 'content_type'), ('content_notified_id', 'content_notified_type'), ('recipient', 'date_created')},
+        ),
+    ]
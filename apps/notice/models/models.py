@@ -31,3 +31,12 @@ if not is_model_registered('notice', 'NotificationRecipient'):
             db_table = 'notice_notification_recipient'
 
     __all__.append('NotificationRecipient')
+
+
+# 3
+if not is_model_registered('notice', 'NotificationOutbox'):
+    class NotificationOutbox(AbstractNotificationOutbox):
+        class Meta(AbstractNotificationOutbox.Meta):
+            db_table = 'notice_notification_outbox'
+
+    __all__.append('NotificationOutbox')
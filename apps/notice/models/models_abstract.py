@@ -7,6 +7,7 @@ from django.contrib.contenttypes.fields import (
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 from django.utils.text import slugify
+from django.utils import timezone
 
 
 class NotificationQuerySet(models.query.QuerySet):
@@ -20,33 +21,29 @@ class NotificationQuerySet(models.query.QuerySet):
         """Return only read items in the current queryset"""
         return self.filter(unread=False)
 
+    def for_recipient(self, recipient=None):
+        """Recipient saved in NotificationRecipient"""
+        if recipient:
+            return self.filter(notify_recipient_object__recipient=recipient)
+        return self
+
     def mark_all_as_read(self, recipient=None):
         """Mark as read any unread elements in the current queryset with
         optional filter by recipient first.
         """
-        qs = self.unread()
-        if recipient:
-            qs = qs.filter(recipient=recipient)
-
-        return qs.update(unread=False)
+        from ..utils.unreads import set_unread
+        return set_unread(self.for_recipient(recipient), False)
 
     def mark_all_as_unread(self, recipient=None):
         """Mark as unread any read elements in the current queryset with
         optional filter by recipient first.
         """
-        qs = self.read()
-        if recipient:
-            qs = qs.filter(recipient=recipient)
-
-        return qs.update(unread=True)
+        from ..utils.unreads import set_unread
+        return set_unread(self.for_recipient(recipient), True)
 
     def get_most_recent(self, recipient=None):
         """Returns the most recent unread elements in the queryset"""
-        qs = self.unread()[:5]
-        if recipient:
-            qs = qs.filter(recipient=recipient)[:5]
-
-        return qs
+        return self.unread().for_recipient(recipient)[:5]
 
 
 class AbstractNotification(models.Model):
@@ -75,7 +72,7 @@ class AbstractNotification(models.Model):
     unread = models.BooleanField(default=True, db_index=True)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
-    uuid = models.UUIDField(default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, db_index=True)
     verb = models.CharField(max_length=1, choices=NOTIFICATION_TYPES)
 
     content_type = models.ForeignKey(
@@ -110,17 +107,48 @@ class AbstractNotification(models.Model):
     content_parent_object = GenericForeignKey(
         'content_parent_type', 'content_parent_id')
 
+    # Snapshot saved when created, so list not join the content.
+    # Excerpt of edited comment refreshed by utils.snapshots
+    recipient = models.ForeignKey(
+        'person.Person',
+        related_name='notify_snapshot',
+        on_delete=models.SET_NULL,
+        null=True, blank=True)
+    actor_username = models.CharField(max_length=150, null=True, blank=True)
+    content_excerpt = models.CharField(max_length=100, null=True, blank=True)
+    content_uuid = models.UUIDField(null=True, blank=True)
+    content_notified_excerpt = models.CharField(
+        max_length=100, null=True, blank=True)
+    content_notified_uuid = models.UUIDField(null=True, blank=True)
+    content_source_uuid = models.UUIDField(null=True, blank=True)
+    content_parent_uuid = models.UUIDField(null=True, blank=True)
+
+    # Same recipient, verb and notified content collapsed in a window,
+    # ex: "X and 12 others commented", see utils.groups
+    group_key = models.CharField(
+        max_length=64, null=True, blank=True, db_index=True)
+    actor_count = models.PositiveIntegerField(default=1)
+
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         abstract = True
         app_label = 'notice'
         ordering = ['-date_created']
+        index_together = [
+            ('recipient', 'date_created'),
+            ('content_id', 'content_type'),
+            ('content_notified_id', 'content_notified_type'),
+        ]
         verbose_name = _("Notification")
         verbose_name_plural = _("Notifications")
 
     def __str__(self):
-        if hasattr(self, 'actor'):
-            content = self.content[:25] + '...' if self.content else None
-            return f'{self.actor} {self.get_verb_display()} {content} {self.time_since()} ago'
+        actor = getattr(self, 'actor', self.actor_username)
+        if actor:
+            content = getattr(self, 'content', self.content_excerpt)
+            content = content[:25] + '...' if content else None
+            return f'{actor} {self.get_verb_display()} {content} {self.time_since()} ago'
         return self.get_verb_display()
 
     def save(self, *args, **kwargs):
@@ -152,13 +180,15 @@ class AbstractNotification(models.Model):
 
     def mark_as_read(self):
         if self.unread:
+            from ..utils.unreads import set_unread
+            set_unread(type(self).objects.filter(pk=self.pk), False)
             self.unread = False
-            self.save()
 
     def mark_as_unread(self):
         if not self.unread:
+            from ..utils.unreads import set_unread
+            set_unread(type(self).objects.filter(pk=self.pk), True)
             self.unread = True
-            self.save()
 
 
 class AbstractNotificationActor(models.Model):
@@ -203,3 +233,52 @@ class AbstractNotificationRecipient(models.Model):
         ordering = ['-date_created']
         verbose_name = _("Notification Recipient")
         verbose_name_plural = _("Notification Recipients")
+
+
+class AbstractNotificationOutbox(models.Model):
+    """
+    Event waiting to become Notification, saved in same transaction
+    with the event (ex: Comment) and processed by
+    `run_notification_worker`
+    """
+    PENDING = 1
+    DONE = 2
+    FAILED = 3
+    STATUS_CHOICES = (
+        (PENDING, _("Menunggu")),
+        (DONE, _("Selesai")),
+        (FAILED, _("Gagal")),
+    )
+    # Idempotency, ex: comment:1
+    key = models.CharField(max_length=64, unique=True)
+    status = models.PositiveIntegerField(
+        choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_processed = models.DateTimeField(blank=True, null=True)
+
+    actor = models.ForeignKey(
+        'person.Person',
+        related_name='notify_outbox',
+        on_delete=models.CASCADE,
+        null=True, blank=True)
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE,
+        related_name='notice_entity_outbox',
+        limit_choices_to=Q(app_label__in=['escort', 'person']))
+    content_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'content_id')
+
+    class Meta:
+        abstract = True
+        app_label = 'notice'
+        ordering = ['pk']
+        index_together = [('status', 'available_at')]
+        verbose_name = _("Notification Outbox")
+        verbose_name_plural = _("Notification Outbox")
+
+    def __str__(self):
+        return self.key
@@ -1,6 +1,11 @@
 # PROJECT UTILS
 from utils.validators import get_model
 
+# LOCAL UTILS
+from .utils.unreads import add_unread
+from .utils.streams import publish_notifications
+
+Notification = get_model('notice', 'Notification')
 NotificationActor = get_model('notice', 'NotificationActor')
 NotificationRecipient = get_model('notice', 'NotificationRecipient')
 
@@ -41,3 +46,12 @@ def notification_handler(sender, instance, created, **kwargs):
             if recipient:
                 NotificationRecipient.objects.create(
                     notification=instance, recipient=recipient)
+
+                # Snapshot recipient, so listed and streamed
+                Notification.objects.filter(pk=instance.pk) \
+                    .update(recipient=recipient)
+                instance.recipient = recipient
+
+                if instance.unread:
+                    add_unread({recipient.pk: 1})
+                publish_notifications([instance])
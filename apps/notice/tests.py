@@ -1,3 +1,401 @@
-from django.test import TestCase
+import time
+import datetime
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, connections, transaction
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.utils import timezone
+
+from rest_framework.test import APITransactionTestCase
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.metrics import get_metric_key, flush_metrics
+from utils.pubsub import hub, CacheTransport
+
+# LOCAL UTILS
+from .utils import outbox
+from .utils.outbox import process_outbox
+from .utils.unreads import get_unread_count
+from ..escort.utils.testcases import FixtureMixin
+
+Comment = get_model('escort', 'Comment')
+Notification = get_model('notice', 'Notification')
+NotificationActor = get_model('notice', 'NotificationActor')
+NotificationRecipient = get_model('notice', 'NotificationRecipient')
+NotificationOutbox = get_model('notice', 'NotificationOutbox')
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0, NOTIFICATION_GROUP_WINDOW=0)
+class NotificationOutboxTest(FixtureMixin, APITransactionTestCase):
+    """Outbox row saved with comment, worker create notification"""
+
+    def setUp(self):
+        self.create_fixture('outbox', persons=2)
+
+    def comment(self, commenter, parent=None):
+        return Comment.objects.create(
+            protest=self.protest, commenter=commenter,
+            description='Lorem', parent=parent)
+
+    def test_rollback(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.comment(self.persons[1])
+                raise ValueError
+
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_process(self):
+        comment = self.comment(self.persons[1])
+        reply = self.comment(self.persons[0], parent=comment)
+        # Own protest, not notified
+        self.comment(self.persons[0])
+
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(process_outbox(), 3)
+
+        notification = Notification.objects.get(content_id=comment.pk)
+        self.assertEqual(notification.verb, 'C')
+        self.assertEqual(
+            notification.notify_actor_object.get().actor, self.persons[1])
+        self.assertEqual(
+            notification.notify_recipient_object.get().recipient,
+            self.persons[0])
+
+        notification = Notification.objects.get(content_id=reply.pk)
+        self.assertEqual(notification.verb, 'R')
+        self.assertEqual(
+            notification.notify_recipient_object.get().recipient,
+            self.persons[1])
+
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(
+            NotificationOutbox.objects
+            .filter(status=NotificationOutbox.DONE).count(), 3)
+
+    def test_idempotent(self):
+        self.comment(self.persons[1])
+        process_outbox()
+
+        # Row processed again, ex: worker crashed before marked done
+        NotificationOutbox.objects.update(status=NotificationOutbox.PENDING)
+        out = StringIO()
+        call_command('run_notification_worker', '--once', stdout=out)
+
+        self.assertIn('1 rows processed', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(NotificationActor.objects.count(), 1)
+        self.assertEqual(NotificationRecipient.objects.count(), 1)
+
+    def test_lag_while_draining(self):
+        self.comment(self.persons[1])
+        self.comment(self.persons[1])
+
+        # Two batches of one then the empty one, lag each
+        with mock.patch.object(outbox, 'record_lag') as record_lag:
+            call_command('run_notification_worker', '--once',
+                         batch_size=1, stdout=StringIO())
+        self.assertEqual(record_lag.call_count, 3)
+
+    def test_bad_row(self):
+        comments = [self.comment(self.persons[1]) for index in range(3)]
+        build = outbox.build_comment_notification
+
+        def build_or_fail(row, comment):
+            if comment.pk == comments[1].pk:
+                raise ValueError('Rusak')
+            return build(row, comment)
+
+        with mock.patch.object(outbox, 'build_comment_notification',
+                               side_effect=build_or_fail):
+            call_command('run_notification_worker', '--once',
+                         max_attempts=1, stdout=StringIO())
+
+        # Only the bad row failed, the others notified
+        failed = NotificationOutbox.objects.get(
+            status=NotificationOutbox.FAILED)
+        self.assertEqual(failed.content_id, comments[1].pk)
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(
+            NotificationOutbox.objects
+            .filter(status=NotificationOutbox.DONE).count(), 2)
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(outbox.MAX_ATTEMPTS, 5)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0, NOTIFICATION_GROUP_WINDOW=0)
+class NotificationSnapshotTest(FixtureMixin, APITransactionTestCase):
+    """List read snapshot saved in notification"""
+
+    def setUp(self):
+        self.create_fixture('snapshot', persons=2)
+        self.client.force_authenticate(self.persons[0].user)
+
+    def create_comments(self, total):
+        comments = [
+            Comment.objects.create(
+                protest=self.protest, commenter=self.persons[1],
+                description='Comment %s' % index)
+            for index in range(total)]
+        process_outbox()
+        return comments
+
+    def get_list(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/notice/notifications/')
+        self.assertEqual(response.status_code, 200)
+        return len(context), response.json()
+
+    def test_list(self):
+        comment = self.create_comments(1)[0]
+        queries, response = self.get_list()
+        item = response['results'][0]
+
+        self.assertEqual(item['actor'], 'snapshot1')
+        self.assertEqual(item['content'], 'Comment 0...')
+        self.assertEqual(item['content_uuid'], str(comment.uuid))
+        self.assertEqual(item['content_notified'], 'Protest...')
+        self.assertEqual(item['content_source_uuid'], str(self.media.uuid))
+        self.assertEqual(item['content_source_type'], 'media')
+
+        # Same queries for more rows
+        self.create_comments(5)
+        self.assertEqual(self.get_list()[0], queries)
+
+    def test_edit_refresh(self):
+        comment = self.create_comments(1)[0]
+        comment.description = 'Edited'
+        comment.save()
+
+        notification = Notification.objects.get(content_id=comment.pk)
+        self.assertEqual(notification.content_excerpt, 'Edited')
+
+    def test_backfill(self):
+        self.create_comments(3)
+        Notification.objects.update(
+            recipient=None, actor_username=None, content_uuid=None,
+            content_excerpt=None)
+
+        out = StringIO()
+        call_command('backfill_notification_snapshot', '--chunk-size', '2',
+                     stdout=out)
+        self.assertIn('3 notifications backfilled', out.getvalue())
+
+        queries, response = self.get_list()
+        self.assertEqual(response['count'], 3)
+        self.assertEqual(
+            {item['actor'] for item in response['results']}, {'snapshot1'})
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0, NOTIFICATION_GROUP_WINDOW=0)
+class UnreadCounterTest(FixtureMixin, APITransactionTestCase):
+    """Unread counter follow create, read and delete"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture('unread', persons=2)
+        for index in range(4):
+            Comment.objects.create(
+                protest=self.protest, commenter=self.persons[1],
+                description='Comment %s' % index)
+        process_outbox()
+        self.client.force_authenticate(self.persons[0].user)
+
+    def get_count(self):
+        response = self.client.get('/api/notice/notifications/unread-count/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['count']
+
+    def test_count(self):
+        self.assertEqual(self.get_count(), 4)
+
+        # Cached, no query for second request
+        with CaptureQueriesContext(connection) as context:
+            self.get_count()
+        self.assertFalse([query for query in context.captured_queries
+                          if 'unread_notification_count' in query['sql']])
+
+    def test_mark_reads(self):
+        uuids = [str(uuid) for uuid in
+                 Notification.objects.values_list('uuid', flat=True)[:2]]
+        url = '/api/notice/notifications/mark-reads/'
+
+        response = self.client.post(url, {'uuids': uuids}, format='json')
+        self.assertEqual(response.json(), {'count': 2, 'unread': 2})
+        self.assertEqual(self.get_count(), 2)
+
+        response = self.client.post(url, {'uuids': ['wrong']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url)
+        self.assertEqual(response.json(), {'count': 2, 'unread': 0})
+
+        # Queryset helper follow NotificationRecipient
+        Notification.objects.mark_all_as_unread(recipient=self.persons[0])
+        self.assertEqual(self.get_count(), 4)
+
+    def test_delete(self):
+        notification = Notification.objects.first()
+        notification.mark_as_read()
+        self.assertEqual(self.get_count(), 3)
+
+        Comment.objects.exclude(pk=notification.content_id).first().delete()
+        self.assertEqual(self.get_count(), 2)
+
+        response = self.client.delete('/api/notice/notifications/delete-all/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_count(), 0)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0, NOTIFICATION_GROUP_WINDOW=3600)
+class NotificationGroupTest(FixtureMixin, APITransactionTestCase):
+    """Comment to same protest collapsed in one notification"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture('group', persons=3)
+
+    def comment(self, commenter, description='Lorem'):
+        return Comment.objects.create(
+            protest=self.protest, commenter=commenter,
+            description=description)
+
+    def test_group(self):
+        self.comment(self.persons[1])
+        process_outbox()
+        self.comment(self.persons[1])
+        self.comment(self.persons[2], 'Latest')
+        process_outbox()
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.actor_username, 'group2')
+        self.assertEqual(notification.content_excerpt, 'Latest')
+        self.assertEqual(notification.notify_recipient_object.count(), 1)
+        self.assertEqual(get_unread_count(self.persons[0]), 1)
+
+        # Read group not reopened
+        notification.mark_as_read()
+        self.comment(self.persons[1])
+        process_outbox()
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_compact(self):
+        with override_settings(NOTIFICATION_GROUP_WINDOW=0):
+            for index in range(4):
+                self.comment(self.persons[1 + index % 2])
+            process_outbox()
+
+        old = timezone.now() - datetime.timedelta(days=40)
+        Notification.objects.update(date_created=old)
+        read = Notification.objects.order_by('pk').first()
+        read.mark_as_read()
+        self.assertEqual(get_unread_count(self.persons[0]), 3)
+
+        out = StringIO()
+        call_command('compact_notifications', '--batch-size', '10',
+                     stdout=out)
+        self.assertIn('merged   2', out.getvalue())
+        self.assertIn('deleted  1', out.getvalue())
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(get_unread_count(self.persons[0]), 1)
+
+
+@override_settings(
+    COUNTER_FLUSH_INTERVAL=0, NOTIFICATION_GROUP_WINDOW=0,
+    PUBSUB_TRANSPORT='utils.pubsub.LocalTransport',
+    NOTIFICATION_POLL_TIMEOUT=5, NOTIFICATION_STREAM_DURATION=0)
+class NotificationStreamTest(FixtureMixin, APITransactionTestCase):
+    """New notification pushed to stream of the recipient"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixture('stream', persons=2)
+        self.client.force_authenticate(self.persons[0].user)
+        self.url = '/api/notice/notifications/stream/'
+
+    def comment(self):
+        Comment.objects.create(
+            protest=self.protest, commenter=self.persons[1],
+            description='Lorem')
+        process_outbox()
+
+    def test_long_poll(self):
+        def produce():
+            # Wait the poll subscribed
+            while not hub.count():
+                time.sleep(0.01)
+            self.comment()
+            connections.close_all()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        response = self.client.get(self.url)
+        producer.join()
+
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['actor'], 'stream1')
+        self.assertEqual(hub.count(), 0)
+        flush_metrics()
+        self.assertEqual(cache.get(get_metric_key(
+            'notification_stream_connections')), 0)
+
+    def test_event_stream(self):
+        self.comment()
+        since = Notification.objects.get().uuid
+        self.comment()
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT='text/event-stream',
+            HTTP_LAST_EVENT_ID=str(since))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        body = ''.join(chunk.decode() if isinstance(chunk, bytes) else chunk
+                       for chunk in response.streaming_content)
+        latest = Notification.objects.exclude(uuid=since).get()
+        self.assertIn('id: %s\nevent: notification' % latest.uuid, body)
+        self.assertNotIn('id: %s\n' % since, body)
+
+    def test_cache_transport(self):
+        transport = CacheTransport()
+        transport.start(hub.deliver)
+        transport.last = transport.get_sequence()
+
+        with hub.subscribe('notice:test') as messages:
+            transport.publish('notice:test', {'data': 1})
+            self.assertEqual(transport.poll(), 1)
+            self.assertEqual(messages.get_nowait(), {'data': 1})
+
+    def test_cache_transport_gap(self):
+        transport = CacheTransport()
+        transport.start(hub.deliver)
+        transport.last = transport.get_sequence()
+
+        with hub.subscribe('notice:test') as messages:
+            # Other publisher took a number, message not written yet
+            cache.add(transport.sequence_key, 0, None)
+            gap = cache.incr(transport.sequence_key)
+
+            # Number taken by non atomic incr, next one used
+            cache.add(transport.get_slot_key(gap + 1), 'taken', 60)
+            self.assertEqual(
+                transport.publish('notice:test', {'data': 2}), gap + 2)
+
+            self.assertEqual(transport.poll(), 1)
+            self.assertEqual(messages.get_nowait(), {'data': 2})
+            self.assertEqual(transport.last, gap - 1)
+
+            # Not delivered twice while waiting the gap
+            self.assertEqual(transport.poll(), 0)
+            with override_settings(PUBSUB_MESSAGE_TIMEOUT=0):
+                transport.poll()
+            self.assertEqual(transport.last, gap + 2)
@@ -0,0 +1,152 @@
+"""
+Notification group
+------------------------
+New notification with same recipient, verb and notified content
+as an unread one created in NOTIFICATION_GROUP_WINDOW seconds merged
+into it; latest actor and content shown, actor_count count distinct
+actor. Inbox get one row per protest instead of one per comment.
+
+`compact_notifications` call merge_groups() for old unread group
+left from other window and delete_read() for old read notification,
+bounded each batch.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from .unreads import delete_notifications
+
+Notification = get_model('notice', 'Notification')
+NotificationActor = get_model('notice', 'NotificationActor')
+
+# Field copied from new notification to the group
+MERGE_FIELDS = [
+    'content_type_id', 'content_id', 'content_source_type_id',
+    'content_source_id', 'content_parent_type_id', 'content_parent_id',
+    'actor_username', 'content_excerpt', 'content_uuid',
+    'content_notified_excerpt', 'content_source_uuid', 'content_parent_uuid']
+
+
+def get_group_key(notification):
+    if not notification.recipient_id or not notification.content_notified_id:
+        return None
+
+    return '%s:%s:%s:%s' % (
+        notification.recipient_id, notification.verb,
+        notification.content_notified_type_id,
+        notification.content_notified_id)
+
+
+def get_window():
+    return getattr(settings, 'NOTIFICATION_GROUP_WINDOW', 0)
+
+
+def get_open_groups(keys):
+    """{group_key: latest unread notification in window}"""
+    window = get_window()
+    if not window or not keys:
+        return dict()
+
+    since = timezone.now() - datetime.timedelta(seconds=window)
+    return {notification.group_key: notification
+            for notification in Notification.objects
+            .filter(group_key__in=set(keys), unread=True,
+                    date_created__gte=since)
+            .order_by('date_created')}
+
+
+def merge_into(group, notification):
+    """Latest content shown by the group, not saved"""
+    for field in MERGE_FIELDS:
+        setattr(group, field, getattr(notification, field))
+    group.date_created = timezone.now()
+    return group
+
+
+def update_actor_counts(ids):
+    """actor_count from distinct actor, one UPDATE"""
+    if not ids:
+        return None
+
+    counts = NotificationActor.objects \
+        .filter(notification=OuterRef('pk')) \
+        .order_by() \
+        .values('notification') \
+        .annotate(count=Count('actor', distinct=True)) \
+        .values('count')
+    Notification.objects.filter(pk__in=ids) \
+        .update(actor_count=Subquery(counts[:1]))
+
+
+def add_actors(pairs):
+    """[(notification_id, actor_id)], skip already exist"""
+    pairs = {pair for pair in pairs if pair[1]}
+    if not pairs:
+        return None
+
+    exists = set(NotificationActor.objects
+                 .filter(notification_id__in={pair[0] for pair in pairs})
+                 .values_list('notification_id', 'actor_id'))
+    NotificationActor.objects.bulk_create([
+        NotificationActor(notification_id=notification_id, actor_id=actor_id)
+        for notification_id, actor_id in pairs - exists])
+
+
+def merge_groups(before, batch_size=100):
+    """
+    Merge unread group created before, each group_key to the newest
+    ------------------------
+    Return count of notification removed
+    """
+    keys = list(Notification.objects
+                .filter(unread=True, date_created__lt=before,
+                        group_key__isnull=False)
+                .order_by()
+                .values('group_key')
+                .annotate(total=Count('pk'))
+                .filter(total__gt=1)
+                .values_list('group_key', flat=True)[:batch_size])
+    if not keys:
+        return 0
+
+    with transaction.atomic():
+        notifications = list(Notification.objects
+                             .select_for_update()
+                             .filter(group_key__in=keys, unread=True)
+                             .order_by('-date_created'))
+
+        targets, merged = dict(), dict()
+        for notification in notifications:
+            target = targets.setdefault(notification.group_key, notification)
+            if target is not notification:
+                merged[notification.pk] = target.pk
+
+        if not merged:
+            return 0
+
+        add_actors([(merged[notification_id], actor_id)
+                    for notification_id, actor_id in NotificationActor.objects
+                    .filter(notification_id__in=merged)
+                    .values_list('notification_id', 'actor_id')])
+        delete_notifications(Notification.objects.filter(pk__in=merged))
+        update_actor_counts([target.pk for target in targets.values()])
+    return len(merged)
+
+
+def delete_read(before, batch_size=1000):
+    """Delete read notification created before, return count"""
+    ids = list(Notification.objects
+               .filter(unread=False, date_created__lt=before)
+               .order_by()
+               .values_list('pk', flat=True)[:batch_size])
+    if ids:
+        with transaction.atomic():
+            Notification.objects.filter(pk__in=ids).delete()
+    return len(ids)
@@ -0,0 +1,303 @@
+"""
+Notification outbox
+------------------------
+enqueue_notification() called from event signal (ex: Comment
+post_save), so the outbox row committed or rolled back together
+with the event. `run_notification_worker` call process_outbox()
+which turn a batch of rows into Notification, NotificationActor
+and NotificationRecipient with bulk_create.
+
+Batch failed processed again a row each, only the failed row retried
+with backoff until max_attempts, then marked FAILED. Notification uuid derived from outbox key, so a row
+processed twice not create second notification.
+"""
+import uuid
+import datetime
+import collections
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.metrics import register, increment, set_gauge
+
+# LOCAL UTILS
+from .snapshots import get_contents, fill_snapshot
+from .unreads import add_unread
+from .streams import publish_notifications
+from .groups import (
+    MERGE_FIELDS, get_window, get_open_groups, merge_into, add_actors,
+    update_actor_counts)
+
+Notification = get_model('notice', 'Notification')
+NotificationRecipient = get_model('notice', 'NotificationRecipient')
+NotificationOutbox = get_model('notice', 'NotificationOutbox')
+Comment = get_model('escort', 'Comment')
+Person = get_model('person', 'Person')
+
+MAX_ATTEMPTS = 5
+MAX_BACKOFF = 300
+
+OUTBOX_PROCESSED = register(
+    'notification_outbox_processed_total', 'counter',
+    'Outbox row processed by status (done, skipped, retry, failed)')
+OUTBOX_LAG = register(
+    'notification_outbox_lag_seconds', 'gauge',
+    'Age of the oldest pending outbox row')
+
+# Namespace for notification uuid from outbox key
+OUTBOX_NAMESPACE = uuid.UUID('2f1c0e46-4b0e-4f8a-9d0c-6a3f3c1f6d2e')
+
+
+def get_outbox_key(instance):
+    content_type = ContentType.objects.get_for_model(instance)
+    return '%s:%s' % (content_type.model, instance.pk)
+
+
+def enqueue_notification(instance, actor=None):
+    """Save outbox row in current transaction, once each instance"""
+    try:
+        with transaction.atomic():
+            return NotificationOutbox.objects.create(
+                key=get_outbox_key(instance),
+                content_object=instance,
+                actor=actor)
+    except IntegrityError:
+        return None
+
+
+def build_comment_notification(row, comment):
+    """
+    Notification for comment, None if no need
+    ------------------------
+    Return (notification, recipient)
+    """
+    parent = comment.parent
+    protest = comment.protest
+    media = protest.media
+    actor_id = row.actor_id
+
+    if not actor_id:
+        return None
+
+    notification = Notification(
+        uuid=uuid.uuid5(OUTBOX_NAMESPACE, row.key),
+        content_object=comment,
+        content_source_object=media)
+
+    # Has parent indicated replied to comment
+    if parent:
+        if parent.commenter_id == actor_id and not comment.reply_for_person_id:
+            return None
+
+        notification.verb = 'R'
+        notification.content_notified_object = parent
+        notification.content_parent_object = protest
+        recipient_id = comment.reply_for_person_id or parent.commenter_id
+    else:
+        # No parent indicated commented to Protest
+        if protest.protester_id == actor_id:
+            return None
+
+        notification.verb = 'C'
+        notification.content_notified_object = protest
+        recipient_id = protest.protester_id
+    return notification, recipient_id
+
+
+def build_notifications(rows):
+    """
+    Return [(row, notification, recipient_id) or (row, None, None)]
+    """
+    comment_type = ContentType.objects.get_for_model(Comment)
+    comment_ids = [row.content_id for row in rows
+                   if row.content_type_id == comment_type.pk]
+    comments = Comment.objects \
+        .select_related('protest', 'protest__media', 'parent') \
+        .in_bulk(comment_ids)
+    usernames = dict(Person.objects
+                     .filter(pk__in=[row.actor_id for row in rows])
+                     .values_list('pk', 'user__username'))
+
+    results = list()
+    for row in rows:
+        built = None
+        if row.content_type_id == comment_type.pk:
+            comment = comments.get(row.content_id, None)
+
+            # Comment deleted before processed, nothing to notify
+            if comment:
+                built = build_comment_notification(row, comment)
+
+            if built:
+                fill_snapshot(
+                    built[0],
+                    get_contents([comment, comment.parent, comment.protest,
+                                  comment.protest.media]),
+                    actor_username=usernames.get(row.actor_id, None),
+                    recipient_id=built[1])
+
+        if built:
+            results.append((row, built[0], built[1]))
+        else:
+            results.append((row, None, None))
+    return results
+
+
+def save_notifications(results):
+    """
+    Bulk create notification, actor and recipient
+    ------------------------
+    Notification in open group merged to it, not created
+    """
+    results = [result for result in results if result[1] is not None]
+    if not results:
+        return None
+
+    # Already created by previous run
+    uuids = [notification.uuid for row, notification, recipient in results]
+    exists = set(Notification.objects
+                 .filter(uuid__in=uuids)
+                 .values_list('uuid', flat=True))
+    results = [result for result in results if result[1].uuid not in exists]
+
+    window = get_window()
+    groups = get_open_groups(
+        [notification.group_key for row, notification, recipient in results
+         if notification.group_key])
+    created, merged, actors = list(), dict(), list()
+
+    for row, notification, recipient_id in results:
+        group = groups.get(notification.group_key, None)
+        if group is None:
+            # Open group for next notification in this batch
+            if window and notification.group_key:
+                groups[notification.group_key] = notification
+            created.append((notification, recipient_id))
+        else:
+            merge_into(group, notification)
+            if group.pk:
+                merged[group.pk] = group
+        actors.append((group or notification, row.actor_id))
+
+    Notification.objects.bulk_create(
+        [notification for notification, recipient_id in created])
+    Notification.objects.bulk_update(
+        merged.values(), MERGE_FIELDS + ['date_created'])
+
+    # Not all database return the id, read by uuid
+    ids = dict(Notification.objects
+               .filter(uuid__in=[notification.uuid
+                                 for notification, recipient_id in created])
+               .values_list('uuid', 'pk'))
+    for notification, recipient_id in created:
+        notification.pk = ids[notification.uuid]
+
+    recipients = [
+        NotificationRecipient(
+            notification_id=notification.pk, recipient_id=recipient_id)
+        for notification, recipient_id in created if recipient_id]
+
+    add_actors([(notification.pk, actor_id)
+                for notification, actor_id in actors])
+    NotificationRecipient.objects.bulk_create(recipients)
+    update_actor_counts([notification.pk for notification, actor_id in actors
+                         if notification.group_key])
+    add_unread(collections.Counter(
+        recipient.recipient_id for recipient in recipients))
+    publish_notifications(
+        [notification for notification, recipient_id in created]
+        + list(merged.values()))
+
+
+def retry_rows(rows, error, max_attempts=MAX_ATTEMPTS):
+    now = timezone.now()
+    for row in rows:
+        row.attempts += 1
+        row.last_error = str(error)[:1000]
+
+        if row.attempts >= max_attempts:
+            row.status = NotificationOutbox.FAILED
+            increment(OUTBOX_PROCESSED, status='failed')
+        else:
+            backoff = min(2 ** row.attempts, MAX_BACKOFF)
+            row.available_at = now + datetime.timedelta(seconds=backoff)
+            increment(OUTBOX_PROCESSED, status='retry')
+
+    NotificationOutbox.objects.bulk_update(
+        rows, ['attempts', 'last_error', 'status', 'available_at'])
+
+
+def save_rows(rows, now):
+    """Notifications of rows in a savepoint, rows marked done"""
+    with transaction.atomic():
+        results = build_notifications(rows)
+        save_notifications(results)
+        NotificationOutbox.objects \
+            .filter(pk__in=[row.pk for row in rows]) \
+            .update(status=NotificationOutbox.DONE, date_processed=now)
+
+    skipped = len([result for result in results if result[1] is None])
+    if skipped:
+        increment(OUTBOX_PROCESSED, skipped, status='skipped')
+    if len(rows) - skipped:
+        increment(OUTBOX_PROCESSED, len(rows) - skipped, status='done')
+
+
+def process_outbox(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """Process one batch, return count of row processed"""
+    now = timezone.now()
+    lock = {'skip_locked': True} \
+        if connection.features.has_select_for_update_skip_locked else {}
+
+    with transaction.atomic():
+        # Other worker skip row locked by this one
+        rows = list(NotificationOutbox.objects
+                    .select_for_update(**lock)
+                    .filter(status=NotificationOutbox.PENDING,
+                            available_at__lte=now)
+                    .order_by('pk')[:batch_size])
+        if not rows:
+            return 0
+
+        try:
+            save_rows(rows, now)
+        except Exception as error:
+            if len(rows) == 1:
+                retry_rows(rows, error, max_attempts)
+                return 1
+
+            # One bad row not charged to the whole batch
+            for row in rows:
+                try:
+                    save_rows([row], now)
+                except Exception as error:
+                    retry_rows([row], error, max_attempts)
+    return len(rows)
+
+
+def record_lag():
+    """Age of the oldest pending row in seconds"""
+    oldest = NotificationOutbox.objects \
+        .filter(status=NotificationOutbox.PENDING) \
+        .order_by('pk') \
+        .values_list('date_created', flat=True) \
+        .first()
+
+    lag = int((timezone.now() - oldest).total_seconds()) if oldest else 0
+    set_gauge(OUTBOX_LAG, lag)
+    return lag
+
+
+def purge_outbox(days=7, batch_size=1000):
+    """Delete processed row older than days, bounded"""
+    until = timezone.now() - datetime.timedelta(days=days)
+    ids = list(NotificationOutbox.objects
+               .filter(status=NotificationOutbox.DONE,
+                       date_processed__lt=until)
+               .values_list('pk', flat=True)[:batch_size])
+    if ids:
+        NotificationOutbox.objects.filter(pk__in=ids).delete()
+    return len(ids)
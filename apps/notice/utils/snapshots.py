@@ -0,0 +1,144 @@
+"""
+Notification snapshot
+------------------------
+Notification save uuid and excerpt of the content it point to, so
+list read only notification table. Content given as;
+
+    {(content_type_id, content_id): (uuid, excerpt)}
+
+get_contents() build it from loaded instance, load_contents() from
+database with one query each content type.
+"""
+from django.contrib.contenttypes.models import ContentType
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from .groups import get_group_key
+
+Notification = get_model('notice', 'Notification')
+NotificationActor = get_model('notice', 'NotificationActor')
+NotificationRecipient = get_model('notice', 'NotificationRecipient')
+
+EXCERPT_LENGTH = 100
+
+# Field used as excerpt each model
+EXCERPT_FIELDS = {
+    'comment': 'description',
+    'protest': 'label',
+    'media': 'label',
+}
+
+# Generic relation in notification, first two has excerpt
+SNAPSHOT_RELATIONS = (
+    'content', 'content_notified', 'content_source', 'content_parent')
+
+
+def get_excerpt(text):
+    return text[:EXCERPT_LENGTH] if text else None
+
+
+def get_contents(instances):
+    contents = dict()
+    for instance in instances:
+        if instance is None:
+            continue
+
+        content_type = ContentType.objects.get_for_model(instance)
+        field = EXCERPT_FIELDS.get(content_type.model, None)
+        excerpt = get_excerpt(getattr(instance, field)) if field else None
+        contents[(content_type.pk, instance.pk)] = (
+            getattr(instance, 'uuid', None), excerpt)
+    return contents
+
+
+def load_contents(notifications):
+    """Content of all relation, one query each content type"""
+    ids = dict()
+    for notification in notifications:
+        for relation in SNAPSHOT_RELATIONS:
+            content_type_id = getattr(notification, '%s_type_id' % relation)
+            content_id = getattr(notification, '%s_id' % relation)
+            if content_type_id and content_id:
+                ids.setdefault(content_type_id, set()).add(content_id)
+
+    contents = dict()
+    for content_type_id, content_ids in ids.items():
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        model = content_type.model_class()
+        field = EXCERPT_FIELDS.get(content_type.model, None)
+        if model is None or not hasattr(model, 'uuid'):
+            continue
+
+        values = ['pk', 'uuid'] + ([field] if field else [])
+        for row in model.objects.filter(pk__in=content_ids).values_list(*values):
+            contents[(content_type_id, row[0])] = (
+                row[1], get_excerpt(row[2]) if field else None)
+    return contents
+
+
+def fill_snapshot(notification, contents, actor_username=None,
+                  recipient_id=None):
+    """Set snapshot field, not saved"""
+    for relation in SNAPSHOT_RELATIONS:
+        key = (getattr(notification, '%s_type_id' % relation),
+               getattr(notification, '%s_id' % relation))
+        uuid, excerpt = contents.get(key, (None, None))
+        setattr(notification, '%s_uuid' % relation, uuid)
+
+        if relation in ('content', 'content_notified'):
+            setattr(notification, '%s_excerpt' % relation, excerpt)
+
+    notification.actor_username = actor_username
+    notification.recipient_id = recipient_id
+    notification.group_key = get_group_key(notification)
+    return notification
+
+
+def refresh_excerpt(instance):
+    """Content edited, update excerpt of notification point to it"""
+    content_type = ContentType.objects.get_for_model(instance)
+    field = EXCERPT_FIELDS.get(content_type.model, None)
+    if not field:
+        return None
+
+    excerpt = get_excerpt(getattr(instance, field))
+    Notification.objects \
+        .filter(content_id=instance.pk, content_type=content_type) \
+        .exclude(content_excerpt=excerpt) \
+        .update(content_excerpt=excerpt)
+
+    Notification.objects \
+        .filter(content_notified_id=instance.pk,
+                content_notified_type=content_type) \
+        .exclude(content_notified_excerpt=excerpt) \
+        .update(content_notified_excerpt=excerpt)
+
+
+def backfill_chunk(start, end):
+    """Fill snapshot of notification start <= pk < end, return count"""
+    notifications = list(Notification.objects.filter(pk__gte=start, pk__lt=end))
+    if not notifications:
+        return 0
+
+    ids = [notification.pk for notification in notifications]
+    contents = load_contents(notifications)
+    actors = dict(NotificationActor.objects
+                  .filter(notification_id__in=ids)
+                  .values_list('notification_id', 'actor__user__username'))
+    recipients = dict(NotificationRecipient.objects
+                      .filter(notification_id__in=ids)
+                      .values_list('notification_id', 'recipient_id'))
+
+    for notification in notifications:
+        fill_snapshot(
+            notification, contents,
+            actor_username=actors.get(notification.pk, None),
+            recipient_id=recipients.get(notification.pk, None))
+
+    fields = ['recipient', 'actor_username', 'group_key'] + \
+        ['%s_uuid' % relation for relation in SNAPSHOT_RELATIONS] + \
+        ['content_excerpt', 'content_notified_excerpt']
+    Notification.objects.bulk_update(notifications, fields)
+    return len(notifications)
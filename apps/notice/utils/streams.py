@@ -0,0 +1,154 @@
+"""
+Live notification
+------------------------
+Notification published to channel `notice:<person_id>` after
+commit, stream_events() and wait_notifications() of that person
+receive it from utils.pubsub. Idle stream hold no database
+connection, only a queue.
+
+Reconnect with last notification uuid (SSE Last-Event-ID or poll
+`since`) read the missed ones from database once.
+"""
+import json
+import time
+import queue
+
+from django.conf import settings
+from django.db import connection, transaction
+
+# PROJECT UTILS
+from utils.validators import get_model
+from utils.pubsub import publish, subscribe
+from utils.metrics import register, increment
+
+Notification = get_model('notice', 'Notification')
+
+MISSED_LIMIT = 50
+
+STREAM_CONNECTIONS = register(
+    'notification_stream_connections', 'gauge',
+    'Open notification stream and long poll')
+FANOUT_MESSAGES = register(
+    'notification_fanout_total', 'counter',
+    'Notification sent to stream client')
+FANOUT_MILLISECONDS = register(
+    'notification_fanout_milliseconds_total', 'counter',
+    'Publish to client write time, divide by notification_fanout_total')
+
+
+def get_channel(person_id):
+    return 'notice:%s' % person_id
+
+
+def serialize(notification):
+    # Not at module level, serializer import the models
+    from ..api.notification.serializers import NotificationSerializer
+    return NotificationSerializer(notification).data
+
+
+def publish_notifications(notifications):
+    """Send to recipient stream after commit"""
+    messages = [(get_channel(notification.recipient_id),
+                 serialize(notification))
+                for notification in notifications
+                if notification.recipient_id]
+
+    def send():
+        published = time.time()
+        for channel, data in messages:
+            publish(channel, {'data': data, 'published': published})
+
+    if messages:
+        transaction.on_commit(send)
+
+
+def get_missed(person, since=None):
+    """Notification after `since` uuid, oldest first"""
+    if not since:
+        return list()
+
+    last = Notification.objects \
+        .filter(recipient=person, uuid=since) \
+        .values_list('date_created', flat=True) \
+        .first()
+    if not last:
+        return list()
+
+    return [serialize(notification) for notification in Notification.objects
+            .filter(recipient=person, date_created__gt=last)
+            .order_by('date_created')[:MISSED_LIMIT]]
+
+
+def record_fanout(message):
+    delay = max(time.time() - message['published'], 0)
+    increment(FANOUT_MESSAGES)
+    increment(FANOUT_MILLISECONDS, int(delay * 1000))
+    return message['data']
+
+
+def release_connection():
+    """Waiting not hold database connection"""
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def format_event(data):
+    return 'id: %s\nevent: notification\ndata: %s\n\n' % (
+        data['uuid'], json.dumps(data))
+
+
+def stream_events(person, since=None):
+    """
+    Server-sent events, closed after NOTIFICATION_STREAM_DURATION
+    ------------------------
+    Browser EventSource reconnect with Last-Event-ID by itself
+    """
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    duration = getattr(settings, 'NOTIFICATION_STREAM_DURATION', 300)
+    until = time.monotonic() + duration
+
+    increment(STREAM_CONNECTIONS)
+    try:
+        # Subscribe first, so nothing lost between read and wait
+        with subscribe(get_channel(person.pk)) as messages:
+            yield 'retry: 3000\n\n'
+            for data in get_missed(person, since):
+                yield format_event(data)
+            release_connection()
+
+            while time.monotonic() < until:
+                try:
+                    message = messages.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Keep proxy from closing idle connection
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(record_fanout(message))
+    finally:
+        increment(STREAM_CONNECTIONS, -1)
+
+
+def wait_notifications(person, since=None, timeout=None):
+    """Long poll, return when any notification or timeout"""
+    if timeout is None:
+        timeout = getattr(settings, 'NOTIFICATION_POLL_TIMEOUT', 25)
+
+    increment(STREAM_CONNECTIONS)
+    try:
+        with subscribe(get_channel(person.pk)) as messages:
+            results = get_missed(person, since)
+            if results:
+                return results
+            release_connection()
+
+            try:
+                results.append(record_fanout(messages.get(timeout=timeout)))
+            except queue.Empty:
+                return results
+
+            # Others arrived together
+            while not messages.empty():
+                results.append(record_fanout(messages.get_nowait()))
+            return results
+    finally:
+        increment(STREAM_CONNECTIONS, -1)
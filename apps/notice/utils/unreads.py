@@ -0,0 +1,113 @@
+"""
+Unread notification counter
+------------------------
+Person.unread_notification_count changed with relative UPDATE in
+the same transaction as the notification, so both commit or roll
+back together. Read served from cache, key deleted after commit.
+
+    add_unread({person_id: 1})
+    mark_read(person, uuids=[...])
+"""
+import collections
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+Person = get_model('person', 'Person')
+Notification = get_model('notice', 'Notification')
+
+UNREAD_CACHE_PREFIX = 'notice:unread'
+UNREAD_CACHE_TIMEOUT = 60 * 60
+
+
+def get_unread_key(person_id):
+    return '%s:%s' % (UNREAD_CACHE_PREFIX, person_id)
+
+
+def get_unread_count(person, cached=True):
+    """Use cached=False inside transaction changed the counter"""
+    if not person:
+        return 0
+
+    key = get_unread_key(person.pk)
+    count = cache.get(key) if cached else None
+    if count is None:
+        count = Person.objects \
+            .filter(pk=person.pk) \
+            .values_list('unread_notification_count', flat=True) \
+            .first() or 0
+        if cached:
+            cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def add_unread(counts):
+    """{person_id: delta}, one UPDATE each person"""
+    keys = list()
+    for person_id, delta in counts.items():
+        if not person_id or not delta:
+            continue
+
+        Person.objects.filter(pk=person_id).update(
+            unread_notification_count=Greatest(
+                F('unread_notification_count') + Value(delta), Value(0)))
+        keys.append(get_unread_key(person_id))
+
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_recipient_counts(queryset, sign=1):
+    """Lock rows and count by recipient, return (ids, counts)"""
+    rows = list(queryset
+                .select_for_update()
+                .values_list('pk', 'notify_recipient_object__recipient'))
+
+    counts = collections.Counter()
+    for pk, recipient_id in rows:
+        if recipient_id:
+            counts[recipient_id] += sign
+    return {pk for pk, recipient_id in rows}, counts
+
+
+@transaction.atomic
+def set_unread(queryset, unread):
+    """Mark notification in queryset read or unread, any recipient"""
+    ids, counts = get_recipient_counts(
+        queryset.filter(unread=not unread), 1 if unread else -1)
+    if not ids:
+        return 0
+
+    Notification.objects.filter(pk__in=ids).update(unread=unread)
+    add_unread(counts)
+    return len(ids)
+
+
+@transaction.atomic
+def mark_read(person, uuids=None):
+    """
+    Mark unread notification of person as read
+    ------------------------
+    All or only the uuids, one UPDATE, return count of changed
+    """
+    queryset = Notification.objects.filter(
+        notify_recipient_object__recipient=person, unread=True)
+    if uuids is not None:
+        queryset = queryset.filter(uuid__in=uuids)
+
+    count = queryset.update(unread=False)
+    add_unread({person.pk: -count})
+    return count
+
+
+@transaction.atomic
+def delete_notifications(queryset):
+    """Delete and decrease counter of the unread"""
+    ids, counts = get_recipient_counts(queryset.filter(unread=True), -1)
+    queryset.delete()
+    add_unread(counts)
@@ -1,5 +1,6 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import (
+    pre_save, post_save, post_delete, post_init, m2m_changed)
 
 
 class PersonConfig(AppConfig):
@@ -9,8 +10,13 @@ class PersonConfig(AppConfig):
         from django.contrib.auth import get_user_model
         from apps.person.signals import (
             person_handler, attribute_handler, person_roles_handler,
-            user_handler)
+            user_handler, attribute_schema_handler,
+            validation_schema_handler, validation_value_handler)
         from utils.validators import get_model
+        from utils.images import image_init_handler, image_handler
+        from utils.blobs import (
+            blob_handler, blob_init_handler, blob_reference_handler,
+            blob_delete_handler)
 
         UserModel = get_user_model()
         post_save.connect(
@@ -36,3 +42,77 @@ class PersonConfig(AppConfig):
             post_save.connect(
                 attribute_handler, sender=Attribute,
                 dispatch_uid='person_attribute_signal')
+
+            m2m_changed.connect(
+                attribute_schema_handler, sender=Attribute.content_type.through,
+                dispatch_uid='person_attribute_content_type_schema_signal')
+
+            m2m_changed.connect(
+                attribute_schema_handler, sender=Attribute.roles.through,
+                dispatch_uid='person_attribute_roles_schema_signal')
+
+        # Reload attribute registry
+        for model_name in ('Attribute', 'AttributeOptionGroup',
+                           'AttributeOption'):
+            try:
+                model = get_model('person', model_name)
+            except LookupError:
+                continue
+
+            post_save.connect(
+                attribute_schema_handler, sender=model,
+                dispatch_uid='person_%s_schema_signal' % model_name.lower())
+
+            post_delete.connect(
+                attribute_schema_handler, sender=model,
+                dispatch_uid='person_%s_schema_delete_signal' % model_name.lower())
+
+        # Cached validation passed state, see utils/auths.py
+        for model_name, handler in (
+                ('Validation', validation_schema_handler),
+                ('ValidationValue', validation_value_handler)):
+            try:
+                model = get_model('person', model_name)
+            except LookupError:
+                continue
+
+            post_save.connect(
+                handler, sender=model,
+                dispatch_uid='person_%s_cache_signal' % model_name.lower())
+
+            post_delete.connect(
+                handler, sender=model,
+                dispatch_uid='person_%s_cache_delete_signal' % model_name.lower())
+
+        # Image derivatives, see utils/images.py
+        try:
+            AttributeValue = get_model('person', 'AttributeValue')
+        except LookupError:
+            AttributeValue = None
+
+        if AttributeValue:
+            post_init.connect(
+                image_init_handler, sender=AttributeValue,
+                dispatch_uid='person_attributevalue_image_init_signal')
+
+            post_save.connect(
+                image_handler, sender=AttributeValue,
+                dispatch_uid='person_attributevalue_image_signal')
+
+        # Content addressed file, see utils/blobs.py
+        if AttributeValue:
+            pre_save.connect(
+                blob_handler, sender=AttributeValue,
+                dispatch_uid='person_attributevalue_blob_signal')
+
+            post_init.connect(
+                blob_init_handler, sender=AttributeValue,
+                dispatch_uid='person_attributevalue_blob_init_signal')
+
+            post_save.connect(
+                blob_reference_handler, sender=AttributeValue,
+                dispatch_uid='person_attributevalue_blob_reference_signal')
+
+            post_delete.connect(
+                blob_delete_handler, sender=AttributeValue,
+                dispatch_uid='person_attributevalue_blob_delete_signal')
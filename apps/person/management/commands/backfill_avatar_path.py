@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Min, Max
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.attributes import AVATAR_IDENTIFIER
+
+Person = get_model('person', 'Person')
+AttributeValue = get_model('person', 'AttributeValue')
+
+
+class Command(BaseCommand):
+    help = 'Fill person avatar_path from the avatar attribute value'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Person primary key range per transaction')
+
+    def backfill_chunk(self, start, end, person_type):
+        avatars = dict(AttributeValue.objects
+                       .filter(attribute__identifier=AVATAR_IDENTIFIER,
+                               content_type=person_type,
+                               object_id__gte=start, object_id__lt=end)
+                       .order_by('date_updated')
+                       .values_list('object_id', 'value_image'))
+
+        persons = list(Person.objects
+                       .filter(pk__gte=start, pk__lt=end)
+                       .only('pk', 'avatar_path'))
+        changed = list()
+        for person in persons:
+            path = avatars.get(person.pk, None) or ''
+            if person.avatar_path != path:
+                person.avatar_path = path
+                changed.append(person)
+
+        Person.objects.bulk_update(changed, ['avatar_path'])
+        return len(changed)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        person_type = ContentType.objects.get_for_model(Person)
+        bounds = Person.objects.aggregate(start=Min('pk'), end=Max('pk'))
+        total = 0
+
+        if bounds['start'] is not None:
+            for start in range(bounds['start'], bounds['end'] + 1, chunk_size):
+                with transaction.atomic():
+                    total += self.backfill_chunk(
+                        start, start + chunk_size, person_type)
+
+        self.stdout.write(self.style.SUCCESS(
+            '%s person avatar updated.' % total))
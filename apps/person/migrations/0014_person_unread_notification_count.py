@@ -0,0 +1,37 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_notification_count(apps, schema_editor):
+    """Fill counter from existing unread notifications"""
+    Person = apps.get_model('person', 'Person')
+    NotificationRecipient = apps.get_model('notice', 'NotificationRecipient')
+
+    counts = NotificationRecipient.objects \
+        .filter(notification__unread=True) \
+        .values('recipient') \
+        .annotate(count=Count('id'))
+
+    for item in counts.iterator():
+        Person.objects.filter(pk=item['recipient']) \
+            .update(unread_notification_count=item['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('person', '0013_auto_20191106_0844'),
+        ('notice', '0009_auto_20191030_1551'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_unread_notification_count, migrations.RunPython.noop),
+    ]
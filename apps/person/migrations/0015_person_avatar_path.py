@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('person', '0014_person_unread_notification_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='avatar_path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
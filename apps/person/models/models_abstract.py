@@ -59,6 +59,14 @@ class AbstractPerson(models.Model):
     options = models.ManyToManyField(
         'person.Option', blank=True, verbose_name=_("Options"))
 
+    # Maintained by apps.notice.utils.unreads
+    unread_notification_count = models.PositiveIntegerField(
+        editable=False, default=0)
+
+    # Image of `avatar` attribute, maintained by utils.attributes
+    avatar_path = models.CharField(
+        max_length=255, blank=True, default='', editable=False)
+
     class Meta:
         abstract = True
         app_label = 'person'
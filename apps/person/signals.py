@@ -6,14 +6,17 @@ from django.db.models import Q
 
 # LOCAL UTILS
 from .utils.attributes import (
+    registry,
     set_attributes,
     update_attribute_values
 )
+from .utils.auths import invalidate_validation
 
 # PROJECT UTILS
 from utils.validators import get_model
 
 UserModel = get_user_model()
+Person = get_model('person', 'Person')
 AttributeValue = get_model('person', 'AttributeValue')
 Validation = get_model('person', 'Validation')
 ValidationValue = get_model('person', 'ValidationValue')
@@ -111,6 +114,23 @@ def attribute_handler(sender, instance, created, **kwargs):
                     pass
 
 
+def attribute_schema_handler(sender, **kwargs):
+    """Attribute or option changed, reload registry"""
+    registry.invalidate()
+
+
+def validation_schema_handler(sender, **kwargs):
+    """Required validation changed, all person checked again"""
+    invalidate_validation()
+
+
+def validation_value_handler(sender, instance, **kwargs):
+    """Value of a person changed, only that person checked again"""
+    content_type = ContentType.objects.get_for_model(Person)
+    if instance.content_type_id == content_type.pk and instance.object_id:
+        invalidate_validation(instance.object_id)
+
+
 def person_roles_handler(sender, **kwargs):
     instance = kwargs['instance']
     set_attributes(instance)
@@ -1,3 +1,136 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import override_settings
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.contrib.contenttypes.models import ContentType
+
+from rest_framework.test import APITransactionTestCase
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from .utils import auths
+from .utils.auths import check_validation_passed
+from .utils.attributes import upload_image
+from ..escort.utils.testcases import FixtureMixin
+
+Person = get_model('person', 'Person')
+Attribute = get_model('person', 'Attribute')
+AttributeValue = get_model('person', 'AttributeValue')
+Validation = get_model('person', 'Validation')
+ValidationValue = get_model('person', 'ValidationValue')
+
+
+class ValidationPassedTest(FixtureMixin, APITransactionTestCase):
+    """Validation passed state cached until validation changed"""
+
+    def setUp(self):
+        cache.clear()
+        self.person = self.create_person('validation')
+        self.request = SimpleNamespace(user=self.person.user)
+        self.email = Validation.objects.create(
+            label='Email', identifier='email', field_type='email',
+            required=True)
+
+    def check(self):
+        with CaptureQueriesContext(connection) as context:
+            passed = check_validation_passed(None, request=self.request)
+        tables = [query['sql'] for query in context.captured_queries
+                  if 'person_validation' in query['sql']]
+        return passed, len(tables)
+
+    def test_cached(self):
+        self.assertEqual(self.check(), (False, 2))
+        self.assertEqual(self.check(), (False, 0))
+
+        # Value verified, only this person checked again
+        value = ValidationValue.objects.create(
+            validation=self.email, verified=True, value_email='a@b.com',
+            content_type=ContentType.objects.get_for_model(Person),
+            object_id=self.person.pk)
+        self.assertEqual(self.check(), (True, 2))
+        self.assertEqual(self.check(), (True, 0))
+
+        # New required validation, all person checked again
+        phone = Validation.objects.create(
+            label='Phone', identifier='phone', field_type='text',
+            required=True)
+        self.assertEqual(self.check(), (False, 2))
+
+        phone.delete()
+        self.assertEqual(self.check(), (True, 2))
+
+        value.delete()
+        self.assertEqual(self.check(), (False, 2))
+
+    def test_changed_while_computing(self):
+        compute = auths.compute_validation_passed
+
+        def compute_then_verify(person):
+            passed = compute(person)
+            # Other request verify the value before this one cache it
+            ValidationValue.objects.create(
+                validation=self.email, verified=True,
+                value_email='a@b.com',
+                content_type=ContentType.objects.get_for_model(Person),
+                object_id=person.pk)
+            return passed
+
+        with mock.patch.object(
+                auths, 'compute_validation_passed', compute_then_verify):
+            self.assertFalse(
+                check_validation_passed(None, request=self.request))
+
+        # Stale state saved after the change, not used
+        self.assertEqual(self.check(), (True, 2))
+
+
+@override_settings(IMAGE_DERIVATIVES={}, BLOB_STORAGE=False)
+class AvatarPathTest(FixtureMixin, APITransactionTestCase):
+    """Person avatar_path follow the avatar image value"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.person = self.create_person('avatar')
+        person_type = ContentType.objects.get_for_model(Person)
+        self.attribute = Attribute.objects.create(
+            label='Avatar', identifier='avatar', field_type='image')
+        self.attribute.content_type.add(person_type)
+        self.value = AttributeValue.objects.create(
+            attribute=self.attribute, content_type=person_type,
+            object_id=self.person.pk)
+
+    def get_path(self):
+        return Person.objects.values_list('avatar_path', flat=True) \
+            .get(pk=self.person.pk)
+
+    def test_upload_and_clear(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            upload_image({'instance': self.value, 'value': [
+                SimpleUploadedFile('me.jpg', b'image')]})
+            self.assertEqual(self.get_path(), self.value.value_image.name)
+            self.assertTrue(self.get_path().endswith('me.jpg'))
+
+            upload_image({'instance': self.value, 'value': None})
+            self.assertEqual(self.get_path(), '')
+
+    def test_backfill(self):
+        AttributeValue.objects.filter(pk=self.value.pk) \
+            .update(value_image='images/person/me.jpg')
+
+        out = StringIO()
+        call_command('backfill_avatar_path', chunk_size=1, stdout=out)
+        self.assertIn('1 person avatar updated.', out.getvalue())
+        self.assertEqual(self.get_path(), 'images/person/me.jpg')
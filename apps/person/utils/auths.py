@@ -1,9 +1,10 @@
 import uuid
-import asyncio
 import urllib
 import json
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
@@ -18,6 +19,7 @@ from django.utils.translation import ugettext_lazy as _
 
 # PROJECT UTILS
 from utils.validators import get_model
+from utils.executors import run_in_background
 
 from .senders import (
     send_verification_email,
@@ -29,11 +31,65 @@ from .senders import (
 Validation = get_model('person', 'Validation')
 ValidationValue = get_model('person', 'ValidationValue')
 UserModel = get_user_model()
-loop = asyncio.new_event_loop()
-asyncio.set_event_loop(loop)
+
+VALIDATION_CACHE_PREFIX = 'person:validation'
+VALIDATION_VERSION_KEY = '%s:version' % VALIDATION_CACHE_PREFIX
+VALIDATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_validation_key(person_id):
+    return '%s:%s' % (VALIDATION_CACHE_PREFIX, person_id)
+
+
+def get_person_version_key(person_id):
+    return '%s:%s:version' % (VALIDATION_CACHE_PREFIX, person_id)
+
+
+def get_version(key, values, timeout=None):
+    """Version read by get_many, created if missing"""
+    version = values.get(key, None)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_validation(person_id=None):
+    """
+    After commit drop passed state of person, or all person
+    ------------------------
+    By new version, not delete; state computed from before the
+    change but saved after it keep the old version, so ignored
+    """
+    if person_id:
+        key = get_person_version_key(person_id)
+        transaction.on_commit(lambda: cache.set(
+            key, uuid.uuid4().hex, VALIDATION_CACHE_TIMEOUT))
+    else:
+        transaction.on_commit(lambda: cache.set(
+            VALIDATION_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def compute_validation_passed(person):
+    required = Validation.objects.filter(required=True).count()
+    if not required:
+        return True
+
+    content_type = ContentType.objects.get_for_model(person)
+    passed = ValidationValue.objects.filter(
+        Q(validation__required=True),
+        Q(verified=True),
+        Q(content_type=content_type.pk),
+        Q(object_id=person.pk)).count()
+
+    # Compare validation type with the value
+    # If value same indicated all validation passed
+    return required == passed
 
 
 def check_validation_passed(self, *agrs, **kwargs):
+    """Cached each person, validation table only read on miss"""
     request = kwargs.get('request', None)
     if not request:
         return False
@@ -42,21 +98,22 @@ def check_validation_passed(self, *agrs, **kwargs):
     if not person:
         return False
 
-    content_type = ContentType.objects.get_for_model(person)
-    validation_type = Validation.objects.filter(required=True)
+    key = get_validation_key(person.pk)
+    person_version_key = get_person_version_key(person.pk)
+    values = cache.get_many([VALIDATION_VERSION_KEY, person_version_key, key])
 
-    if not validation_type.exists():
-        return True
+    # Both read before compute
+    version = (get_version(VALIDATION_VERSION_KEY, values),
+               get_version(person_version_key, values,
+                           VALIDATION_CACHE_TIMEOUT))
 
-    validation_value = ValidationValue.objects.filter(
-        Q(validation__required=True),
-        Q(verified=True),
-        Q(content_type=content_type.pk),
-        Q(object_id=person.pk))
+    cached = values.get(key, None)
+    if cached and cached[0] == version:
+        return cached[1]
 
-    # Compare validation type with the value
-    # If value same indicated all validation passed
-    return validation_type.count() == validation_value.count()
+    passed = compute_validation_passed(person)
+    cache.set(key, (version, passed), VALIDATION_CACHE_TIMEOUT)
+    return passed
 
 
 class TokenGenerator(PasswordResetTokenGenerator):
@@ -247,11 +304,13 @@ def send_secure_code(self, *args, **kwargs):
 
         # Send with email
         if method == 1:
-            loop.run_in_executor(None, send_verification_email, params)
+            run_in_background(
+                send_verification_email, params, on_commit=True)
 
         # Send with SMS
         if method == 2:
-            loop.run_in_executor(None, send_verification_sms, params)
+            run_in_background(
+                send_verification_sms, params, on_commit=True)
 
         return secure_data
     return None
@@ -1,4 +1,3 @@
-import asyncio
 import uuid
 
 from django.conf import settings
@@ -8,12 +7,11 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
 
 from utils.validators import get_model
+from utils.executors import run_in_background
 
 Validation = get_model('person', 'Validation')
 ValidationValue = get_model('person', 'ValidationValue')
 
-loop = asyncio.get_event_loop()
-
 
 def upload_image(args):
     """ Upload as image """
@@ -243,10 +241,10 @@ def update_validation_values(entity, *agrs, **kwargs):
 
                 if attr_type == 'file':
                     # Upload file
-                    loop.run_in_executor(None, upload_file, arguments)
+                    run_in_background(upload_file, arguments, on_commit=True)
                 elif attr_type == 'image':
                     # Upload image
-                    loop.run_in_executor(None, upload_image, arguments)
+                    run_in_background(upload_image, arguments, on_commit=True)
                 else:
                     # Set the value
                     setattr(attr_obj, model_field, value)
@@ -0,0 +1,19 @@
+from django.urls import path, include
+
+# THIRD PARTY
+from rest_framework.routers import SimpleRouter
+
+# LOAD API VIEW
+from .search.views import SearchApiView
+
+# Create a router and register our viewsets with it.
+# SimpleRouter, the list itself is the root: /api/search/
+router = SimpleRouter()
+router.register('', SearchApiView, basename='search')
+
+app_name = 'search'
+
+# The API URLs are now determined automatically by the router.
+urlpatterns = [
+    path('', include((router.urls, 'search'), namespace='searches')),
+]
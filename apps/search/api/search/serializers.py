@@ -0,0 +1,37 @@
+# THIRD PARTY
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.constant import SEARCH_SOURCES
+from ...utils.indexes import get_source
+
+SearchDocument = get_model('search', 'SearchDocument')
+
+
+class SearchDocumentSerializer(serializers.ModelSerializer):
+    """Search result, point to the source object"""
+    type = serializers.SerializerMethodField()
+    uuid = serializers.UUIDField(source='object_uuid')
+    url = serializers.SerializerMethodField()
+    rank = serializers.IntegerField()
+
+    class Meta:
+        model = SearchDocument
+        fields = ['type', 'uuid', 'url', 'label', 'excerpt', 'rank',
+                  'date_updated']
+
+    def get_type(self, obj):
+        return get_source(obj.content_type)
+
+    def get_url(self, obj):
+        request = self.context['request']
+        source = get_source(obj.content_type)
+        if source is None:
+            return None
+
+        return reverse(SEARCH_SOURCES[source]['view_name'],
+                       kwargs={'uuid': obj.object_uuid}, request=request)
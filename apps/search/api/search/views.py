@@ -0,0 +1,62 @@
+from django.utils.translation import ugettext_lazy as _
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+# THIRD PARTY
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework import status as response_status, viewsets
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+
+# SERIALIZERS
+from .serializers import SearchDocumentSerializer
+
+# LOCAL UTILS
+from ...utils.constant import SEARCH_SOURCES
+from ...utils.indexes import search_documents
+
+# Define to avoid used ...().paginate__
+PAGINATOR = PageNumberPagination()
+
+
+@method_decorator(ensure_csrf_cookie, name='dispatch')
+class SearchApiView(viewsets.ViewSet):
+    """
+    Search published media, protest and article
+    Parameters is;
+    ----------------------
+    term    = the keyword, last word matched as prefix
+    type    = comma separated; media,protest,article
+    """
+    permission_classes = (AllowAny,)
+
+    # Return a response
+    def get_response(self, serializer, serializer_parent=None, *args, **kwargs):
+        """ Output to endpoint """
+        response = dict()
+        response['count'] = PAGINATOR.page.paginator.count
+        response['navigate'] = {
+            'previous': PAGINATOR.get_previous_link(),
+            'next': PAGINATOR.get_next_link()
+        }
+        response['results'] = serializer.data
+        return Response(response, status=response_status.HTTP_200_OK)
+
+    def list(self, request, format=None):
+        context = {'request': self.request}
+        params = request.query_params
+        term = params.get('term', '')
+        sources = params.get('type', None)
+
+        if sources:
+            sources = sources.split(',')
+            for source in sources:
+                if source not in SEARCH_SOURCES:
+                    raise NotFound(detail=_("Tipe tidak tersedia."))
+
+        queryset = search_documents(term, sources=sources)
+        queryset_paginator = PAGINATOR.paginate_queryset(queryset, request)
+        serializer = SearchDocumentSerializer(
+            queryset_paginator, many=True, context=context)
+        return self.get_response(serializer)
@@ -0,0 +1,29 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
+
+
+class SearchConfig(AppConfig):
+    name = 'apps.search'
+
+    def ready(self):
+        from apps.search.signals import index_handler, index_delete_handler
+        from apps.search.utils.constant import SEARCH_SOURCES
+        from utils.validators import get_model
+
+        # Index every searchable model
+        # Indexed in background after commit, so attribute values from
+        # media_handler and update_attribute_values already saved
+        for source in SEARCH_SOURCES:
+            try:
+                Model = get_model(*SEARCH_SOURCES[source]['model'])
+            except LookupError:
+                Model = None
+
+            if Model:
+                post_save.connect(
+                    index_handler, sender=Model,
+                    dispatch_uid='search_index_%s_signal' % source)
+
+                post_delete.connect(
+                    index_delete_handler, sender=Model,
+                    dispatch_uid='search_index_delete_%s_signal' % source)
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from ...utils.constant import SEARCH_SOURCES, SEARCH_PUBLISHED
+from ...utils.indexes import get_source_model, index_objects
+
+SearchDocument = get_model('search', 'SearchDocument')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search index for media, protest and article'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', dest='sources', action='append',
+            choices=list(SEARCH_SOURCES),
+            help='Only rebuild this type, can repeated')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Objects indexed per batch')
+
+    def index_chunk(self, chunk):
+        with transaction.atomic():
+            index_objects(chunk)
+
+    def handle(self, *args, **options):
+        sources = options['sources'] or list(SEARCH_SOURCES)
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        for source in sources:
+            Model = get_source_model(source)
+            total = 0
+
+            # Document refreshed in place, search keep working while
+            # rebuilding. Each chunk commit on its own so no long
+            # transaction lock the table
+            started = timezone.now()
+            queryset = Model.objects \
+                .filter(status=SEARCH_PUBLISHED) \
+                .order_by('pk')
+
+            chunk = list()
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                chunk.append(obj)
+                if len(chunk) >= chunk_size:
+                    self.index_chunk(chunk)
+                    total += len(chunk)
+                    chunk = list()
+
+            if chunk:
+                self.index_chunk(chunk)
+                total += len(chunk)
+
+            # Not refreshed, object deleted or unpublished
+            SearchDocument.objects \
+                .filter(content_type__app_label=Model._meta.app_label,
+                        content_type__model=Model._meta.model_name,
+                        date_updated__lt=started) \
+                .delete()
+
+            self.stdout.write(self.style.SUCCESS(
+                'Indexed %s %s.' % (total, source)))
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_uuid', models.UUIDField(editable=False)),
+                ('label', models.CharField(max_length=255)),
+                ('excerpt', models.TextField(blank=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('object_id', models.PositiveIntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'db_table': 'search_document',
+                'ordering': ['-date_updated'],
+                'abstract': False,
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='search.SearchDocument')),
+            ],
+            options={
+                'verbose_name': 'Search Term',
+                'verbose_name_plural': 'Search Terms',
+                'db_table': 'search_term',
+                'abstract': False,
+                'unique_together': {('document', 'term')},
+            },
+        ),
+    ]
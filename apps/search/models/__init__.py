@@ -0,0 +1,5 @@
+"""
+We organized models to separately
+Reference: ../2.2/topics/db/models/#organizing-models-in-a-package
+"""
+from .models import *
@@ -0,0 +1,26 @@
+from django.db import models
+
+from .models_abstract import *
+
+# Project UTILS
+from utils.validators import is_model_registered
+
+__all__ = list()
+
+
+# 0
+if not is_model_registered('search', 'SearchDocument'):
+    class SearchDocument(AbstractSearchDocument):
+        class Meta(AbstractSearchDocument.Meta):
+            db_table = 'search_document'
+
+    __all__.append('SearchDocument')
+
+
+# 1
+if not is_model_registered('search', 'SearchTerm'):
+    class SearchTerm(AbstractSearchTerm):
+        class Meta(AbstractSearchTerm.Meta):
+            db_table = 'search_term'
+
+    __all__.append('SearchTerm')
@@ -0,0 +1,56 @@
+from django.db import models
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.utils.translation import ugettext_lazy as _
+
+
+class AbstractSearchDocument(models.Model):
+    """
+    One row per indexed object (media, protest, article)
+    Hold what search result need, so result not touch source table
+    """
+    object_uuid = models.UUIDField(editable=False)
+    label = models.CharField(max_length=255)
+    excerpt = models.TextField(blank=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    # Generic relations
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE,
+        related_name='search_documents')
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    class Meta:
+        abstract = True
+        app_label = 'search'
+        unique_together = ['content_type', 'object_id']
+        ordering = ['-date_updated']
+        verbose_name = _('Search Document')
+        verbose_name_plural = _('Search Documents')
+
+    def __str__(self):
+        return self.label
+
+
+class AbstractSearchTerm(models.Model):
+    """
+    Inverted index, stemmed term point to the document
+    Weight is sum of field weight for each occurrence
+    """
+    document = models.ForeignKey(
+        'search.SearchDocument',
+        on_delete=models.CASCADE,
+        related_name='terms')
+    term = models.CharField(max_length=64, db_index=True)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+        app_label = 'search'
+        unique_together = ['document', 'term']
+        verbose_name = _('Search Term')
+        verbose_name_plural = _('Search Terms')
+
+    def __str__(self):
+        return self.term
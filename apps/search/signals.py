@@ -0,0 +1,22 @@
+# PROJECT UTILS
+from utils.executors import run_in_background
+
+# LOCAL UTILS
+from .utils.indexes import refresh_objects
+
+
+def index_handler(sender, instance, created, **kwargs):
+    """Refresh search document after saved"""
+    # Fixture loading, skip
+    if kwargs.get('raw', False):
+        return
+
+    # After commit, media description saved by update_attribute_values
+    # (bulk_update, no signal) after the media itself
+    run_in_background(refresh_objects, sender, [instance.pk], on_commit=True)
+
+
+def index_delete_handler(sender, instance, **kwargs):
+    """Signals for searchable object deleted"""
+    # Pk taken now, the instance lose it after delete
+    run_in_background(refresh_objects, sender, [instance.pk], on_commit=True)
@@ -0,0 +1,116 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+
+# THIRD PARTY
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# LOCAL UTILS
+from . import signals
+from .utils.indexes import refresh_objects
+from .utils.constant import SEARCH_PUBLISHED
+from .utils.stemmers import stem, tokenize
+from ..escort.utils.testcases import FixtureMixin
+
+Media = get_model('escort', 'Media')
+Attribute = get_model('escort', 'Attribute')
+Article = get_model('knowledgebase', 'Article')
+SearchDocument = get_model('search', 'SearchDocument')
+
+
+class StemmerTest(APITestCase):
+    def test_stem(self):
+        self.assertEqual(stem('membaca'), 'baca')
+        self.assertEqual(stem('menulis'), 'tulis')
+        self.assertEqual(stem('pemberitaan'), 'berita')
+        self.assertEqual(stem('beritanya'), 'berita')
+        self.assertEqual(stem('diberitakan'), 'berita')
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('<p>Berita &amp; fakta yang HOAKS</p>'),
+                         ['berita', 'fakta', 'hoaks'])
+
+
+class SearchTest(FixtureMixin, APITransactionTestCase):
+    """Index refreshed after commit"""
+    url = '/api/search/'
+
+    def setUp(self):
+        self.person = self.create_person('searcher')
+        self.media = self.create_media(
+            self.person, 'Kawal Berita', status=SEARCH_PUBLISHED)
+        self.protest = self.create_protest(
+            self.media, self.person, 'Pemberitaan tidak berimbang',
+            description='Media memberitakan hoaks pemilu',
+            status=SEARCH_PUBLISHED)
+        self.article = Article.objects.create(
+            label='Cara melapor', description='Langkah pelaporan hoaks',
+            status=SEARCH_PUBLISHED)
+
+    def search(self, term, **params):
+        params['term'] = term
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['uuid'] for item in response.json()['results']]
+
+    def test_ranked(self):
+        # Protest has `berita` in label and description
+        results = self.search('berita ')
+        self.assertEqual(results, [str(self.protest.uuid),
+                                   str(self.media.uuid)])
+
+    def test_prefix_and_type(self):
+        self.assertEqual(self.search('hoa', type='article'),
+                         [str(self.article.uuid)])
+        self.assertEqual(len(self.search('hoa')), 2)
+
+    def test_incremental(self):
+        self.protest.status = 6
+        self.protest.save()
+        self.assertEqual(self.search('pemilu'), [])
+
+        self.article.label = 'Cara melapor pemilu'
+        self.article.save()
+        self.assertEqual(self.search('pemilu'), [str(self.article.uuid)])
+
+        self.article.delete()
+        self.assertEqual(self.search('pemilu'), [])
+
+    def test_background(self):
+        # Indexed out of the request that saved it
+        with mock.patch.object(signals, 'run_in_background') as background:
+            self.article.save()
+        background.assert_called_once_with(
+            refresh_objects, Article, [self.article.pk], on_commit=True)
+
+    def test_media_description(self):
+        attribute = Attribute.objects.create(
+            label='Description', identifier='description',
+            field_type='richtext')
+        attribute.content_type.add(ContentType.objects.get_for_model(Media))
+
+        # Description saved after the media row
+        self.client.force_authenticate(self.person.user)
+        response = self.client.patch(
+            '/api/escort/medias/%s/' % self.media.uuid,
+            {'description': 'Jurnalisme warga'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('jurnalisme'), [str(self.media.uuid)])
+
+    def test_rebuild(self):
+        document = SearchDocument.objects.get(object_uuid=self.protest.uuid)
+
+        # Unpublished without signal, its document left
+        Article.objects.filter(pk=self.article.pk).update(status=6)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 2)
+
+        # Refreshed in place, not removed and created again
+        self.assertTrue(SearchDocument.objects.filter(
+            pk=document.pk, date_updated__gt=document.date_updated).exists())
+        self.assertEqual(self.search('pemilu'), [str(self.protest.uuid)])
@@ -0,0 +1,42 @@
+# SEARCH SOURCES
+# Model indexed by search, key used as `type` in result and filter
+SEARCH_SOURCES = {
+    'media': {
+        'model': ('escort', 'Media'),
+        'view_name': 'escorts:escort:media-detail',
+    },
+    'protest': {
+        'model': ('escort', 'Protest'),
+        'view_name': 'escorts:escort:protest-detail',
+    },
+    'article': {
+        'model': ('knowledgebase', 'Article'),
+        'view_name': 'knowledgebases:knowledgebase:article-detail',
+    },
+}
+
+# Only this status can be found, same value in escort and knowledgebase
+SEARCH_PUBLISHED = 3
+
+# FIELD WEIGHTS
+# Match in label rank higher than description
+LABEL_WEIGHT = 4
+DESCRIPTION_WEIGHT = 1
+
+# Term longer than this cut, must same with SearchTerm.term max_length
+TERM_MAX_LENGTH = 64
+EXCERPT_WORDS = 30
+
+# STOPWORDS
+# Common Indonesian words, not indexed
+STOPWORDS = frozenset([
+    'ada', 'adalah', 'agar', 'akan', 'aku', 'anda', 'antara', 'apa',
+    'atau', 'bagi', 'bahwa', 'banyak', 'belum', 'bila', 'bisa', 'dalam',
+    'dan', 'dari', 'dengan', 'di', 'dia', 'hal', 'hanya', 'hingga', 'ia',
+    'ini', 'itu', 'jadi', 'jika', 'juga', 'kami', 'kamu', 'karena', 'ke',
+    'kepada', 'ketika', 'kita', 'lagi', 'lain', 'lebih', 'maka', 'masih',
+    'mereka', 'namun', 'oleh', 'pada', 'para', 'saat', 'saja', 'sama',
+    'sampai', 'saya', 'se', 'sebagai', 'sedang', 'sehingga', 'sejak',
+    'seperti', 'serta', 'sudah', 'tapi', 'telah', 'tentang', 'terhadap',
+    'tersebut', 'tetapi', 'tidak', 'untuk', 'yaitu', 'yakni', 'yang',
+])
@@ -0,0 +1,223 @@
+from collections import defaultdict
+
+from django.db.models import Q, Sum, Count
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from django.utils.text import Truncator
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# ESCORT UTILS
+from ...escort.utils.attributes import load_attribute_values
+
+# LOCAL UTILS
+from .constant import (
+    SEARCH_SOURCES, SEARCH_PUBLISHED, STOPWORDS,
+    LABEL_WEIGHT, DESCRIPTION_WEIGHT, EXCERPT_WORDS, TERM_MAX_LENGTH)
+from .stemmers import plain_text, tokenize, stem
+
+SearchDocument = get_model('search', 'SearchDocument')
+SearchTerm = get_model('search', 'SearchTerm')
+
+# Prefix shorter than this too broad
+MIN_PREFIX_LENGTH = 2
+
+
+def get_source(model):
+    """Return SEARCH_SOURCES key from model or content type"""
+    if isinstance(model, ContentType):
+        natural_key = (model.app_label, model.model)
+    else:
+        natural_key = (model._meta.app_label, model._meta.model_name)
+
+    for source in SEARCH_SOURCES:
+        app_label, model_name = SEARCH_SOURCES[source]['model']
+        if (app_label, model_name.lower()) == natural_key:
+            return source
+    return None
+
+
+def get_source_model(source):
+    return get_model(*SEARCH_SOURCES[source]['model'])
+
+
+def build_terms(label, description):
+    """
+    Count weighted terms from label and description
+    Stem and original word both saved so prefix matching work
+    with half typed word, ex: `pemberit` find `pemberitaan`
+    """
+    terms = defaultdict(int)
+    for text, weight in ((label, LABEL_WEIGHT),
+                         (description, DESCRIPTION_WEIGHT)):
+        for word in tokenize(text):
+            stemmed = stem(word)
+            terms[stemmed] += weight
+
+            word = word[:TERM_MAX_LENGTH]
+            if word != stemmed:
+                terms[word] += weight
+    return terms
+
+
+def get_descriptions(source, instances):
+    """Description text for each instance pk"""
+    if source != 'media':
+        return {obj.pk: obj.description for obj in instances}
+
+    # Media description stored in attribute values
+    descriptions = dict()
+    values_map = load_attribute_values(
+        instances, identifiers=['description'])
+
+    for (content_type_id, object_id), values in values_map.items():
+        for value in values:
+            name = 'value_%s' % value.attribute.field_type
+            descriptions[object_id] = getattr(value, name, None)
+    return descriptions
+
+
+def index_objects(instances, *agrs, **kwargs):
+    """
+    Insert or refresh documents for instances from same model
+    Not published instance removed from index
+    """
+    if not instances:
+        return None
+
+    source = get_source(instances[0])
+    if source is None:
+        return None
+
+    published = [obj for obj in instances if obj.status == SEARCH_PUBLISHED]
+    unpublished = [obj for obj in instances if obj.status != SEARCH_PUBLISHED]
+
+    if unpublished:
+        remove_objects(unpublished)
+
+    if not published:
+        return None
+
+    content_type = ContentType.objects.get_for_model(published[0])
+    descriptions = get_descriptions(source, published)
+    documents = {document.object_id: document for document in
+                 SearchDocument.objects.filter(
+                     content_type=content_type,
+                     object_id__in=[obj.pk for obj in published])}
+
+    now = timezone.now()
+    creates, updates, terms_map = list(), list(), dict()
+    for obj in published:
+        description = plain_text(descriptions.get(obj.pk, None))
+        document = documents.get(obj.pk, None)
+        if document is None:
+            document = SearchDocument(
+                content_type=content_type, object_id=obj.pk)
+            creates.append(document)
+        else:
+            updates.append(document)
+
+        document.object_uuid = obj.uuid
+        document.label = obj.label
+        document.excerpt = Truncator(description).words(EXCERPT_WORDS)
+        document.date_updated = now
+        terms_map[obj.pk] = build_terms(obj.label, description)
+
+    if creates:
+        SearchDocument.objects.bulk_create(creates)
+
+    if updates:
+        SearchDocument.objects.bulk_update(
+            updates, ['object_uuid', 'label', 'excerpt', 'date_updated'])
+
+    # MySQL bulk_create not return pk, so read again
+    documents = SearchDocument.objects \
+        .filter(content_type=content_type, object_id__in=terms_map.keys()) \
+        .only('id', 'object_id')
+
+    # Replace all terms
+    SearchTerm.objects.filter(document__in=documents).delete()
+    terms_list = list()
+    for document in documents:
+        terms = terms_map[document.object_id]
+        for term in terms:
+            terms_list.append(SearchTerm(
+                document=document, term=term, weight=terms[term]))
+
+    return SearchTerm.objects.bulk_create(terms_list)
+
+
+def remove_objects(instances, *agrs, **kwargs):
+    """Delete documents and their terms"""
+    if not instances:
+        return None
+
+    content_type = ContentType.objects.get_for_model(instances[0])
+    return SearchDocument.objects \
+        .filter(content_type=content_type,
+                object_id__in=[obj.pk for obj in instances]) \
+        .delete()
+
+
+def refresh_objects(model, pks, *agrs, **kwargs):
+    """
+    Index rows as they are now, run in background
+    ------------------------
+    Read again by pk, so task run in any order index the last state;
+    row gone (deleted) removed from index
+    """
+    instances = list(model.objects.filter(pk__in=pks))
+    index_objects(instances)
+
+    missing = set(pks).difference(obj.pk for obj in instances)
+    if missing:
+        SearchDocument.objects \
+            .filter(content_type=ContentType.objects.get_for_model(model),
+                    object_id__in=missing) \
+            .delete()
+
+
+def search_documents(query, *agrs, **kwargs):
+    """
+    Ranked documents for query
+    ------------------------
+    - Every complete word matched by stem or the original word
+    - Last word matched as prefix, unless query end with space
+    - Ordered by total matched term, then weight
+    """
+    sources = kwargs.get('sources', None)
+    words = tokenize(query, stopwords=False)
+    if not words:
+        return SearchDocument.objects.none()
+
+    prefix = None
+    if not query[-1:].isspace():
+        prefix = words.pop()
+
+    exact = set()
+    for word in words:
+        if word not in STOPWORDS:
+            exact.update([stem(word), word[:TERM_MAX_LENGTH]])
+
+    q_term = Q(terms__term__in=exact) if exact else Q()
+    if prefix and len(prefix) >= MIN_PREFIX_LENGTH:
+        q_term |= Q(terms__term__startswith=prefix[:TERM_MAX_LENGTH])
+
+    if not q_term:
+        return SearchDocument.objects.none()
+
+    queryset = SearchDocument.objects \
+        .select_related('content_type') \
+        .filter(q_term)
+
+    if sources:
+        content_types = ContentType.objects.get_for_models(
+            *[get_source_model(source) for source in sources])
+        queryset = queryset.filter(content_type__in=content_types.values())
+
+    return queryset \
+        .annotate(
+            hits=Count('terms__term', distinct=True),
+            rank=Sum('terms__weight')) \
+        .order_by('-hits', '-rank', '-date_updated', '-id')
@@ -0,0 +1,126 @@
+"""
+Indonesian tokenizer and stemmer
+Rule based from Nazief-Adriani without root dictionary, so result
+not always the real root word. Index and query use same rules,
+the important part is both side meet in same term.
+"""
+import re
+import unicodedata
+from html import unescape
+
+from django.utils.html import strip_tags
+
+from .constant import STOPWORDS, TERM_MAX_LENGTH
+
+WORD_RE = re.compile(r'[0-9a-z]+')
+
+PARTICLES = ('kah', 'lah', 'tah', 'pun')
+POSSESSIVES = ('nya', 'ku', 'mu')
+SUFFIXES = ('kan', 'an', 'i')
+
+VOWELS = 'aiueo'
+
+# Stem shorter than this not cut anymore
+MIN_STEM_LENGTH = 4
+
+
+def plain_text(text):
+    """Remove html tags and entities"""
+    if not text:
+        return ''
+    return unescape(strip_tags(text))
+
+
+def normalize(text):
+    """Lowercase, remove html and accent"""
+    text = unicodedata.normalize('NFKD', plain_text(text)) \
+        .encode('ascii', 'ignore') \
+        .decode('ascii')
+    return text.lower()
+
+
+def tokenize(text, stopwords=True):
+    """Split text to words, optionally without stopwords"""
+    words = WORD_RE.findall(normalize(text))
+    if stopwords:
+        return [word for word in words if word not in STOPWORDS]
+    return words
+
+
+def remove_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) \
+                and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def remove_prefix(word):
+    """Remove one prefix, return same word if nothing removed"""
+    # di-, ke-, se-
+    for prefix in ('di', 'ke', 'se'):
+        if word.startswith(prefix) and len(word) - 2 >= MIN_STEM_LENGTH:
+            return word[2:]
+
+    # ber-, ter-, per-, bel-ajar, pel-ajar, be-kerja
+    for prefix in ('ber', 'ter', 'per'):
+        if word.startswith(prefix) and len(word) - 3 >= MIN_STEM_LENGTH:
+            return word[3:]
+
+    if word in ('belajar', 'pelajar'):
+        return word[3:]
+
+    if word.startswith('beker'):
+        return word[2:]
+
+    # me-, pe- with their morphophonemic
+    if word[:2] not in ('me', 'pe'):
+        return word
+
+    rest = word[2:]
+    if len(rest) < MIN_STEM_LENGTH:
+        return word
+
+    # meng-/peng-: menghapus -> hapus, mengambil -> ambil
+    if rest.startswith('ng'):
+        return rest[2:] if len(rest) - 2 >= 3 else word
+
+    # meny-/peny-: menyapu -> sapu
+    if rest.startswith('ny') and rest[2:3] in VOWELS:
+        return 's' + rest[2:]
+
+    # mem-/pem-: membaca -> baca, memukul -> pukul
+    if rest.startswith('m'):
+        if rest[1:2] in VOWELS:
+            return 'p' + rest[1:]
+        return rest[1:]
+
+    # men-/pen-: mencari -> cari, menulis -> tulis
+    if rest.startswith('n'):
+        if rest[1:2] in VOWELS:
+            return 't' + rest[1:]
+        return rest[1:]
+
+    # me-/pe-: melihat -> lihat, merasa -> rasa
+    return rest
+
+
+def stem(word):
+    """Stem single lowercase word"""
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return word[:TERM_MAX_LENGTH]
+
+    # Inflectional: particle then possessive
+    word = remove_suffix(word, PARTICLES)
+    word = remove_suffix(word, POSSESSIVES)
+
+    # Derivational suffix
+    word = remove_suffix(word, SUFFIXES)
+
+    # Prefix can stacked, memper-, diper-, keber-
+    for step in range(3):
+        stripped = remove_prefix(word)
+        if stripped == word:
+            break
+        word = stripped
+    return word[:TERM_MAX_LENGTH]
@@ -13,7 +13,8 @@ PROJECT_APPS = [
     'apps.person.apps.PersonConfig',
     'apps.escort.apps.EscortConfig',
     'apps.notice.apps.NoticeConfig',
-    'apps.knowledgebase.apps.KnowledgeBaseConfig'
+    'apps.knowledgebase.apps.KnowledgeBaseConfig',
+    'apps.search.apps.SearchConfig'
 ]
 INSTALLED_APPS = INSTALLED_APPS + PROJECT_APPS
 
@@ -126,13 +127,89 @@ if DEBUG:
 # Caching
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/2.2/topics/cache/
+# Two tier, read served from process memory, see utils/backends.py
 CACHES = {
     'default': {
+        'BACKEND': 'utils.backends.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 5,
+
+            # Counter and invalidation token must always fresh
+            'SHARED_ONLY_PREFIXES': [
+                'metrics:', 'response:generation:', 'attributes:',
+                'notice:unread:', 'pubsub:', 'person:validation:'],
+        }
+    },
+
+    # Shared by all process, point to memcached or redis when available
+    # Local stand-in: django.core.cache.backends.locmem.LocMemCache
+    # TIMEOUT None so incr() not expire the counter
+    'shared': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'temporary_cache',
+        'TIMEOUT': None,
     }
 }
 
+# Anonymous GET response cache in seconds, 0 to disable
+# See utils/caches.py
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Background task thread pool per process, see utils/executors.py
+BACKGROUND_MAX_WORKERS = 4
+BACKGROUND_MAX_QUEUE = 100
+BACKGROUND_TIMEOUT = 30
+BACKGROUND_DRAIN = 10
+
+# Comment, protest, rating and thumbs counter written every
+# this seconds, 0 to write after commit. See utils/counters.py
+COUNTER_FLUSH_INTERVAL = 1
+COUNTER_MAX_PENDING = 1000
+
+# Metric increment added to the cache every this seconds, 0 to
+# write each increment. See utils/metrics.py
+METRICS_FLUSH_INTERVAL = 10
+
+# Unread notification with same recipient, verb and notified content
+# merged in this seconds, 0 disable. See apps/notice/utils/groups.py
+NOTIFICATION_GROUP_WINDOW = 60 * 60 * 24
+
+# Live notification, see utils/pubsub.py and apps/notice/utils/streams.py
+# Stream hold a worker thread, run gunicorn with gthread or gevent
+# CacheTransport number message with shared tier incr(), DatabaseCache
+# one not atomic (publisher retry), prefer memcached or redis
+PUBSUB_TRANSPORT = 'utils.pubsub.CacheTransport'
+PUBSUB_POLL_INTERVAL = 0.5
+PUBSUB_MESSAGE_TIMEOUT = 60
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_STREAM_DURATION = 300
+NOTIFICATION_POLL_TIMEOUT = 25
+
+# Resized image next to the upload, asked with `?image_size=`
+# Resize run in process pool, see utils/images.py
+IMAGE_DERIVATIVES = {'thumb': 96, 'small': 320, 'medium': 960}
+IMAGE_MAX_WORKERS = 2
+IMAGE_EXISTS_TIMEOUT = 60 * 60 * 24
+IMAGE_MISSING_TIMEOUT = 60
+
+# Chunked resumable attachment upload, see utils/uploads.py
+# Spool is local disk, share it or keep one client on one host
+UPLOAD_SPOOL_DIR = os.path.join(PROJECT_PATH, 'uploads')
+UPLOAD_CHUNK_SIZE = 1024 * 1024 * 2
+UPLOAD_MAX_CHUNK = 1024 * 1024 * 8
+UPLOAD_MAX_SIZE = 1024 * 1024 * 200
+UPLOAD_EXPIRE = 60 * 60 * 24
+UPLOAD_STORE_ATTEMPTS = 3
+UPLOAD_STORE_RETRY_DELAY = 2
+
+# Attachment and attribute file stored once by content digest,
+# unreferenced one removed by `collect_blobs`, see utils/blobs.py
+BLOB_STORAGE = True
+BLOB_GRACE = 60 * 60 * 24
+
 
 # Django Email
 # ------------------------------------------------------------------------------
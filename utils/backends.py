@@ -0,0 +1,409 @@
+"""
+Two tier cache backend
+------------------------
+Per process LRU (entries, bytes and TTL limited) in front of
+a shared cache defined in CACHES by alias. Read served from
+process memory, write go to both tier.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'utils.backends.TwoTierCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'LOCAL_MAX_ENTRIES': 1000,
+                'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+                'LOCAL_TIMEOUT': 5,
+                'SHARED_ONLY_PREFIXES': ['metrics:'],
+            }
+        },
+        'shared': {...}
+    }
+
+Cross process;
+    - Local entry live max LOCAL_TIMEOUT seconds, set() or delete()
+      of other process seen here only after it expired
+    - All keys prefixed with namespace token from shared tier,
+      clear() give new token so all process drop their local entry
+      after NAMESPACE_INTERVAL seconds
+    - Key with SHARED_ONLY_PREFIXES always read from shared tier;
+      counter, generation and version key must be one of them,
+      a stale one serve old data for the whole LOCAL_TIMEOUT
+
+Stampede;
+    get_or_set() compute a missing value once (thread and process),
+    other caller wait for it. Near expiry value refreshed early by
+    one caller (XFetch), other caller still get the current value.
+    Waiting caller poll the shared tier with backoff up to
+    WAIT_INTERVAL seconds.
+"""
+import math
+import time
+import uuid
+import pickle
+import random
+import threading
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+NAMESPACE_KEY = 'twotier:namespace'
+LOCK_PREFIX = 'twotier:lock'
+
+
+class Envelope:
+    """Value stored in shared tier with its expiry and compute time"""
+    __slots__ = ('value', 'expires', 'delta')
+
+    def __init__(self, value, expires=None, delta=0):
+        self.value = value
+        self.expires = expires
+        self.delta = delta
+
+    def __getstate__(self):
+        return (self.value, self.expires, self.delta)
+
+    def __setstate__(self, state):
+        self.value, self.expires, self.delta = state
+
+
+def wrap(value, timeout, delta=0):
+    # Integer stored raw so shared incr() still work
+    if type(value) is int:
+        return value
+
+    expires = None if timeout is None else time.time() + timeout
+    return Envelope(value, expires, delta)
+
+
+def unwrap(stored):
+    if isinstance(stored, Envelope):
+        return stored.value
+    return stored
+
+
+class LocalLRU:
+    """Thread safe LRU, value kept pickled so caller can't mutate it"""
+
+    def __init__(self, max_entries=1000, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key, None)
+            if item is None:
+                return None
+
+            expires, data = item
+            if expires <= time.time():
+                self._pop(key)
+                return None
+
+            self._data.move_to_end(key)
+            return data
+
+    def set(self, key, data, timeout):
+        if timeout <= 0 or len(data) > self.max_bytes:
+            self.delete(key)
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.time() + timeout, data)
+            self.size += len(data)
+
+            # Drop least recently used
+            while self._data and (len(self._data) > self.max_entries
+                                  or self.size > self.max_bytes):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+
+        # Alias in CACHES, or cache instance from code (benchmark)
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.namespace_interval = options.get('NAMESPACE_INTERVAL', 1)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        self.wait_interval = options.get('WAIT_INTERVAL', 0.5)
+        self.early_refresh = options.get('EARLY_REFRESH', 1.0)
+        self.shared_only = tuple(options.get('SHARED_ONLY_PREFIXES', []))
+
+        self._local = LocalLRU(
+            options.get('LOCAL_MAX_ENTRIES', 1000),
+            options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024))
+        self._namespace = None
+        self._namespace_checked = 0
+        self._flights = dict()
+        self._flights_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        if isinstance(self.shared_alias, BaseCache):
+            return self.shared_alias
+        return caches[self.shared_alias]
+
+    # Keys
+    def get_namespace(self):
+        now = time.time()
+        if self._namespace is None \
+                or now - self._namespace_checked >= self.namespace_interval:
+            namespace = self.shared.get(NAMESPACE_KEY)
+            if namespace is None:
+                namespace = uuid.uuid4().hex[:8]
+                if not self.shared.add(NAMESPACE_KEY, namespace, None):
+                    namespace = self.shared.get(NAMESPACE_KEY, namespace)
+
+            # Other process cleared, drop all local entries
+            if namespace != self._namespace:
+                self._local.clear()
+            self._namespace = namespace
+            self._namespace_checked = now
+        return self._namespace
+
+    def make_key(self, key, version=None):
+        key = super().make_key(key, version=version)
+        return '%s:%s' % (self.get_namespace(), key)
+
+    def is_local(self, key):
+        return not (self.shared_only and key.startswith(self.shared_only))
+
+    def get_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
+
+    # Local tier
+    def local_get(self, key):
+        data = self._local.get(key)
+        if data is None:
+            return None
+        return pickle.loads(data)
+
+    def local_set(self, key, stored):
+        timeout = self.local_timeout
+        expires = getattr(stored, 'expires', None)
+        if expires is not None:
+            timeout = min(timeout, expires - time.time())
+        self._local.set(
+            key, pickle.dumps(stored, pickle.HIGHEST_PROTOCOL), timeout)
+
+    def get_stored(self, key, cache_key):
+        local = self.is_local(key)
+        stored = self.local_get(cache_key) if local else None
+        if stored is None:
+            stored = self.shared.get(cache_key)
+            if stored is not None and local:
+                self.local_set(cache_key, stored)
+        return stored
+
+    def set_stored(self, key, cache_key, stored, timeout):
+        self.shared.set(cache_key, stored, timeout)
+        if self.is_local(key):
+            self.local_set(cache_key, stored)
+        else:
+            self._local.delete(cache_key)
+
+    # Cache API
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_key(key, version=version)
+        self.validate_key(cache_key)
+        timeout = self.get_timeout(timeout)
+
+        stored = wrap(value, timeout)
+        added = self.shared.add(cache_key, stored, timeout)
+        if added and self.is_local(key):
+            self.local_set(cache_key, stored)
+        return added
+
+    def get(self, key, default=None, version=None):
+        cache_key = self.make_key(key, version=version)
+        self.validate_key(cache_key)
+
+        stored = self.get_stored(key, cache_key)
+        if stored is None:
+            return default
+        return unwrap(stored)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_key(key, version=version)
+        self.validate_key(cache_key)
+        timeout = self.get_timeout(timeout)
+
+        if timeout is not None and timeout <= 0:
+            self.delete(key, version=version)
+            return
+        self.set_stored(key, cache_key, wrap(value, timeout), timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_key(key, version=version)
+        self._local.delete(cache_key)
+        return self.shared.touch(cache_key, self.get_timeout(timeout))
+
+    def delete(self, key, version=None):
+        cache_key = self.make_key(key, version=version)
+        self.validate_key(cache_key)
+        self._local.delete(cache_key)
+        self.shared.delete(cache_key)
+
+    def get_many(self, keys, version=None):
+        result, missing = dict(), dict()
+        for key in keys:
+            cache_key = self.make_key(key, version=version)
+            stored = self.local_get(cache_key) if self.is_local(key) else None
+            if stored is None:
+                missing[cache_key] = key
+            else:
+                result[key] = unwrap(stored)
+
+        if missing:
+            for cache_key, stored in self.shared.get_many(missing).items():
+                key = missing[cache_key]
+                if self.is_local(key):
+                    self.local_set(cache_key, stored)
+                result[key] = unwrap(stored)
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self.delete_many(data, version=version)
+            return []
+
+        shared_data = dict()
+        for key in data:
+            cache_key = self.make_key(key, version=version)
+            stored = wrap(data[key], timeout)
+            shared_data[cache_key] = stored
+
+            if self.is_local(key):
+                self.local_set(cache_key, stored)
+            else:
+                self._local.delete(cache_key)
+
+        failed = self.shared.set_many(shared_data, timeout) or []
+        return [key for key in data
+                if self.make_key(key, version=version) in failed]
+
+    def delete_many(self, keys, version=None):
+        cache_keys = [self.make_key(key, version=version) for key in keys]
+        for cache_key in cache_keys:
+            self._local.delete(cache_key)
+        self.shared.delete_many(cache_keys)
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def incr(self, key, delta=1, version=None):
+        # Counter always live in shared tier
+        cache_key = self.make_key(key, version=version)
+        self._local.delete(cache_key)
+        return self.shared.incr(cache_key, delta)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self.shared.set(NAMESPACE_KEY, uuid.uuid4().hex[:8], None)
+        self._local.clear()
+        self._namespace = None
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    # Stampede protection
+    def should_refresh(self, stored):
+        """XFetch, longer compute time refresh earlier"""
+        expires = getattr(stored, 'expires', None)
+        if expires is None or not self.early_refresh:
+            return False
+
+        gap = stored.delta * self.early_refresh * -math.log(random.random())
+        return time.time() + gap >= expires
+
+    def acquire(self, cache_key):
+        """Single flight, one thread and one process per key"""
+        with self._flights_lock:
+            lock = self._flights.setdefault(cache_key, threading.Lock())
+
+        if not lock.acquire(blocking=False):
+            return False
+
+        lock_key = '%s:%s' % (LOCK_PREFIX, cache_key)
+        if not self.shared.add(lock_key, 1, self.lock_timeout):
+            lock.release()
+            return False
+        return True
+
+    def release(self, cache_key):
+        self.shared.delete('%s:%s' % (LOCK_PREFIX, cache_key))
+        with self._flights_lock:
+            lock = self._flights.pop(cache_key, None)
+        if lock is not None:
+            lock.release()
+
+    def wait(self, key, cache_key):
+        """Wait other flight finish, None if too long"""
+        deadline, delay = time.time() + self.lock_timeout, 0.01
+        while time.time() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, self.wait_interval)
+            stored = self.shared.get(cache_key)
+            if stored is not None:
+                if self.is_local(key):
+                    self.local_set(cache_key, stored)
+                return stored
+        return None
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_key(key, version=version)
+        self.validate_key(cache_key)
+        timeout = self.get_timeout(timeout)
+
+        stored = self.get_stored(key, cache_key)
+        if stored is not None:
+            # Still fresh or other caller already refreshing
+            if not self.should_refresh(stored) or not self.acquire(cache_key):
+                return unwrap(stored)
+        elif not self.acquire(cache_key):
+            stored = self.wait(key, cache_key)
+            if stored is not None:
+                return unwrap(stored)
+
+            # Flight owner too slow, compute it self
+            if not self.acquire(cache_key):
+                return default() if callable(default) else default
+
+        try:
+            start = time.time()
+            value = default() if callable(default) else default
+            delta = time.time() - start
+
+            if value is not None:
+                self.set_stored(
+                    key, cache_key, wrap(value, timeout, delta), timeout)
+        finally:
+            self.release(cache_key)
+        return value
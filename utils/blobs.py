@@ -0,0 +1,212 @@
+"""
+Content addressed file
+------------------------
+With BLOB_STORAGE on, new file of Attachment and AttributeValue
+stored once by SHA-256 of its content, under hash sharded name;
+
+    blobs/9f/86/9f86d081884c7d659a2feaa0c55ad015...0a08.png
+
+Same content uploaded again get the existing name, nothing written.
+Blob row (escort.Blob) keep how many file field point to it, counted
+by the model signals in the transaction of the row itself. Blob no
+longer referenced removed with its derivatives by `collect_blobs`
+after BLOB_GRACE seconds.
+
+    pre_save    blob_handler            hash new file, reuse or write
+    post_init   blob_init_handler       name before change
+    post_save   blob_reference_handler  count new name, release old
+    post_delete blob_delete_handler     release
+
+Blob file shared, never delete it from the field file directly;
+FieldFile.save() and delete() go to storage before any signal, use
+save_file() and delete_file(). queryset update() and delete() of the
+raw name bypass the count too.
+"""
+import os
+import hashlib
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+BLOB_PREFIX = 'blobs'
+FILE_FIELDS = ('value_image', 'value_file')
+
+
+def is_enabled():
+    return getattr(settings, 'BLOB_STORAGE', False)
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX + '/')
+
+
+def get_digest(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_blob_name(digest, filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    return '%s/%s/%s/%s%s' % (
+        BLOB_PREFIX, digest[:2], digest[2:4], digest, extension)
+
+
+def get_field_names(instance):
+    # Deferred field not loaded here
+    return {field: getattr(instance.__dict__[field], 'name',
+                           instance.__dict__[field]) or None
+            for field in FILE_FIELDS if field in instance.__dict__}
+
+
+def store_blob(content, filename, storage=None):
+    """
+    Name of blob with the content, written only if new
+    ------------------------
+    Touched blob skipped by collect_blobs, even without reference yet
+    """
+    Blob = get_model('escort', 'Blob')
+    storage = storage or default_storage
+    digest = get_digest(content)
+
+    name = Blob.objects.filter(digest=digest) \
+        .values_list('name', flat=True).first()
+    if not name or not Blob.objects.filter(digest=digest) \
+            .update(date_updated=timezone.now()):
+        name = get_blob_name(digest, filename)
+
+    # Row without file after failed collect written again
+    if not storage.exists(name):
+        content.seek(0)
+        saved = storage.save(name, content)
+
+        # Other upload of same content won, its file is the same
+        if saved != name:
+            storage.delete(saved)
+
+    blob, created = Blob.objects.get_or_create(
+        digest=digest, defaults={'name': name, 'size': content.size})
+    return blob.name
+
+
+def change_references(names, delta):
+    Blob = get_model('escort', 'Blob')
+    now = timezone.now()
+    for name, count in Counter(filter(is_blob, names)).items():
+        blobs = Blob.objects.filter(name=name)
+        if delta < 0:
+            blobs = blobs.filter(references__gte=count)
+        blobs.update(references=F('references') + delta * count,
+                     date_updated=now)
+
+
+def save_file(field_file, name, content):
+    """FieldFile.save() with deduplication"""
+    if not is_enabled():
+        return field_file.save(name, content, save=True)
+
+    if not isinstance(content, File):
+        content = File(content, name=name)
+    content.name = name
+
+    instance = field_file.instance
+    setattr(instance, field_file.field.name, content)
+    instance.save()
+
+
+def delete_file(field_file):
+    """FieldFile.delete() keeping shared blob, collect_blobs remove it"""
+    if not is_blob(field_file.name):
+        return field_file.delete()
+
+    instance = field_file.instance
+    setattr(instance, field_file.field.name, None)
+    instance.save()
+
+
+def blob_handler(sender, instance, raw=False, **kwargs):
+    """Point new file to its blob before the field save it"""
+    if raw or not is_enabled():
+        return None
+
+    for field in FILE_FIELDS:
+        if field not in instance.__dict__:
+            continue
+
+        field_file = getattr(instance, field)
+        if not field_file or field_file._committed:
+            continue
+
+        field_file.name = store_blob(
+            field_file.file, field_file.name, field_file.storage)
+        field_file._committed = True
+
+
+def blob_init_handler(sender, instance, **kwargs):
+    instance.__old_blobs = get_field_names(instance)
+
+
+def blob_reference_handler(sender, instance, created, raw=False, **kwargs):
+    """Counted whatever BLOB_STORAGE, blob made before stay right"""
+    if raw:
+        return None
+
+    old = dict() if created else getattr(instance, '__old_blobs', dict())
+    new = get_field_names(instance)
+
+    # Field loaded after init has no old name, not counted
+    changed = [field for field in new if (created or field in old)
+               and new[field] != old.get(field, None)]
+    if not changed:
+        return None
+
+    change_references([new[field] for field in changed], 1)
+    change_references([old.get(field, None) for field in changed], -1)
+    instance.__old_blobs = dict(old, **new)
+
+
+def blob_delete_handler(sender, instance, **kwargs):
+    change_references(get_field_names(instance).values(), -1)
+
+
+def collect_blobs(chunk_size=500, grace=60 * 60 * 24, storage=None):
+    """
+    Remove blob without reference older than grace seconds
+    ------------------------
+    One transaction each chunk, rows locked so upload reusing the
+    blob wait and write it again. Return removed count
+    """
+    # Import here, utils.images import this module
+    from utils.images import delete_derivatives
+
+    Blob = get_model('escort', 'Blob')
+    storage = storage or default_storage
+    before = timezone.now() - timedelta(seconds=grace)
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            blobs = list(Blob.objects.select_for_update()
+                         .filter(references=0, date_updated__lt=before)
+                         .order_by('pk')[:chunk_size])
+            if not blobs:
+                break
+
+            Blob.objects.filter(pk__in=[blob.pk for blob in blobs]).delete()
+            for blob in blobs:
+                storage.delete(blob.name)
+                delete_derivatives(blob.name, storage=storage)
+        total += len(blobs)
+    return total
@@ -0,0 +1,150 @@
+"""
+Response cache for anonymous read endpoint
+------------------------
+Cached by host, path and normalized query params. Each cached
+response remember the scopes it built from;
+
+    media               = list membership and ordering of media
+    media:<uuid>        = single media content
+
+Signal handler call bump_generation() when object changed, it
+give the scope new generation token. Cached response only served
+if generation of all its scopes still same with when it computed.
+So a new comment only drop response contain that protest or media.
+"""
+import uuid
+import hashlib
+from functools import wraps
+from urllib import parse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# THIRD PARTY
+from rest_framework.response import Response
+
+# PROJECT UTILS
+from utils.metrics import register, increment
+
+RESPONSE_CACHE_PREFIX = 'response'
+
+CACHE_HITS = register(
+    'response_cache_hits_total', 'counter',
+    'Anonymous response served from cache')
+CACHE_MISSES = register(
+    'response_cache_misses_total', 'counter',
+    'Anonymous response computed by view')
+
+
+def get_generation_key(scope):
+    return '%s:generation:%s' % (RESPONSE_CACHE_PREFIX, scope)
+
+
+def bump_generation(*scopes):
+    """
+    Mark scopes changed, run after transaction commit
+    So other request not cache old data before commit
+    """
+    scopes = [scope for scope in scopes if scope]
+    if not scopes:
+        return None
+
+    def bump():
+        cache.set_many(
+            {get_generation_key(scope): uuid.uuid4().hex
+             for scope in scopes}, None)
+
+    transaction.on_commit(bump)
+
+
+def get_response_key(request):
+    # Same params in different order is same response
+    params = [(key, sorted(values))
+              for key, values in request.query_params.lists()
+              if any(values)]
+    querystring = parse.urlencode(sorted(params), doseq=True)
+
+    raw = '%s%s?%s' % (request.get_host(), request.path, querystring)
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return '%s:%s' % (RESPONSE_CACHE_PREFIX, digest)
+
+
+def get_response_scopes(resource, data, related=None):
+    """Collect scopes from serialized data, single or paginated"""
+    related = related or dict()
+    items = data.get('results', [data]) if isinstance(data, dict) else []
+
+    scopes = set()
+    for item in items:
+        scopes.add('%s:%s' % (resource, item.get('uuid', None)))
+        for field in related:
+            value = item.get(field, None)
+            if value:
+                scopes.add('%s:%s' % (related[field], value))
+    return scopes
+
+
+def get_generations(scopes):
+    """Generation token each scope, None if never changed"""
+    keys = {get_generation_key(scope): scope for scope in scopes}
+    values = cache.get_many(keys.keys())
+    return {keys[key]: values.get(key, None) for key in keys}
+
+
+def is_fresh(entry):
+    generations = entry['generations']
+    return get_generations(generations.keys()) == generations
+
+
+def cache_anonymous_response(resource, related=None):
+    """
+    Decorate list or retrieve ViewSet method
+    ------------------------
+    resource    = scope name, ex: `media`
+    related     = {field: resource} other object shown in the item,
+                  the field value must be uuid
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            # Set RESPONSE_CACHE_TIMEOUT = 0 to disable
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+            # Logged in person see ownership etc, don't cache
+            if not timeout or request.method != 'GET' \
+                    or request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+
+            key = get_response_key(request)
+            entry = cache.get(key)
+            if entry and is_fresh(entry):
+                increment(CACHE_HITS, resource=resource)
+                return Response(entry['data'], status=entry['status'])
+
+            increment(CACHE_MISSES, resource=resource)
+
+            # Read known scope before query, so change while computing
+            # make it stale. List item only known after computed.
+            uuid_init = kwargs.get('uuid', None)
+            if uuid_init:
+                scopes = ['%s:%s' % (resource, uuid_init)]
+            else:
+                scopes = [resource]
+            generations = get_generations(scopes)
+
+            response = method(self, request, *args, **kwargs)
+
+            if response.status_code == 200:
+                scopes = get_response_scopes(resource, response.data, related)
+                scopes = scopes.difference(generations)
+                generations.update(get_generations(scopes))
+
+                cache.set(key, {
+                    'generations': generations,
+                    'status': response.status_code,
+                    'data': response.data
+                }, timeout)
+            return response
+        return wrapper
+    return decorator
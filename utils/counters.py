@@ -0,0 +1,186 @@
+"""
+Write-behind counter
+------------------------
+Counter change (comment, protest, thumbs) recorded as delta after
+commit and kept in process memory. Delta for the same row coalesced,
+flushed every COUNTER_FLUSH_INTERVAL seconds with one query per row;
+
+    UPDATE escort_media SET comment_count = comment_count + 3, ...
+
+So hot row locked once per interval instead of each comment, and
+date_updated or other columns not rewritten.
+
+Example;
+    add_counter(media, 'comment_count', 1, scope='media:<uuid>')
+
+Settings;
+    COUNTER_FLUSH_INTERVAL  = seconds, 0 write directly after commit
+    COUNTER_MAX_PENDING     = rows waiting, over it flush right away
+
+Scope given to add_counter() bumped after flush, so response
+cache refreshed when the database changed. Delta of failed UPDATE
+kept for the next flush. Delta not flushed
+yet can merged to the instance by merge_pending().
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, Value, When
+
+# PROJECT UTILS
+from utils.caches import bump_generation
+from utils.metrics import register, increment
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FLUSHES = register(
+    'counter_flush_rows_total', 'counter',
+    'Rows updated by counter flush')
+COUNTER_DELTAS = register(
+    'counter_deltas_total', 'counter',
+    'Counter delta recorded, divide by rows for coalesce ratio')
+
+
+class CounterBuffer:
+    def __init__(self):
+        # {(model, pk): {field: delta}}
+        self.pending = dict()
+        self.scopes = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._registered = False
+
+    def get_interval(self):
+        return getattr(settings, 'COUNTER_FLUSH_INTERVAL', 0)
+
+    def add(self, model, pk, field, delta, scope=None):
+        with self._lock:
+            fields = self.pending.setdefault((model, pk), dict())
+            fields[field] = fields.get(field, 0) + delta
+            if scope:
+                self.scopes.add(scope)
+            size = len(self.pending)
+
+        increment(COUNTER_DELTAS)
+
+        interval = self.get_interval()
+        if not interval \
+                or size >= getattr(settings, 'COUNTER_MAX_PENDING', 1000):
+            self.flush()
+        else:
+            self.start()
+
+    def get_pending(self, model, pk):
+        with self._lock:
+            return dict(self.pending.get((model, pk), {}))
+
+    def flush(self):
+        """Write all delta, one UPDATE each row"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self.pending = self.pending, dict()
+                scopes, self.scopes = self.scopes, set()
+
+            rows, failed = 0, dict()
+            for (model, pk), fields in pending.items():
+                values = {field: get_update(field, delta)
+                          for field, delta in fields.items() if delta}
+                if not values:
+                    continue
+
+                try:
+                    model.objects.filter(pk=pk).update(**values)
+                    rows += 1
+                except Exception:
+                    logger.exception('Counter flush %s %s failed',
+                                     model.__name__, pk)
+                    failed[(model, pk)] = fields
+
+            if failed:
+                self.restore(failed, scopes)
+            if rows:
+                increment(COUNTER_FLUSHES, rows)
+                bump_generation(*scopes)
+        return rows
+
+    def restore(self, failed, scopes):
+        """Put delta back, added to the one recorded meanwhile"""
+        with self._lock:
+            for key, fields in failed.items():
+                pending = self.pending.setdefault(key, dict())
+                for field, delta in fields.items():
+                    pending[field] = pending.get(field, 0) + delta
+            self.scopes.update(scopes)
+
+    # Flush thread
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return None
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self.loop, name='counter-flush', daemon=True)
+                self._thread.start()
+
+                # Only process with delta waiting flush at exit
+                if not self._registered:
+                    atexit.register(self.stop)
+                    self._registered = True
+
+    def loop(self):
+        while not self._wakeup.wait(self.get_interval() or 1):
+            if self.pending:
+                try:
+                    self.flush()
+                finally:
+                    connections.close_all()
+
+    def stop(self):
+        self._wakeup.set()
+        self.flush()
+
+
+def get_update(field, delta):
+    """
+    Counter plus delta, not below zero
+    ------------------------
+    Unsigned column (MySQL) reject negative even inside GREATEST(),
+    so compared before subtracted
+    """
+    if delta > 0:
+        return F(field) + Value(delta)
+    return Case(When(**{'%s__gte' % field: -delta},
+                     then=F(field) + Value(delta)),
+                default=Value(0))
+
+
+buffer = CounterBuffer()
+
+
+def add_counter(instance, field, delta, scope=None):
+    """Record delta after commit, rollback discard it"""
+    if not instance or not instance.pk or not delta:
+        return None
+
+    model, pk = instance._meta.model, instance.pk
+    transaction.on_commit(
+        lambda: buffer.add(model, pk, field, delta, scope=scope))
+
+
+def merge_pending(instance):
+    """Add not flushed delta of this process to instance"""
+    if instance and instance.pk:
+        pending = buffer.get_pending(instance._meta.model, instance.pk)
+        for field, delta in pending.items():
+            setattr(instance, field, max(getattr(instance, field) + delta, 0))
+    return instance
+
+
+def flush_counters():
+    return buffer.flush()
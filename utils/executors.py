@@ -0,0 +1,171 @@
+"""
+Background task executor
+------------------------
+One bounded thread pool per process for work not needed by
+the response (upload, notification, email and sms).
+
+    from utils.executors import run_in_background
+    run_in_background(create_notification, instance, on_commit=True)
+
+Settings;
+    BACKGROUND_MAX_WORKERS  = threads per process
+    BACKGROUND_MAX_QUEUE    = waiting task limit, over it the task
+                              run in caller thread (back pressure)
+    BACKGROUND_TIMEOUT      = seconds, longer task counted as timeout
+    BACKGROUND_DRAIN        = seconds waited for task on worker exit
+
+Thread can't be killed, so timeout only counted and logged. Waiting
+task drained by atexit (gunicorn worker exit), or call shutdown()
+from gunicorn `worker_exit` hook.
+"""
+import time
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+# PROJECT UTILS
+from utils.metrics import register, increment
+
+logger = logging.getLogger(__name__)
+
+TASKS_SUBMITTED = register(
+    'background_tasks_submitted_total', 'counter',
+    'Background task accepted, queued = submitted - started')
+TASKS_STARTED = register(
+    'background_tasks_started_total', 'counter',
+    'Background task started, running = started - finished')
+TASKS_FINISHED = register(
+    'background_tasks_finished_total', 'counter',
+    'Background task finished by status (done, failed, timeout)')
+TASKS_INLINE = register(
+    'background_tasks_inline_total', 'counter',
+    'Task run in caller thread because queue full or pool shutdown')
+TASKS_MILLISECONDS = register(
+    'background_tasks_milliseconds_total', 'counter',
+    'Time from submit to finish, divide by finished for latency')
+
+
+class BackgroundExecutor:
+    def __init__(self, max_workers=None, max_queue=None, timeout=None,
+                 drain=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.drain = drain
+        self.pending = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get_option(self, name, default):
+        value = getattr(self, name)
+        if value is None:
+            value = getattr(settings, 'BACKGROUND_%s' % name.upper(), default)
+        return value
+
+    @property
+    def pool(self):
+        # Created on first use, not in every process import it
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.get_option('max_workers', 4),
+                        thread_name_prefix='background')
+        return self._pool
+
+    def run(self, func, args, submitted, timeout, name):
+        started = time.time()
+        status = 'done'
+        increment(TASKS_STARTED, task=name)
+
+        try:
+            func(*args)
+        except Exception:
+            status = 'failed'
+            logger.exception('Background task %s failed', name)
+        finally:
+            finished = time.time()
+            if status == 'done' and timeout and finished - started > timeout:
+                status = 'timeout'
+                logger.warning('Background task %s took %.1fs',
+                               name, finished - started)
+
+            with self._lock:
+                self.pending -= 1
+
+            increment(TASKS_FINISHED, task=name, status=status)
+            increment(TASKS_MILLISECONDS,
+                      int((finished - submitted) * 1000), task=name)
+
+            # Each thread has own connection, don't leave it open
+            connections.close_all()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func(*args) in background
+        ------------------------
+        on_commit   = wait current transaction committed, so the
+                      thread can read what this request saved
+        timeout     = override BACKGROUND_TIMEOUT
+        """
+        if kwargs.get('on_commit', False):
+            kwargs['on_commit'] = False
+            transaction.on_commit(lambda: self.submit(func, *args, **kwargs))
+            return None
+
+        timeout = kwargs.get('timeout', None) \
+            or self.get_option('timeout', 30)
+        name = getattr(func, '__name__', 'task')
+        submitted = time.time()
+
+        with self._lock:
+            full = self.pending >= self.get_option('max_queue', 100)
+            if not full:
+                self.pending += 1
+
+        # Too much waiting, caller do it self
+        if full:
+            increment(TASKS_INLINE, task=name)
+            return func(*args)
+
+        increment(TASKS_SUBMITTED, task=name)
+        try:
+            return self.pool.submit(
+                self.run, func, args, submitted, timeout, name)
+        except RuntimeError:
+            # Pool already shutdown, process exiting
+            with self._lock:
+                self.pending -= 1
+            return func(*args)
+
+    def shutdown(self, drain=None):
+        """Wait running and queued task, max BACKGROUND_DRAIN seconds"""
+        pool = self._pool
+        if pool is None:
+            return None
+
+        drain = drain if drain is not None \
+            else self.get_option('drain', 10)
+        deadline = time.time() + drain
+
+        while self.pending > 0 and time.time() < deadline:
+            time.sleep(0.05)
+
+        if self.pending > 0:
+            logger.warning('Background executor exit with %s task left',
+                           self.pending)
+
+        pool.shutdown(wait=self.pending <= 0)
+        self._pool = None
+
+
+executor = BackgroundExecutor()
+atexit.register(executor.shutdown)
+
+
+def run_in_background(func, *args, **kwargs):
+    return executor.submit(func, *args, **kwargs)
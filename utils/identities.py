@@ -0,0 +1,44 @@
+"""
+Request identity map
+------------------------
+Object loaded by permission class kept in the request by
+(model, uuid), view get_object() take it instead of query the same
+row again. Taken object removed from the map, so read after save
+(ex: response of partial_update) query fresh data.
+
+Example;
+    keep_object(request, comment)
+    comment = take_object(request, Comment, uuid) or query...
+"""
+from uuid import UUID
+
+
+def get_identities(request):
+    # DRF request wrap the Django one, kept in the inner
+    request = getattr(request, '_request', request)
+    identities = getattr(request, '_identities', None)
+    if identities is None:
+        identities = request._identities = dict()
+    return identities
+
+
+def get_identity_key(model, uuid):
+    try:
+        uuid = uuid if isinstance(uuid, UUID) else UUID(str(uuid))
+    except ValueError:
+        return None
+    return (model._meta.label_lower, uuid)
+
+
+def keep_object(request, instance):
+    key = get_identity_key(type(instance), instance.uuid)
+    get_identities(request)[key] = instance
+    return instance
+
+
+def take_object(request, model, uuid):
+    """Kept object or None"""
+    key = get_identity_key(model, uuid)
+    if request is None or key is None:
+        return None
+    return get_identities(request).pop(key, None)
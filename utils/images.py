@@ -0,0 +1,224 @@
+"""
+Image derivative
+------------------------
+Resized copy of uploaded image saved next to the original, one each
+IMAGE_DERIVATIVES size, re-encoded as JPEG;
+
+    images/person_<uuid>/me.png -> images/person_<uuid>/me_thumb.jpg
+
+Resize is CPU bound, done in a process pool (IMAGE_MAX_WORKERS, 0 in
+the caller), storage read and write stay in the calling thread.
+Derivative name follow the original, so serializer build the url
+without query; ask one with `?image_size=thumb`. Derivative not made
+yet (image before IMAGE_DERIVATIVES, run `build_image_derivatives`)
+served as the original, found one cached IMAGE_EXISTS_TIMEOUT and
+missing one IMAGE_MISSING_TIMEOUT, until make_derivatives() save it.
+
+    get_image_url(request, name)
+
+Model with `value_image` connect image_init_handler (post_init) and
+image_handler (post_save), derivatives made after commit when the
+image changed, derivatives of the replaced one deleted.
+"""
+import os
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# PROJECT UTILS
+from utils.executors import run_in_background
+from utils.blobs import is_blob
+
+logger = logging.getLogger(__name__)
+
+# {size: max width and height}
+DEFAULT_DERIVATIVES = {'thumb': 96, 'small': 320, 'medium': 960}
+DERIVATIVE_QUALITY = 80
+EXISTS_CACHE_PREFIX = 'image:exists'
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_derivatives():
+    return getattr(settings, 'IMAGE_DERIVATIVES', DEFAULT_DERIVATIVES)
+
+
+def get_pool():
+    global _pool
+    workers = getattr(settings, 'IMAGE_MAX_WORKERS', 2)
+    if not workers:
+        return None
+
+    # Created on first use, not in every process import it
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def get_derivative_name(name, size):
+    root, extension = os.path.splitext(name)
+    return '%s_%s.jpg' % (root, size)
+
+
+def get_exists_key(name):
+    # Storage name can be longer than cache key allowed
+    return '%s:%s' % (EXISTS_CACHE_PREFIX,
+                      hashlib.md5(name.encode('utf-8')).hexdigest())
+
+
+def has_derivative(derivative, storage=None):
+    """Storage existence, cached both found and missing"""
+    key = get_exists_key(derivative)
+    exists = cache.get(key, None)
+    if exists is not None:
+        return exists
+
+    storage = storage or default_storage
+    exists = storage.exists(derivative)
+    if exists:
+        timeout = getattr(settings, 'IMAGE_EXISTS_TIMEOUT', 60 * 60 * 24)
+    else:
+        # Short, made later by upload or build_image_derivatives
+        timeout = getattr(settings, 'IMAGE_MISSING_TIMEOUT', 60)
+    cache.set(key, exists, timeout)
+    return exists
+
+
+def resize_image(data, width):
+    """Original bytes to JPEG bytes fit in width, run in worker process"""
+    from PIL import Image
+
+    image = Image.open(BytesIO(data))
+    image.draft('RGB', (width, width))
+    image.thumbnail((width, width), Image.LANCZOS)
+
+    # JPEG has no alpha, flatten to white
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=DERIVATIVE_QUALITY, optimize=True,
+               progressive=True)
+    return output.getvalue()
+
+
+def make_derivatives(name, force=False, storage=None):
+    """
+    Save every size of image `name`
+    ------------------------
+    Return {size: derivative name}, skip existing one unless force
+    """
+    storage = storage or default_storage
+    if not name:
+        return dict()
+
+    sizes = {size: width for size, width in get_derivatives().items()
+             if force or not storage.exists(get_derivative_name(name, size))}
+    if not sizes:
+        return dict()
+
+    with storage.open(name, 'rb') as original:
+        data = original.read()
+
+    pool = get_pool()
+    if pool:
+        jobs = {size: pool.submit(resize_image, data, width)
+                for size, width in sizes.items()}
+        results = {size: job.result() for size, job in jobs.items()}
+    else:
+        results = {size: resize_image(data, width)
+                   for size, width in sizes.items()}
+
+    names = dict()
+    for size, content in results.items():
+        derivative = get_derivative_name(name, size)
+        if storage.exists(derivative):
+            storage.delete(derivative)
+        names[size] = storage.save(derivative, ContentFile(content))
+        cache.delete(get_exists_key(derivative))
+    return names
+
+
+def delete_derivatives(name, storage=None):
+    storage = storage or default_storage
+    if not name:
+        return None
+
+    for size in get_derivatives():
+        derivative = get_derivative_name(name, size)
+        cache.delete(get_exists_key(derivative))
+        try:
+            storage.delete(derivative)
+        except Exception:
+            logger.warning('Image derivative %s not deleted', derivative)
+
+
+def get_image_name(request, name):
+    """Derivative name asked by `?image_size=` if made, else the original"""
+    size = None
+    if request is not None:
+        # DRF request or Django one
+        params = getattr(request, 'query_params', None)
+        if params is None:
+            params = request.GET
+        size = params.get('image_size', None)
+
+    if name and size in get_derivatives():
+        derivative = get_derivative_name(name, size)
+        if has_derivative(derivative):
+            return derivative
+    return name
+
+
+def get_image_url(request, name):
+    if not name:
+        return None
+
+    url = default_storage.url(get_image_name(request, name))
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def get_field_name(value):
+    return getattr(value, 'name', value) or None
+
+
+def image_init_handler(sender, instance, **kwargs):
+    # Deferred field not loaded here
+    if 'value_image' in instance.__dict__:
+        instance.__old_image = get_field_name(instance.__dict__['value_image'])
+
+
+def image_handler(sender, instance, created, **kwargs):
+    """Make derivatives of new image after commit"""
+    if not created and not hasattr(instance, '__old_image'):
+        return None
+
+    name = get_field_name(instance.value_image)
+    old = getattr(instance, '__old_image', None)
+    if name == old:
+        return None
+
+    instance.__old_image = name
+
+    # Shared blob, derivatives removed by collect_blobs
+    if old and not is_blob(old):
+        run_in_background(delete_derivatives, old, on_commit=True)
+    if name:
+        run_in_background(make_derivatives, name, on_commit=True)
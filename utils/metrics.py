@@ -0,0 +1,176 @@
+"""
+Shared counters for scraping
+------------------------
+Value stored in default cache so every worker process write
+to the same counter. Rendered in Prometheus text format
+by /api/metrics/
+
+Example;
+    increment('response_cache_hits_total', resource='media')
+
+Increment kept in process memory and added to the cache every
+METRICS_FLUSH_INTERVAL seconds (0 write directly), so hot path
+like response cache hit not write the cache each request.
+
+Series listed in numbered index slots; the process winning add()
+of the series marker take the next slot, so no series lost when
+many process create it at once.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+METRICS_PREFIX = 'metrics'
+METRICS_INDEX = '%s:index' % METRICS_PREFIX
+MAX_SLOT_ATTEMPTS = 10
+
+# name: (type, help)
+REGISTRY = dict()
+
+
+def register(name, kind, description):
+    """Declare metric, kind is `counter` or `gauge`"""
+    REGISTRY[name] = (kind, description)
+    return name
+
+
+def get_metric_key(name, labels=None):
+    series = name
+    if labels:
+        series = '%s{%s}' % (name, ','.join(
+            '%s="%s"' % (label, labels[label]) for label in sorted(labels)))
+    return '%s:%s' % (METRICS_PREFIX, series)
+
+
+def add_to_index(key):
+    # Remember series, so collect() know what to read
+    if not cache.add('%s:known:%s' % (METRICS_INDEX, key), 1, None):
+        return None
+
+    cache.add('%s:count' % METRICS_INDEX, 0, None)
+    for attempt in range(MAX_SLOT_ATTEMPTS):
+        # Slot taken by add(), incr of some cache not atomic
+        number = cache.incr('%s:count' % METRICS_INDEX)
+        if cache.add('%s:%s' % (METRICS_INDEX, number), key, None):
+            return number
+    return None
+
+
+def get_index():
+    count = cache.get('%s:count' % METRICS_INDEX, 0)
+    slots = cache.get_many(['%s:%s' % (METRICS_INDEX, number)
+                            for number in range(1, count + 1)])
+    return set(slots.values())
+
+
+def add_value(key, value):
+    try:
+        return cache.incr(key, value)
+    except ValueError:
+        # First time, other process may create it at same time
+        if not cache.add(key, value, None):
+            return cache.incr(key, value)
+
+        add_to_index(key)
+        return value
+
+
+class MetricBuffer:
+    def __init__(self):
+        # {key: delta}
+        self.pending = dict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._registered = False
+
+    def get_interval(self):
+        return getattr(settings, 'METRICS_FLUSH_INTERVAL', 0)
+
+    def add(self, key, value):
+        with self._lock:
+            self.pending[key] = self.pending.get(key, 0) + value
+        self.start()
+
+    def flush(self):
+        """Add pending increments, one incr each series"""
+        with self._lock:
+            pending, self.pending = self.pending, dict()
+
+        for key, value in pending.items():
+            try:
+                add_value(key, value)
+            except Exception:
+                # Cache down, counted on next flush
+                with self._lock:
+                    self.pending[key] = self.pending.get(key, 0) + value
+        return len(pending)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return None
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self.loop, name='metrics-flush', daemon=True)
+                self._thread.start()
+
+                # Flush left increments at exit once thread started
+                if not self._registered:
+                    atexit.register(self.stop)
+                    self._registered = True
+
+    def loop(self):
+        while not self._wakeup.wait(self.get_interval() or 1):
+            if self.pending:
+                try:
+                    self.flush()
+                finally:
+                    connections.close_all()
+
+    def stop(self):
+        self._wakeup.set()
+        self.flush()
+
+
+buffer = MetricBuffer()
+
+
+def increment(name, value=1, **labels):
+    key = get_metric_key(name, labels)
+    if buffer.get_interval():
+        return buffer.add(key, value)
+    return add_value(key, value)
+
+
+def flush_metrics():
+    return buffer.flush()
+
+
+def set_gauge(name, value, **labels):
+    key = get_metric_key(name, labels)
+    cache.set(key, value, None)
+    add_to_index(key)
+
+
+def collect():
+    """Return metrics as Prometheus text format"""
+    flush_metrics()
+    values = cache.get_many(get_index())
+
+    lines, described = list(), set()
+    for key in sorted(values):
+        series = key[len(METRICS_PREFIX) + 1:]
+        name = series.split('{')[0]
+
+        if name not in described and name in REGISTRY:
+            kind, description = REGISTRY[name]
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s %s' % (name, kind))
+            described.add(name)
+        lines.append('%s %s' % (series, values[key]))
+    return '\n'.join(lines) + '\n'
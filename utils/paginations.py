@@ -0,0 +1,149 @@
+import base64
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+
+# THIRD PARTY
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Opt-in cursor (keyset) pagination
+    Used by list endpoint if request has `?cursor=` params
+    ------------------------
+    Cursor is opaque to client, encoded from last row ordering value
+    and the row id as tiebreaker. Each page run one query without
+    COUNT(*) and without OFFSET, so page N costs the same as page 1.
+
+    Example;
+        /api/escort/medias/?cursor=
+        /api/escort/medias/?cursor=cD0yMDE5LTExLTA2...
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, ordering=('-date_created', '-id')):
+        # Always finish with id to make position unique
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') != 'id':
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+
+        self.ordering = ordering
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+
+    def is_requested(self, request):
+        """Client ask cursor mode?"""
+        return self.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        size = request.query_params.get(self.page_size_query_param, None)
+        if size and size.isdigit() and int(size) > 0:
+            return min(int(size), self.max_page_size)
+        return self.page_size
+
+    def encode_cursor(self, obj, reverse=False):
+        field = self.ordering[0].lstrip('-')
+        value = getattr(obj, field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+
+        tokens = {'p': value, 'i': obj.pk}
+        if reverse:
+            tokens['r'] = 1
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = base64.urlsafe_b64encode(querystring.encode('ascii'))
+        return encoded.decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param, None)
+        if not encoded:
+            return None
+
+        try:
+            querystring = base64.urlsafe_b64decode(
+                encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            position = tokens['p'][0]
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, IndexError, UnicodeError):
+            raise NotFound(detail=_("Kursor tidak valid."))
+        return position, pk, reverse
+
+    def get_position(self, queryset, position):
+        """Cursor value as field value, tampered one not reach the query"""
+        field = queryset.model._meta.get_field(self.ordering[0].lstrip('-'))
+        try:
+            return field.to_python(position)
+        except ValidationError:
+            raise NotFound(detail=_("Kursor tidak valid."))
+
+    def get_keyset_filter(self, position, pk, reverse):
+        """
+        Build (field, id) row comparison
+        Descending and forward = older rows, ascending or backward = newer
+        """
+        field = self.ordering[0].lstrip('-')
+        descending = self.ordering[0].startswith('-')
+        lookup = 'lt' if descending != reverse else 'gt'
+
+        return Q(**{'%s__%s' % (field, lookup): position}) | \
+            Q(**{field: position, 'pk__%s' % lookup: pk})
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        ordering = self.ordering
+        reverse = False
+
+        if cursor is not None:
+            position, pk, reverse = cursor
+            position = self.get_position(queryset, position)
+            queryset = queryset.filter(
+                self.get_keyset_filter(position, pk, reverse))
+
+        # Backward page read in opposite direction then flip back
+        if reverse:
+            ordering = [o[1:] if o.startswith('-') else '-' + o
+                        for o in ordering]
+
+        results = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        cursor = self.encode_cursor(self.page[-1])
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        cursor = self.encode_cursor(self.page[0], reverse=True)
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor)
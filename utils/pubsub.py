@@ -0,0 +1,232 @@
+"""
+Publish subscribe between request threads
+------------------------
+Subscriber (ex: SSE stream) get a queue for a channel, publish()
+put message to every queue of that channel. Message from other
+process delivered by the transport set in PUBSUB_TRANSPORT;
+
+    utils.pubsub.LocalTransport     = this process only, default,
+                                      stand-in for test
+    utils.pubsub.CacheTransport     = through shared cache, one
+                                      poll each process, not each
+                                      subscriber; shared tier need
+                                      atomic incr() for many
+                                      publishers (memcached, redis)
+
+Transport class need publish(channel, message) and start(deliver),
+deliver(channel, message) given by the hub. Optional listen() called
+on first subscribe, so publish only process not listen.
+
+Example;
+    with subscribe('notice:1') as queue:
+        message = queue.get(timeout=15)
+
+    publish('notice:1', {'uuid': ...})
+"""
+import time
+import uuid
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PUBSUB_PREFIX = 'pubsub'
+
+
+class LocalTransport:
+    def __init__(self):
+        self.deliver = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+
+class CacheTransport:
+    """
+    Message saved in shared cache under its own key, then numbered
+    by the sequence; a thread each process read new numbers every
+    PUBSUB_POLL_INTERVAL
+    ------------------------
+    Number taken with cache.add(), so publisher given the same number
+    by a non atomic incr() (DatabaseCache) retry with next one instead
+    of overwrite. Backend with atomic incr() (memcached, redis) never
+    retry, use it for many publishers.
+
+    Number seen but not written yet (publisher between incr and add)
+    waited, `last` only advanced over contiguous numbers; missing one
+    skipped after PUBSUB_MESSAGE_TIMEOUT. Message after the gap
+    delivered right away, so order across the gap not kept.
+    """
+    sequence_key = '%s:sequence' % PUBSUB_PREFIX
+    max_attempts = 10
+
+    def __init__(self):
+        self.deliver = None
+        self.last = None
+        # Number after `last` already delivered
+        self.delivered = set()
+        # Number seen missing, {number: first seen time}
+        self.missing = dict()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get_message_key(self, message_id):
+        return '%s:message:%s' % (PUBSUB_PREFIX, message_id)
+
+    def get_slot_key(self, number):
+        return '%s:slot:%s' % (PUBSUB_PREFIX, number)
+
+    def get_sequence(self):
+        return cache.get(self.sequence_key, 0)
+
+    def get_timeout(self):
+        return getattr(settings, 'PUBSUB_MESSAGE_TIMEOUT', 60)
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def listen(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self.last = self.get_sequence()
+                self.delivered, self.missing = set(), dict()
+                self._thread = threading.Thread(
+                    target=self.loop, name='pubsub-poll', daemon=True)
+                self._thread.start()
+
+    def publish(self, channel, message):
+        # Message first, so numbered slot always point to it
+        message_key = self.get_message_key(uuid.uuid4().hex)
+        cache.set(message_key, (channel, message), self.get_timeout())
+
+        cache.add(self.sequence_key, 0, None)
+        for attempt in range(self.max_attempts):
+            number = cache.incr(self.sequence_key)
+            if cache.add(self.get_slot_key(number), message_key,
+                         self.get_timeout()):
+                return number
+
+        logger.error('Pubsub message to %s not numbered', channel)
+        return None
+
+    def poll(self):
+        sequence = self.get_sequence()
+        if sequence <= self.last:
+            return 0
+
+        numbers = [number for number in range(self.last + 1, sequence + 1)
+                   if number not in self.delivered]
+        slots = cache.get_many(
+            [self.get_slot_key(number) for number in numbers])
+        messages = cache.get_many(list(slots.values()))
+
+        now, total = time.time(), 0
+        for number in numbers:
+            message_key = slots.get(self.get_slot_key(number), None)
+            if message_key is None:
+                self.missing.setdefault(number, now)
+                continue
+
+            # Expired message counted as done
+            if message_key in messages:
+                self.deliver(*messages[message_key])
+                total += 1
+            self.delivered.add(number)
+            self.missing.pop(number, None)
+
+        # Advance over delivered or too old missing number only
+        while self.last < sequence:
+            number = self.last + 1
+            if number in self.delivered:
+                self.delivered.discard(number)
+            elif now - self.missing.get(number, now) >= self.get_timeout():
+                self.missing.pop(number)
+            else:
+                break
+            self.last = number
+        return total
+
+    def loop(self):
+        interval = getattr(settings, 'PUBSUB_POLL_INTERVAL', 0.5)
+        while True:
+            time.sleep(interval)
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Pubsub poll failed')
+
+
+class Hub:
+    def __init__(self):
+        # {channel: set(queue)}
+        self.channels = dict()
+        self.transport = None
+        self.transport_path = None
+        self._lock = threading.Lock()
+
+    def get_transport(self):
+        path = getattr(settings, 'PUBSUB_TRANSPORT',
+                       'utils.pubsub.LocalTransport')
+        if self.transport is None or self.transport_path != path:
+            self.transport = import_string(path)()
+            self.transport_path = path
+            self.transport.start(self.deliver)
+        return self.transport
+
+    def deliver(self, channel, message):
+        """Put message to every local subscriber of channel"""
+        with self._lock:
+            queues = list(self.channels.get(channel, ()))
+
+        for subscriber in queues:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client, it reload from database on reconnect
+                logger.warning('Pubsub subscriber of %s full', channel)
+        return len(queues)
+
+    def publish(self, channel, message):
+        self.get_transport().publish(channel, message)
+
+    @contextmanager
+    def subscribe(self, channel, maxsize=100):
+        subscriber = queue.Queue(maxsize=maxsize)
+        transport = self.get_transport()
+        if hasattr(transport, 'listen'):
+            transport.listen()
+
+        with self._lock:
+            self.channels.setdefault(channel, set()).add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                queues = self.channels.get(channel, set())
+                queues.discard(subscriber)
+                if not queues:
+                    self.channels.pop(channel, None)
+
+    def count(self):
+        with self._lock:
+            return sum(len(queues) for queues in self.channels.values())
+
+
+hub = Hub()
+
+
+def publish(channel, message):
+    return hub.publish(channel, message)
+
+
+def subscribe(channel, maxsize=100):
+    return hub.subscribe(channel, maxsize=maxsize)
@@ -0,0 +1,199 @@
+"""
+In-process attribute schema registry
+------------------------
+Attribute, option group and option definitions rarely changed
+(only from admin), so loaded once per process as immutable records
+and shared by all request.
+
+Signal from Attribute / AttributeOption call invalidate(), it drop
+this process copy and give new version stamp in the shared cache.
+Other process compare the stamp every CHECK_INTERVAL seconds.
+
+Example;
+    registry = AttributeRegistry('escort')
+    registry.get_attributes(content_type_id)
+    registry.get_option(option_group_id, option_id)
+"""
+import time
+import uuid
+import threading
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+# PROJECT UTILS
+from utils.validators import get_model
+
+# Version stamp checked every this seconds
+CHECK_INTERVAL = 1
+
+AttributeRecord = namedtuple('AttributeRecord', [
+    'id', 'uuid', 'identifier', 'label', 'field_type', 'option_group_id',
+    'required', 'secured', 'content_type_ids', 'role_ids'])
+
+OptionGroupRecord = namedtuple('OptionGroupRecord', [
+    'id', 'uuid', 'identifier', 'label', 'option_ids'])
+
+OptionRecord = namedtuple('OptionRecord', [
+    'id', 'uuid', 'option', 'group_id'])
+
+Schema = namedtuple('Schema', [
+    'version', 'attributes', 'by_content_type', 'groups', 'options'])
+
+
+class AttributeRegistry:
+    """Attribute definitions of one app (escort, person)"""
+
+    def __init__(self, app_label):
+        self.app_label = app_label
+        self.version_key = 'attributes:%s:version' % app_label
+        self._schema = None
+        self._checked = 0
+        # Uncommitted change of this thread, other thread keep the cache
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # Version
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version, None):
+                version = cache.get(self.version_key, version)
+        return version
+
+    def invalidate(self):
+        """Drop local copy now, other process after commit"""
+        self._schema = None
+        self._local.pending = True
+
+        # on_commit run in this thread, rollback cleared by schema
+        def bump():
+            cache.set(self.version_key, uuid.uuid4().hex, None)
+            self._schema = None
+            self._local.pending = False
+
+        transaction.on_commit(bump)
+
+    # Loader
+    def load(self, version):
+        Attribute = get_model(self.app_label, 'Attribute')
+        AttributeOption = get_model(self.app_label, 'AttributeOption')
+        AttributeOptionGroup = get_model(
+            self.app_label, 'AttributeOptionGroup')
+
+        # Many to many as id sets
+        content_types = dict()
+        through = Attribute.content_type.through.objects \
+            .values_list('attribute_id', 'contenttype_id')
+        for attribute_id, content_type_id in through:
+            content_types.setdefault(attribute_id, set()).add(content_type_id)
+
+        roles = dict()
+        if hasattr(Attribute, 'roles'):
+            through = Attribute.roles.through.objects \
+                .values_list('attribute_id', 'role_id')
+            for attribute_id, role_id in through:
+                roles.setdefault(attribute_id, set()).add(role_id)
+
+        options, group_options = dict(), dict()
+        fields = ('id', 'uuid', 'option', 'group_id')
+        for values in AttributeOption.objects.order_by('id') \
+                .values_list(*fields):
+            option = OptionRecord(*values)
+            options[option.id] = option
+            group_options.setdefault(option.group_id, list()).append(option.id)
+
+        groups = dict()
+        fields = ('id', 'uuid', 'identifier', 'label')
+        for values in AttributeOptionGroup.objects.values_list(*fields):
+            group = OptionGroupRecord(
+                *values, option_ids=tuple(group_options.get(values[0], [])))
+            groups[group.id] = group
+
+        attributes, by_content_type = dict(), dict()
+        fields = ('id', 'uuid', 'identifier', 'label', 'field_type',
+                  'option_group_id', 'required', 'secured')
+        for values in Attribute.objects.order_by('id').values_list(*fields):
+            attribute = AttributeRecord(
+                *values,
+                content_type_ids=frozenset(content_types.get(values[0], [])),
+                role_ids=frozenset(roles.get(values[0], [])))
+            attributes[attribute.id] = attribute
+
+            for content_type_id in attribute.content_type_ids:
+                by_content_type.setdefault(content_type_id, list()) \
+                    .append(attribute)
+
+        by_content_type = {key: tuple(value)
+                           for key, value in by_content_type.items()}
+        return Schema(version, attributes, by_content_type, groups, options)
+
+    @property
+    def schema(self):
+        now = time.time()
+
+        # Changed inside running transaction of this thread, it may
+        # rollback; so read it but not keep it. Out of the block it
+        # was committed (bumped) or rolled back
+        if getattr(self._local, 'pending', False):
+            if transaction.get_connection().in_atomic_block:
+                return self.load(self.get_version())
+            self._local.pending = False
+
+        schema = self._schema
+
+        if schema is None or now - self._checked >= CHECK_INTERVAL:
+            with self._lock:
+                version = self.get_version()
+                schema = self._schema
+                if schema is None or schema.version != version:
+                    schema = self.load(version)
+                    self._schema = schema
+                self._checked = now
+        return schema
+
+    # Readers
+    def get_attributes(self, content_type_id, *agrs, **kwargs):
+        """
+        Attributes for content type
+        identifiers = only this identifier
+        role_ids    = only attribute for this roles
+        """
+        identifiers = kwargs.get('identifiers', None)
+        role_ids = kwargs.get('role_ids', None)
+        attributes = self.schema.by_content_type.get(content_type_id, ())
+
+        if identifiers is not None:
+            attributes = [attr for attr in attributes
+                          if attr.identifier in identifiers]
+
+        if role_ids is not None:
+            attributes = [attr for attr in attributes
+                          if attr.role_ids & set(role_ids)]
+        return tuple(attributes)
+
+    def get_attribute(self, attribute_id):
+        return self.schema.attributes.get(attribute_id, None)
+
+    def get_option_group(self, group_id):
+        return self.schema.groups.get(group_id, None)
+
+    def get_options(self, group_id):
+        schema = self.schema
+        group = schema.groups.get(group_id, None)
+        if group is None:
+            return ()
+        return tuple(schema.options[pk] for pk in group.option_ids)
+
+    def get_option(self, group_id, option_id):
+        """Option by id, must inside the group"""
+        try:
+            option = self.schema.options.get(int(option_id), None)
+        except (TypeError, ValueError):
+            return None
+
+        if option is None or option.group_id != group_id:
+            return None
+        return option
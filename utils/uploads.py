@@ -0,0 +1,331 @@
+"""
+Resumable upload
+------------------------
+Big file sent in chunks, each PUT with the offset it start from;
+after lost connection client ask the offset and continue from it.
+Chunk appended to a spool file on local disk (UPLOAD_SPOOL_DIR), so
+no request hold the whole file. Finalize create the row, the file
+moved to storage (GCS) in background after commit; row of file failed
+to store after UPLOAD_STORE_ATTEMPTS removed, client upload again.
+
+    POST  attachments/uploads/                   init, return upload
+    GET   attachments/uploads/<upload>/          current offset
+    PUT   attachments/uploads/<upload>/          chunk as body,
+                                                 Upload-Offset header
+    POST  attachments/uploads/<upload>/finalize/ create attachment
+
+Spool is local to the host, run upload request of one client on
+one host (sticky) or put UPLOAD_SPOOL_DIR on shared disk. Unfinished
+upload removed by `purge_uploads`.
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import tempfile
+import logging
+import mimetypes
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.utils.translation import ugettext_lazy as _
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.cache import never_cache
+
+# THIRD PARTY
+from rest_framework import status as response_status
+from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    APIException, NotFound, ValidationError, PermissionDenied)
+from rest_framework.response import Response
+
+# PROJECT UTILS
+from utils.blobs import save_file
+from utils.executors import run_in_background
+
+UPLOAD_PATTERN = r'(?P<upload_id>[0-9a-f]{32})'
+COPY_BUFFER = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetConflict(APIException):
+    status_code = response_status.HTTP_409_CONFLICT
+    default_detail = _("Offset tidak sesuai.")
+    default_code = 'offset_conflict'
+
+    def __init__(self, offset, detail=None):
+        self.offset = offset
+        super().__init__(detail=detail)
+
+
+def get_option(name, default):
+    return getattr(settings, 'UPLOAD_%s' % name, default)
+
+
+def get_spool_dir():
+    return get_option('SPOOL_DIR', os.path.join(
+        tempfile.gettempdir(), 'uploads'))
+
+
+def get_upload_dir(upload_id):
+    return os.path.join(get_spool_dir(), upload_id)
+
+
+def create_upload(person_id, filename, size, data):
+    """New spool, return its meta"""
+    if size < 1 or size > get_option('MAX_SIZE', 200 * 1024 * 1024):
+        raise ValidationError({'size': _("Ukuran file tidak valid.")})
+
+    upload_id = uuid.uuid4().hex
+    directory = get_upload_dir(upload_id)
+    os.makedirs(directory)
+
+    meta = {
+        'upload_id': upload_id, 'person_id': person_id,
+        'filename': os.path.basename(filename), 'size': size,
+        'data': data, 'created': time.time()}
+    with open(os.path.join(directory, 'meta.json'), 'w') as meta_file:
+        json.dump(meta, meta_file)
+    open(os.path.join(directory, 'data'), 'wb').close()
+    return dict(meta, offset=0)
+
+
+def load_upload(upload_id, person_id):
+    """Meta with current offset, only for its person"""
+    directory = get_upload_dir(upload_id)
+    try:
+        with open(os.path.join(directory, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+    except (IOError, ValueError):
+        raise NotFound()
+
+    if meta['person_id'] != person_id:
+        raise NotFound()
+
+    meta['offset'] = os.path.getsize(os.path.join(directory, 'data'))
+    return meta
+
+
+def append_chunk(meta, offset, stream, length):
+    """Write chunk at offset, return new offset"""
+    if length < 1 or length > get_option('MAX_CHUNK', 8 * 1024 * 1024):
+        raise ValidationError({'chunk': _("Ukuran chunk tidak valid.")})
+
+    if offset + length > meta['size']:
+        raise ValidationError({'chunk': _("Melebihi ukuran file.")})
+
+    path = os.path.join(get_upload_dir(meta['upload_id']), 'data')
+    with open(path, 'ab') as data:
+        # Retried chunk from other worker wait here
+        fcntl.flock(data, fcntl.LOCK_EX)
+        current = os.fstat(data.fileno()).st_size
+        if current != offset:
+            raise OffsetConflict(current)
+
+        remaining = length
+        while remaining:
+            buffer = stream.read(min(COPY_BUFFER, remaining))
+            if not buffer:
+                break
+            data.write(buffer)
+            remaining -= len(buffer)
+
+        # Broken body, keep only complete chunk
+        if remaining:
+            data.truncate(offset)
+            raise ValidationError({'chunk': _("Chunk tidak lengkap.")})
+        return offset + length
+
+
+@contextmanager
+def lock_upload(upload_id):
+    """One finalize at a time, the waiting one find it done"""
+    try:
+        meta_file = open(os.path.join(get_upload_dir(upload_id), 'meta.json'))
+    except IOError:
+        raise NotFound()
+
+    with meta_file:
+        fcntl.flock(meta_file, fcntl.LOCK_EX)
+        yield
+
+
+def finish_upload(upload_id):
+    """Spool kept until stored, finalize again not allowed"""
+    os.rename(os.path.join(get_upload_dir(upload_id), 'meta.json'),
+              os.path.join(get_upload_dir(upload_id), 'meta.done'))
+
+
+def store_upload(model, pk, field_name, upload_id, filename):
+    """
+    Move spool file to storage, run in background
+    ------------------------
+    Retried UPLOAD_STORE_ATTEMPTS times, then the row removed, never
+    left without its file
+    """
+    attempts = get_option('STORE_ATTEMPTS', 3)
+    path = os.path.join(get_upload_dir(upload_id), 'data')
+
+    for attempt in range(1, attempts + 1):
+        instance = model.objects.filter(pk=pk).first()
+        if not instance:
+            break
+
+        try:
+            with open(path, 'rb') as data:
+                save_file(getattr(instance, field_name), filename, File(data))
+            break
+        except Exception:
+            if attempt < attempts:
+                time.sleep(get_option('STORE_RETRY_DELAY', 1) * attempt)
+                continue
+            logger.exception('Upload %s not stored, %s %s removed',
+                             upload_id, model.__name__, pk)
+            instance.delete()
+    shutil.rmtree(get_upload_dir(upload_id), ignore_errors=True)
+
+
+def purge_uploads(max_age):
+    """Remove spool older than max_age seconds, return count"""
+    spool = get_spool_dir()
+    if not os.path.isdir(spool):
+        return 0
+
+    removed, before = 0, time.time() - max_age
+    for upload_id in os.listdir(spool):
+        directory = os.path.join(spool, upload_id)
+        # Last chunk time, directory mtime not changed by append
+        try:
+            modified = os.path.getmtime(os.path.join(directory, 'data'))
+        except OSError:
+            modified = os.path.getmtime(directory)
+        if modified < before:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def get_field_name(filename, field_type=None):
+    if field_type not in ('image', 'file'):
+        mimetype = mimetypes.guess_type(filename)[0] or ''
+        field_type = 'image' if mimetype.startswith('image/') else 'file'
+    return 'value_%s' % field_type
+
+
+class ResumableUploadMixin:
+    """
+    Chunked upload actions for attachment viewset
+    ------------------------
+    upload_model            = model created on finalize
+    upload_serializer_class = validate and create it, without file
+    """
+    upload_model = None
+    upload_serializer_class = None
+
+    def get_upload_person(self, request):
+        person = getattr(request.user, 'person', None)
+        if not person:
+            raise PermissionDenied()
+        return person
+
+    def get_upload_response(self, meta, status=response_status.HTTP_200_OK):
+        return Response({
+            'upload_id': meta['upload_id'], 'offset': meta['offset'],
+            'size': meta['size'],
+            'chunk_size': get_option('CHUNK_SIZE', 1024 * 1024)},
+            status=status)
+
+    def handle_exception(self, exc):
+        # Offset kept as number, client continue from it
+        if isinstance(exc, OffsetConflict):
+            return Response({'detail': exc.detail, 'offset': exc.offset},
+                            status=exc.status_code)
+        return super().handle_exception(exc)
+
+    @action(methods=['post'], detail=False, url_path='uploads')
+    @method_decorator(csrf_protect)
+    @method_decorator(never_cache)
+    def upload_init(self, request, format=None):
+        person = self.get_upload_person(request)
+        filename = request.data.get('filename', None)
+        if not filename:
+            raise ValidationError({'filename': _("Nama file harus diisi.")})
+
+        try:
+            size = int(request.data.get('size', 0))
+        except (TypeError, ValueError):
+            raise ValidationError({'size': _("Ukuran harus angka.")})
+
+        # Attachment field validated now, not after all chunk sent
+        data = {key: request.data.get(key) for key in (
+            'entity_uuid', 'entity_index', 'featured', 'caption',
+            'field_type') if request.data.get(key) is not None}
+        context = {'request': request}
+        serializer = self.upload_serializer_class(
+            data=dict(data), context=context)
+        serializer.is_valid(raise_exception=True)
+
+        meta = create_upload(person.pk, filename, size, data)
+        return self.get_upload_response(
+            meta, status=response_status.HTTP_201_CREATED)
+
+    @action(methods=['get', 'put'], detail=False,
+            url_path='uploads/%s' % UPLOAD_PATTERN)
+    @method_decorator(never_cache)
+    def upload_chunk(self, request, upload_id=None, format=None):
+        person = self.get_upload_person(request)
+        meta = load_upload(upload_id, person.pk)
+        if request.method == 'GET':
+            return self.get_upload_response(meta)
+
+        offset = request.META.get('HTTP_UPLOAD_OFFSET',
+                                  request.query_params.get('offset', None))
+        try:
+            offset = int(offset)
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (TypeError, ValueError):
+            raise ValidationError({'offset': _("Offset harus angka.")})
+
+        meta['offset'] = append_chunk(meta, offset, request.stream, length)
+        return self.get_upload_response(meta)
+
+    @action(methods=['post'], detail=False,
+            url_path='uploads/%s/finalize' % UPLOAD_PATTERN)
+    @method_decorator(csrf_protect)
+    @method_decorator(never_cache)
+    def upload_finalize(self, request, upload_id=None, format=None):
+        person = self.get_upload_person(request)
+        load_upload(upload_id, person.pk)
+
+        # Lock held until commit, other finalize of the upload then 404
+        with lock_upload(upload_id):
+            meta = load_upload(upload_id, person.pk)
+            if meta['offset'] != meta['size']:
+                raise OffsetConflict(
+                    meta['offset'], detail=_("Upload belum lengkap."))
+
+            data = dict(meta['data'])
+            field_name = get_field_name(
+                meta['filename'], data.pop('field_type', None))
+            context = {'request': request}
+            serializer = self.upload_serializer_class(
+                data=data, context=context)
+            serializer.is_valid(raise_exception=True)
+
+            with transaction.atomic():
+                instance = serializer.save()
+
+                # Done only with the row, after rollback finalize again
+                transaction.on_commit(partial(finish_upload, upload_id))
+                run_in_background(
+                    store_upload, self.upload_model, instance.pk,
+                    field_name, upload_id, meta['filename'], on_commit=True)
+        return Response(serializer.data,
+                        status=response_status.HTTP_202_ACCEPTED)